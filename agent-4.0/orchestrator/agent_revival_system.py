@@ -9,25 +9,28 @@ This system:
 3. Assigns tasks from task queue
 4. Monitors agent status (idle → working → completed)
 5. Handles errors and retry logic
-6. Updates agent_state.json in real-time
+6. Persists agent state (agent_state.json snapshots + a delta log)
 """
 
 import os
 import sys
-import json
 import time
+import asyncio
 import logging
 import threading
-import queue
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Callable, Tuple
+from dataclasses import dataclass, field
+from concurrent.futures import Future
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from multi_agent_system import MultiAgentSystem, AgentStatus, SkillLevel, Agent
+from task_scheduler import TaskScheduler
+from state_store import AgentStateStore
+from execution_backends import TaskExecutor, resolve_future
 
 logging.basicConfig(
     level=logging.INFO,
@@ -36,9 +39,28 @@ logging.basicConfig(
 logger = logging.getLogger('AgentRevival')
 
 
+def simulated_work(duration: float = 0.1):
+    """Stand-in work for tasks without a function"""
+    time.sleep(duration)
+
+
+async def simulated_async_work(duration: float = 0.1):
+    """Stand-in work for async tasks without a function"""
+    await asyncio.sleep(duration)
+
+
 @dataclass
 class Task:
-    """Task definition"""
+    """
+    Task definition (higher priority runs first)
+    
+    func runs on the backend for task_type: 'io' (thread pool), 'cpu'
+    (process pool - func and args must be picklable) or 'async' (event loop -
+    func must be a coroutine function). task_type defaults to func's
+    @run_on annotation, else 'io'. timeout applies to each attempt. future
+    resolves with func's result once the task completes, or with its error
+    once retries are exhausted; cancelling it cancels the task.
+    """
     id: str
     description: str
     category: str
@@ -51,6 +73,13 @@ class Task:
     created_at: str = None
     completed_at: str = None
     error: str = None
+    task_type: Optional[str] = None
+    func: Optional[Callable] = field(default=None, repr=False)
+    args: Tuple = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    timeout: Optional[float] = None
+    result: Any = field(default=None, repr=False)
+    future: Optional[Future] = field(default=None, repr=False, compare=False)
 
     def __post_init__(self):
         if self.created_at is None:
@@ -63,24 +92,39 @@ class AgentRevivalSystem:
     
     Manages:
     - Agent activation and deactivation
-    - Task queue management
-    - Task assignment based on agent capabilities
+    - Priority task scheduling with aging (TaskScheduler)
+    - Task assignment to the least-loaded idle agent of the task's category
     - Real-time status monitoring
     - Error handling and retry logic
     - Agent state persistence
     """
 
-    def __init__(self, skill_level: SkillLevel = SkillLevel.EXPERT):
+    def __init__(self, skill_level: SkillLevel = SkillLevel.EXPERT, aging_rate: float = 0.1,
+                 state_dir: Optional[Path] = None, snapshot_interval: float = 30.0,
+                 executor: Optional[TaskExecutor] = None):
+        """
+        Args:
+            skill_level: User skill level
+            aging_rate: Priority a waiting task gains per second
+            state_dir: Where agent state is persisted (default: agent-4.0/state)
+            snapshot_interval: Minimum seconds between full agent state snapshots
+            executor: Execution backends for task work (default: io threads,
+                cpu processes, async event loop)
+        """
         self.base_path = Path(__file__).parent.parent.parent
         self.multi_agent_system = MultiAgentSystem()
         self.skill_level = skill_level
         
         # Task management
-        self.task_queue = queue.Queue()
+        self.scheduler = TaskScheduler(self.multi_agent_system.agents.values(), aging_rate=aging_rate)
         self.active_tasks: Dict[str, Task] = {}
         self.completed_tasks: List[Task] = []
         self.failed_tasks: List[Task] = []
         
+        # Task execution (task_id -> future of the running attempt)
+        self.executor = executor or TaskExecutor()
+        self.running: Dict[str, Future] = {}
+        
         # System status
         self.is_running = False
         self.workers: List[threading.Thread] = []
@@ -90,11 +134,22 @@ class AgentRevivalSystem:
         logger.info("=" * 70)
         logger.info(f"   Skill Level: {skill_level.value}")
         logger.info(f"   Total Agents: {len(self.multi_agent_system.agents)}")
+        
+        # State persistence (periodic snapshot + per-change delta log)
+        self.state_store = AgentStateStore(
+            state_dir or self.base_path / 'agent-4.0' / 'state',
+            self._state_snapshot,
+            snapshot_interval=snapshot_interval
+        )
+        self.restore_agent_state()
 
     def add_task(self, task: Task) -> bool:
         """Add task to queue"""
         try:
-            self.task_queue.put(task)
+            if task.future is None:
+                task.future = Future()
+                task.future.add_done_callback(lambda f, task_id=task.id: self._on_task_future_done(f, task_id))
+            self.scheduler.submit(task)
             logger.info(f"📋 Task added: {task.description} (ID: {task.id})")
             return True
         except Exception as e:
@@ -114,37 +169,11 @@ class AgentRevivalSystem:
         """
         Select best agent for task based on category and capabilities
         
-        Uses intelligent matching:
-        - Category-based selection
-        - Agent availability
-        - Skill requirements
-        - Load balancing
+        Returns the least-loaded idle agent of the task's category (O(1) heap
+        peek), or None if every agent in the category is busy. Workers do not
+        call this: they take reserved (task, agent) pairs from the scheduler.
         """
-        category_map = {
-            'TRADING': list(range(1, 11)),
-            'LEGAL': list(range(11, 21)),
-            'FEDERAL': list(range(21, 26)),
-            'NONPROFIT': list(range(26, 31)),
-            'SYSTEM': list(range(31, 41)),
-            'INTEGRATION': list(range(41, 46)),
-            'AI_ML': list(range(46, 51))
-        }
-        
-        # Get candidate agents for this category
-        candidate_ids = category_map.get(task.category, [])
-        
-        if not candidate_ids:
-            logger.warning(f"⚠️  No agents found for category: {task.category}")
-            return None
-        
-        # Find idle agents in this category
-        for agent_id in candidate_ids:
-            agent = self.multi_agent_system.agents.get(agent_id)
-            if agent and agent.status == AgentStatus.IDLE:
-                return agent_id
-        
-        # If no idle agents, return first agent in category (will queue)
-        return candidate_ids[0] if candidate_ids else None
+        return self.scheduler.peek_idle(task.category)
 
     def assign_task_to_agent(self, task: Task, agent_id: int) -> bool:
         """Assign task to specific agent"""
@@ -165,113 +194,136 @@ class AgentRevivalSystem:
         
         logger.info(f"✅ Task '{task.description[:50]}...' assigned to {agent.name}")
         
-        # Save state
-        self.save_agent_state()
+        # Record state change
+        self.state_store.record_agent(agent)
         
         return True
 
-    def execute_task(self, task: Task, agent: Agent) -> bool:
+    def _on_task_future_done(self, future: Future, task_id: str):
+        """Cancelling a task's result future cancels its running attempt"""
+        if future.cancelled():
+            attempt = self.running.get(task_id)
+            if attempt is not None:
+                attempt.cancel()
+
+    def execute_task(self, task: Task, agent: Agent) -> Future:
         """
-        Execute task with agent
+        Start the task on the execution backend for its task type
         
-        In production, this would:
-        - Actually run the task logic
-        - Monitor execution
-        - Handle timeouts
+        Returns immediately. The agent stays reserved until the attempt
+        finishes, then _finish_task records the outcome, retries on failure
+        and releases the agent.
         
-        For now, simulates execution
+        Returns:
+            Future of this attempt
         """
+        task_type = task.task_type
+        func = task.func
+        if func is None:
+            task_type = task_type or 'io'
+            func = simulated_async_work if task_type == 'async' else simulated_work
+        
+        logger.info(f"🔄 {agent.name} executing: {task.description}")
         try:
-            logger.info(f"🔄 {agent.name} executing: {task.description}")
-            
-            # Simulate task execution (in real system, this would be actual work)
-            time.sleep(0.1)  # Simulated work
-            
-            # Mark as completed
-            task.status = "completed"
-            task.completed_at = datetime.now().isoformat()
-            
-            # Update agent
-            agent.status = AgentStatus.IDLE
-            agent.current_task = None
-            agent.tasks_completed += 1
-            
-            # Move to completed
-            self.completed_tasks.append(task)
-            if task.id in self.active_tasks:
-                del self.active_tasks[task.id]
-            
-            logger.info(f"✅ {agent.name} completed task: {task.description}")
-            
-            # Save state
-            self.save_agent_state()
-            
-            return True
-            
+            attempt = self.executor.submit(func, task.args, task.kwargs,
+                                           task_type=task_type, timeout=task.timeout)
         except Exception as e:
-            logger.error(f"❌ Task execution failed: {e}")
-            
-            # Handle error
-            task.error = str(e)
-            task.retry_count += 1
-            
-            agent.status = AgentStatus.ERROR
-            agent.errors_encountered += 1
-            
-            # Retry if possible
-            if task.retry_count < task.max_retries:
-                task.status = "retry"
-                logger.info(f"🔄 Retrying task (attempt {task.retry_count}/{task.max_retries})")
-                self.task_queue.put(task)
+            attempt = Future()
+            attempt.set_exception(e)
+        
+        self.running[task.id] = attempt
+        attempt.add_done_callback(lambda f: self._finish_task(task, agent, f))
+        return attempt
+
+    def _finish_task(self, task: Task, agent: Agent, attempt: Future):
+        """Record the outcome of an attempt (runs on the backend's thread)"""
+        self.running.pop(task.id, None)
+        try:
+            if attempt.cancelled() or (task.future is not None and task.future.cancelled()):
+                task.status = "cancelled"
+                logger.info(f"🚫 {agent.name} task cancelled: {task.description}")
+                outcome = None
             else:
-                task.status = "failed"
-                self.failed_tasks.append(task)
-                logger.error(f"❌ Task failed after {task.max_retries} attempts")
+                error = attempt.exception()
+                outcome = error
+                if error is None:
+                    task.result = attempt.result()
+                    
+                    # Mark as completed
+                    task.status = "completed"
+                    task.completed_at = datetime.now().isoformat()
+                    agent.tasks_completed += 1
+                    self.completed_tasks.append(task)
+                    logger.info(f"✅ {agent.name} completed task: {task.description}")
+                else:
+                    logger.error(f"❌ Task execution failed: {error!r}")
+                    
+                    # Handle error
+                    task.error = str(error) or type(error).__name__
+                    task.retry_count += 1
+                    agent.status = AgentStatus.ERROR
+                    agent.errors_encountered += 1
+                    
+                    # Retry if possible
+                    if task.retry_count < task.max_retries:
+                        task.status = "retry"
+                        logger.info(f"🔄 Retrying task (attempt {task.retry_count}/{task.max_retries})")
+                        self.scheduler.submit(task)
+                    else:
+                        task.status = "failed"
+                        self.failed_tasks.append(task)
+                        logger.error(f"❌ Task failed after {task.max_retries} attempts")
             
             # Reset agent
             agent.status = AgentStatus.IDLE
             agent.current_task = None
-            
             if task.id in self.active_tasks:
                 del self.active_tasks[task.id]
+            self.scheduler.release(agent.id)
             
-            # Save state
-            self.save_agent_state()
+            # Record state change
+            self.state_store.record_agent(agent)
             
-            return False
+            # Resolve the task's result future
+            if task.future is not None and task.status in ("completed", "failed"):
+                if task.status == "completed":
+                    resolve_future(task.future, task.result)
+                else:
+                    resolve_future(task.future, exception=outcome)
+        finally:
+            # Mark task as done in queue
+            self.scheduler.task_done()
 
     def worker_thread(self):
-        """Worker thread that processes tasks from queue"""
+        """Worker thread that processes tasks from the scheduler"""
         logger.info("🔧 Worker thread started")
         
         while self.is_running:
             try:
-                # Get task from queue (with timeout to allow checking is_running)
-                task = self.task_queue.get(timeout=1.0)
-                
-                # Select agent
-                agent_id = self.select_agent_for_task(task)
+                # Highest-ranked task with a reserved idle agent (timeout allows checking is_running)
+                assignment = self.scheduler.next_assignment(timeout=1.0)
+                if assignment is None:
+                    continue
+                task, agent_id = assignment
                 
-                if agent_id is None:
-                    logger.warning(f"⚠️  No agent available for task: {task.description}")
-                    self.task_queue.put(task)  # Re-queue
-                    time.sleep(1)
+                # Cancelled while waiting
+                if task.future is not None and task.future.cancelled():
+                    task.status = "cancelled"
+                    self.scheduler.release(agent_id)
+                    self.scheduler.task_done()
                     continue
                 
                 # Assign task
                 if not self.assign_task_to_agent(task, agent_id):
-                    self.task_queue.put(task)  # Re-queue on failure
+                    self.scheduler.release(agent_id)
+                    self.scheduler.submit(task)  # Re-queue on failure
+                    self.scheduler.task_done()
                     continue
                 
-                # Execute task
+                # Start task (completion is handled when the attempt finishes)
                 agent = self.multi_agent_system.agents[agent_id]
                 self.execute_task(task, agent)
                 
-                # Mark task as done in queue
-                self.task_queue.task_done()
-                
-            except queue.Empty:
-                continue
             except Exception as e:
                 logger.error(f"❌ Worker thread error: {e}")
                 time.sleep(1)
@@ -291,6 +343,7 @@ class AgentRevivalSystem:
         logger.info(f"   Agents: {len(self.multi_agent_system.agents)}")
         
         self.is_running = True
+        self.state_store.start()
         
         # Start worker threads
         for i in range(num_workers):
@@ -314,36 +367,68 @@ class AgentRevivalSystem:
         
         self.workers.clear()
         
+        # Let running attempts finish (queued ones are cancelled)
+        self.executor.shutdown(wait=True)
+        
         # Save final state
-        self.save_agent_state()
+        self.state_store.close()
         
         logger.info("✅ Agent Revival System stopped")
 
+    def _state_snapshot(self) -> Dict[str, Any]:
+        """Full agent state (agent_state.json format)"""
+        state = self.multi_agent_system.get_status_report()
+        
+        # Add revival system stats
+        state['revival_system'] = {
+            'is_running': self.is_running,
+            'tasks_in_queue': self.scheduler.qsize(),
+            'active_tasks': len(self.active_tasks),
+            'completed_tasks': len(self.completed_tasks),
+            'failed_tasks': len(self.failed_tasks),
+            'worker_threads': len(self.workers)
+        }
+        return state
+
     def save_agent_state(self):
-        """Save current agent state to JSON file"""
+        """Write a full agent state snapshot now (changes are otherwise persisted in the background)"""
         try:
-            state_path = self.base_path / 'agent-4.0' / 'state' / 'agent_state.json'
-            state_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Get status report from multi-agent system
-            state = self.multi_agent_system.get_status_report()
-            
-            # Add revival system stats
-            state['revival_system'] = {
-                'is_running': self.is_running,
-                'tasks_in_queue': self.task_queue.qsize(),
-                'active_tasks': len(self.active_tasks),
-                'completed_tasks': len(self.completed_tasks),
-                'failed_tasks': len(self.failed_tasks),
-                'worker_threads': len(self.workers)
-            }
-            
-            with open(state_path, 'w') as f:
-                json.dump(state, f, indent=2)
-            
+            self.state_store.flush(snapshot=True)
         except Exception as e:
             logger.error(f"❌ Failed to save agent state: {e}")
 
+    def restore_agent_state(self):
+        """
+        Restore agent counters from the last snapshot plus the delta log
+        
+        Agents that were mid-task when the previous run ended are reset to
+        IDLE - their tasks were lost with the in-memory queue.
+        """
+        try:
+            recovered = self.state_store.recover()
+        except Exception as e:
+            logger.error(f"❌ Failed to restore agent state: {e}")
+            return
+        if not recovered:
+            self.state_store.track(self.multi_agent_system.agents.values())
+            return
+        
+        interrupted = 0
+        for agent_id, fields in recovered['agents'].items():
+            agent = self.multi_agent_system.agents.get(agent_id)
+            if agent is None:
+                continue
+            agent.tasks_completed = fields.get('tasks_completed') or 0
+            agent.errors_encountered = fields.get('errors_encountered') or 0
+            if fields.get('status') == AgentStatus.WORKING.value:
+                interrupted += 1
+                logger.warning(f"⚠️  {agent.name} was interrupted during: {fields.get('current_task')}")
+            self.state_store.record_agent(agent)
+        self.state_store.track(self.multi_agent_system.agents.values())
+        
+        logger.info(f"💾 Agent state restored (snapshot seq {recovered['last_seq']}, "
+                    f"{recovered['replayed']} deltas replayed, {interrupted} interrupted)")
+
     def get_status(self) -> Dict[str, Any]:
         """Get comprehensive system status"""
         agent_status = self.multi_agent_system.get_status_report()
@@ -360,7 +445,7 @@ class AgentRevivalSystem:
                 'errors': agent_status['total_errors']
             },
             'tasks': {
-                'in_queue': self.task_queue.qsize(),
+                'in_queue': self.scheduler.qsize(),
                 'active': len(self.active_tasks),
                 'completed': len(self.completed_tasks),
                 'failed': len(self.failed_tasks)
@@ -406,7 +491,8 @@ def create_demo_tasks() -> List[Task]:
             description=f"Execute paper trading strategy #{i+1}",
             category="TRADING",
             pillar="PILLAR_A",
-            priority=1
+            priority=1,
+            task_type="cpu"
         ))
     
     # Legal tasks (Pillar B)
@@ -471,7 +557,7 @@ def main():
             revival.print_status()
         
         # Wait for all tasks to complete
-        revival.task_queue.join()
+        revival.scheduler.join()
         
         # Final status
         revival.print_status()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+AGENT 4.0 - EXECUTION BACKENDS
+Where AgentRevivalSystem actually runs task work
+
+Tasks are routed by task type to a pluggable backend:
+
+- 'io'    ThreadBackend   - thread pool for blocking I/O (API syncs, file moves)
+- 'cpu'   ProcessBackend  - process pool for CPU-heavy work (backtests, PDF
+                            extraction), so it runs on every core instead of
+                            serialising behind the GIL
+- 'async' AsyncioBackend  - one event loop for coroutine-based network calls
+
+The type comes from Task.task_type, or from the @run_on('cpu') annotation on
+the task function (default 'io').
+
+TaskExecutor.submit() returns a concurrent.futures.Future for every attempt.
+Timeouts are enforced by one watchdog thread: an expired future fails with
+TimeoutError and the backend work is cancelled. Coroutines and work still
+waiting for a pool slot stop immediately; a thread or process that is
+already running cannot be interrupted, finishes in the background and its
+result is discarded. Cancelling the returned future cancels the same way.
+"""
+
+import os
+import heapq
+import asyncio
+import inspect
+import logging
+import itertools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, InvalidStateError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('ExecutionBackends')
+
+TASK_TYPES = ('io', 'cpu', 'async')
+DEFAULT_TASK_TYPE = 'io'
+
+
+def run_on(task_type: str):
+    """
+    Annotate a task function with the backend it needs
+
+    Args:
+        task_type: 'io', 'cpu' or 'async'
+    """
+    def annotate(func: Callable) -> Callable:
+        func.task_type = task_type
+        return func
+    return annotate
+
+
+class ExecutionBackend:
+    """Runs callables and returns concurrent.futures.Future objects"""
+
+    name = 'backend'
+
+    def submit(self, func: Callable, args: Tuple = (), kwargs: Optional[Dict] = None) -> Future:
+        raise NotImplementedError
+
+    def shutdown(self, wait: bool = True):
+        pass
+
+
+class ThreadBackend(ExecutionBackend):
+    """Thread pool for blocking I/O"""
+
+    name = 'thread'
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Args:
+            max_workers: Pool size (default: the executor's own default)
+        """
+        self.max_workers = max_workers
+        self.pool = None
+        self.lock = threading.Lock()
+
+    def _new_pool(self):
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='task-io')
+
+    def _get_pool(self):
+        # Created on first use, so unused backends cost nothing (no idle worker processes)
+        if self.pool is None:
+            with self.lock:
+                if self.pool is None:
+                    self.pool = self._new_pool()
+        return self.pool
+
+    def submit(self, func: Callable, args: Tuple = (), kwargs: Optional[Dict] = None) -> Future:
+        return self._get_pool().submit(func, *args, **(kwargs or {}))
+
+    def shutdown(self, wait: bool = True):
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+class ProcessBackend(ThreadBackend):
+    """
+    Process pool for CPU-bound work (functions and arguments must be picklable)
+
+    The pool is started lazily from a worker thread while the asyncio loop
+    thread may already be running, so workers are never forked from this
+    process: they come from a forkserver (spawn where forkserver is missing).
+    """
+
+    name = 'process'
+
+    def __init__(self, max_workers: Optional[int] = None, start_method: Optional[str] = None):
+        """
+        Args:
+            max_workers: Worker processes (default: one per CPU)
+            start_method: multiprocessing start method (default: forkserver, else spawn)
+        """
+        super().__init__(max_workers or os.cpu_count() or 1)
+        if start_method is None:
+            methods = multiprocessing.get_all_start_methods()
+            start_method = 'forkserver' if 'forkserver' in methods else 'spawn'
+        self.mp_context = multiprocessing.get_context(start_method)
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self.mp_context)
+
+    def submit(self, func: Callable, args: Tuple = (), kwargs: Optional[Dict] = None) -> Future:
+        try:
+            return super().submit(func, args, kwargs)
+        except BrokenProcessPool:
+            # A worker died (OOM, segfault) - replace the pool and try once more
+            logger.warning("⚠️  Process pool broken - restarting it")
+            self.shutdown(wait=False)
+            return super().submit(func, args, kwargs)
+
+
+class AsyncioBackend(ExecutionBackend):
+    """Event loop in a daemon thread for coroutine functions"""
+
+    name = 'asyncio'
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        if self.loop is None:
+            with self.lock:
+                if self.loop is None:
+                    loop = asyncio.new_event_loop()
+                    self.thread = threading.Thread(target=loop.run_forever, name='task-async', daemon=True)
+                    self.thread.start()
+                    self.loop = loop
+        return self.loop
+
+    def submit(self, func: Callable, args: Tuple = (), kwargs: Optional[Dict] = None) -> Future:
+        if not inspect.iscoroutinefunction(func):
+            raise TypeError(f"async tasks need a coroutine function, got {func!r}")
+        # Cancelling the returned future cancels the coroutine inside the loop
+        return asyncio.run_coroutine_threadsafe(func(*args, **(kwargs or {})), self._get_loop())
+
+    def shutdown(self, wait: bool = True):
+        with self.lock:
+            loop, self.loop = self.loop, None
+            thread, self.thread = self.thread, None
+        if loop is None:
+            return
+
+        async def cancel_all():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if wait:
+            try:
+                asyncio.run_coroutine_threadsafe(cancel_all(), loop).result(timeout=5.0)
+            except Exception as e:
+                logger.warning(f"⚠️  Async tasks did not stop cleanly: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=5.0 if wait else 1.0)
+            if thread.is_alive():
+                logger.warning("⚠️  Event loop thread did not stop - leaving the loop open")
+                return
+        loop.close()
+
+
+def resolve_future(future: Future, result: Any = None, exception: Optional[BaseException] = None) -> bool:
+    """Resolve a future unless it is already done (cancelled / timed out)"""
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+        return True
+    except InvalidStateError:
+        return False
+
+
+class TaskExecutor:
+    """Routes task functions to backends and enforces per-task timeouts"""
+
+    def __init__(self, backends: Optional[Dict[str, ExecutionBackend]] = None):
+        """
+        Args:
+            backends: task_type -> backend (default: io threads, cpu processes, async event loop)
+        """
+        self.backends: Dict[str, ExecutionBackend] = backends or {
+            'io': ThreadBackend(),
+            'cpu': ProcessBackend(),
+            'async': AsyncioBackend()
+        }
+        self.stats = {task_type: {'submitted': 0, 'completed': 0, 'failed': 0,
+                                  'timed_out': 0, 'cancelled': 0}
+                      for task_type in self.backends}
+
+        # Watchdog: [(deadline, seq, future, backend future, task_type)]
+        self.deadlines: List[Tuple[float, int, Future, Future, str]] = []
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self._seq = itertools.count()
+        self._watchdog: Optional[threading.Thread] = None
+        self._closed = False
+
+    def register(self, task_type: str, backend: ExecutionBackend):
+        """Add or replace the backend for a task type"""
+        self.backends[task_type] = backend
+        self.stats.setdefault(task_type, {'submitted': 0, 'completed': 0, 'failed': 0,
+                                          'timed_out': 0, 'cancelled': 0})
+
+    @staticmethod
+    def task_type_of(func: Callable, task_type: Optional[str] = None) -> str:
+        """Explicit type, else the function's @run_on annotation, else 'io'"""
+        return task_type or getattr(func, 'task_type', None) or DEFAULT_TASK_TYPE
+
+    def submit(self, func: Callable, args: Tuple = (), kwargs: Optional[Dict] = None,
+               task_type: Optional[str] = None, timeout: Optional[float] = None) -> Future:
+        """
+        Run func on the backend for its task type
+
+        Args:
+            func: Callable (a coroutine function for 'async')
+            args: Positional arguments
+            kwargs: Keyword arguments
+            task_type: Backend to use (default: func's annotation, else 'io')
+            timeout: Seconds before the future fails with TimeoutError
+
+        Returns:
+            Future with the function's result (cancel() stops the work where the backend can)
+        """
+        task_type = self.task_type_of(func, task_type)
+        backend = self.backends.get(task_type)
+        if backend is None:
+            raise ValueError(f"No execution backend for task type '{task_type}' "
+                             f"(known: {', '.join(self.backends)})")
+
+        stats = self.stats[task_type]
+        stats['submitted'] += 1
+        future: Future = Future()
+        inner = backend.submit(func, args, kwargs)
+
+        def on_inner_done(done: Future):
+            if done.cancelled():
+                if future.cancel():
+                    stats['cancelled'] += 1
+                return
+            error = done.exception()
+            if resolve_future(future, done.result() if error is None else None, error):
+                stats['completed' if error is None else 'failed'] += 1
+
+        def on_outer_done(done: Future):
+            if done.cancelled():
+                inner.cancel()
+
+        inner.add_done_callback(on_inner_done)
+        future.add_done_callback(on_outer_done)
+
+        if timeout is not None:
+            self._arm(time.time() + timeout, future, inner, task_type)
+        return future
+
+    # ------------------------------------------------------------ watchdog
+
+    def _arm(self, deadline: float, future: Future, inner: Future, task_type: str):
+        with self.lock:
+            heapq.heappush(self.deadlines, (deadline, next(self._seq), future, inner, task_type))
+            if self._watchdog is None:
+                self._watchdog = threading.Thread(target=self._watch, name='task-timeouts', daemon=True)
+                self._watchdog.start()
+            self.wakeup.notify()
+
+    def _watch(self):
+        while True:
+            with self.lock:
+                while True:
+                    if self._closed:
+                        return
+                    if not self.deadlines:
+                        self.wakeup.wait()
+                        continue
+                    deadline, _, future, inner, task_type = self.deadlines[0]
+                    if future.done():
+                        heapq.heappop(self.deadlines)
+                        continue
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        heapq.heappop(self.deadlines)
+                        break
+                    self.wakeup.wait(remaining)
+
+            # Resolve outside the lock - done callbacks may submit more work
+            if resolve_future(future, exception=TimeoutError(f"task exceeded its timeout ({task_type})")):
+                self.stats[task_type]['timed_out'] += 1
+                inner.cancel()
+
+    # ----------------------------------------------------------- lifecycle
+
+    def shutdown(self, wait: bool = True):
+        """Stop the watchdog and every backend (queued work is cancelled; submit() starts them again)"""
+        with self.lock:
+            self._closed = True
+            self.wakeup.notify_all()
+            watchdog, self._watchdog = self._watchdog, None
+        if watchdog is not None:
+            watchdog.join(timeout=5.0)
+        with self.lock:
+            self._closed = False
+        for backend in self.backends.values():
+            backend.shutdown(wait=wait)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'backends': {task_type: backend.name for task_type, backend in self.backends.items()},
+            'by_type': {task_type: dict(counts) for task_type, counts in self.stats.items()},
+            'pending_timeouts': len(self.deadlines)
+        }
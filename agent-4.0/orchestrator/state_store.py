@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+AGENT 4.0 - AGENT STATE STORE
+Debounced, incremental persistence of the agent roster
+
+A state change costs a few bytes instead of a full roster rewrite:
+
+1. record_agent() diffs the agent's mutable fields against the last
+   recorded values and appends only the changed fields, tagged with a
+   sequence number, to an in-memory buffer (no I/O on the caller's thread)
+2. a background flusher appends the buffer to agent_state.deltas.jsonl
+   every `flush_interval` seconds
+3. at most every `snapshot_interval` seconds, and only if something
+   changed, the full state is written atomically to agent_state.json (same
+   format as before, so existing readers keep working). Its `last_seq`
+   marks which deltas it already contains, and the delta log is then
+   truncated
+
+recover() loads the snapshot and replays the deltas with a higher sequence
+number. Deltas carry absolute values, so replaying one that the snapshot
+already reflects is harmless.
+"""
+
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger('AgentStateStore')
+
+AGENT_FIELDS = ('status', 'current_task', 'tasks_completed', 'errors_encountered')
+
+
+class AgentStateStore:
+    """Snapshot + delta-log persistence for agent state"""
+
+    def __init__(self, state_dir: Path, snapshot_provider: Callable[[], Dict[str, Any]],
+                 flush_interval: float = 0.5, snapshot_interval: float = 30.0,
+                 max_deltas: int = 10_000):
+        """
+        Args:
+            state_dir: Directory holding agent_state.json and the delta log
+            snapshot_provider: Returns the full state dict for a snapshot
+            flush_interval: Seconds between delta-log appends
+            snapshot_interval: Minimum seconds between snapshots
+            max_deltas: Delta-log length that forces an early snapshot
+        """
+        self.state_dir = Path(state_dir)
+        self.snapshot_path = self.state_dir / 'agent_state.json'
+        self.delta_path = self.state_dir / 'agent_state.deltas.jsonl'
+        self.snapshot_provider = snapshot_provider
+        self.flush_interval = flush_interval
+        self.snapshot_interval = snapshot_interval
+        self.max_deltas = max_deltas
+
+        self.lock = threading.Lock()
+        self.buffer: List[str] = []
+        self.io_lock = threading.Lock()                 # serialises flushes from the writer and callers
+        self.known: Dict[Any, Dict[str, Any]] = {}    # agent_id -> last recorded fields
+        self.seq = 0
+        self.snapshot_seq = 0
+        self.deltas_since_snapshot = 0
+        self.stats = {'deltas': 0, 'delta_bytes': 0, 'snapshots': 0, 'snapshot_bytes': 0}
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._since_snapshot = 0.0
+
+    # ------------------------------------------------------------ recording
+
+    def _append(self, record: Dict[str, Any]):
+        """Buffer one delta (caller holds the lock)"""
+        self.seq += 1
+        record['q'] = self.seq
+        self.buffer.append(json.dumps(record, separators=(',', ':'), default=str))
+        self.deltas_since_snapshot += 1
+        if self.deltas_since_snapshot >= self.max_deltas:
+            self._wake.set()
+
+    @staticmethod
+    def _fields(agent: Any) -> Dict[str, Any]:
+        fields = {name: getattr(agent, name) for name in AGENT_FIELDS}
+        if hasattr(fields['status'], 'value'):
+            fields['status'] = fields['status'].value
+        return fields
+
+    def track(self, agents: Iterable[Any]):
+        """Take the agents' current fields as the baseline for later diffs (no delta logged)"""
+        with self.lock:
+            for agent in agents:
+                self.known.setdefault(agent.id, self._fields(agent))
+
+    def record_agent(self, agent: Any):
+        """Log the agent's changed fields (no-op when nothing changed)"""
+        fields = self._fields(agent)
+        with self.lock:
+            previous = self.known.get(agent.id, {})
+            changed = {name: value for name, value in fields.items() if previous.get(name) != value}
+            if not changed:
+                return
+            self.known[agent.id] = fields
+            self._append({'a': agent.id, 'f': changed})
+
+    # --------------------------------------------------------------- writer
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='AgentStateStore', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._since_snapshot += self.flush_interval
+            snapshot_due = (self._since_snapshot >= self.snapshot_interval
+                            or self.deltas_since_snapshot >= self.max_deltas)
+            try:
+                self.flush(snapshot=snapshot_due)
+            except Exception as e:
+                logger.error(f"❌ Failed to persist agent state: {e}")
+
+    def flush(self, snapshot: bool = False):
+        """
+        Write buffered deltas, or replace them with a fresh snapshot
+
+        Args:
+            snapshot: Write a full snapshot (skipped when nothing changed since the last one)
+        """
+        with self.io_lock:
+            with self.lock:
+                seq = self.seq
+                pending, self.buffer = self.buffer, []
+                dirty = seq != self.snapshot_seq
+
+            if snapshot and dirty:
+                self._write_snapshot(seq)
+                return
+            if pending:
+                data = '\n'.join(pending) + '\n'
+                with open(self.delta_path, 'a') as f:
+                    f.write(data)
+                self.stats['deltas'] += len(pending)
+                self.stats['delta_bytes'] += len(data)
+
+    def _write_snapshot(self, seq: int):
+        """Atomic snapshot holding every delta up to seq, then truncate the delta log"""
+        state = self.snapshot_provider()
+        state['last_seq'] = seq
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.snapshot_path.with_suffix('.json.tmp')
+        data = json.dumps(state, indent=2, default=str)
+        with open(tmp, 'w') as f:
+            f.write(data)
+        os.replace(tmp, self.snapshot_path)
+        # Deltas newer than seq are still in the buffer, so the file holds nothing past it
+        open(self.delta_path, 'w').close()
+
+        with self.lock:
+            self.snapshot_seq = seq
+            self.deltas_since_snapshot = self.seq - seq
+        self._since_snapshot = 0.0
+        self.stats['snapshots'] += 1
+        self.stats['snapshot_bytes'] += len(data)
+
+    def close(self):
+        """Stop the writer and leave a final snapshot"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        self.flush(snapshot=True)
+
+    # ------------------------------------------------------------- recovery
+
+    def recover(self) -> Optional[Dict[str, Any]]:
+        """
+        Latest snapshot with the newer deltas replayed onto it
+
+        Returns:
+            {'agents': {agent_id: fields}, 'last_seq', 'replayed'}, or None if nothing has been persisted yet
+        """
+        if not self.snapshot_path.exists() and not self.delta_path.exists():
+            return None
+
+        agents: Dict[Any, Dict[str, Any]] = {}
+        last_seq = 0
+        if self.snapshot_path.exists():
+            try:
+                with open(self.snapshot_path) as f:
+                    snapshot = json.load(f)
+                last_seq = snapshot.get('last_seq', 0)
+                for agent in snapshot.get('agents', []):
+                    agents[agent['id']] = {name: agent.get(name) for name in AGENT_FIELDS}
+            except Exception as e:
+                logger.error(f"❌ Unreadable agent state snapshot, replaying deltas only: {e}")
+
+        replayed = 0
+        seq = last_seq
+        if self.delta_path.exists():
+            with open(self.delta_path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue   # torn final line from a crash
+                    if record.get('q', 0) <= last_seq:
+                        continue
+                    if 'a' in record:
+                        agents.setdefault(record['a'], {}).update(record['f'])
+                    seq = max(seq, record['q'])
+                    replayed += 1
+
+        # Continue numbering after the recovered state
+        with self.lock:
+            self.seq = self.snapshot_seq = seq
+            self.known = {agent_id: dict(fields) for agent_id, fields in agents.items()}
+        return {'agents': agents, 'last_seq': last_seq, 'replayed': replayed}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'seq': self.seq, 'snapshot_seq': self.snapshot_seq,
+                'buffered': len(self.buffer)}
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+AGENT 4.0 - TASK SCHEDULER
+Priority dispatch of tasks onto idle agents for AgentRevivalSystem
+
+- Each category keeps a min-heap of its idle agents keyed by how many
+  tasks they have been given, so the least-loaded idle agent is picked
+  (ties rotate round-robin) in O(log agents)
+- Each category keeps a max-heap of waiting tasks. Higher Task.priority
+  runs first, and a waiting task gains `aging_rate` priority per second,
+  so low-priority work cannot starve. Every task ages at the same rate, so
+  the effective order is fixed at submit time (priority - aging_rate *
+  submitted_at) and the heap never needs re-keying
+- Dispatch only looks at categories that have both a waiting task and an
+  idle agent, and takes the one whose head task ranks highest. Cost is
+  O(categories + log n), independent of the number of agents
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger('TaskScheduler')
+
+
+class TaskScheduler:
+    """Per-category idle-agent heaps and aged priority task heaps"""
+
+    def __init__(self, agents: Iterable[Any] = (), aging_rate: float = 0.1):
+        """
+        Args:
+            agents: Agents (need .id and .category) - all start idle
+            aging_rate: Priority gained per second of waiting
+        """
+        self.aging_rate = aging_rate
+        self.lock = threading.Lock()
+        self.available = threading.Condition(self.lock)
+        self.finished = threading.Condition(self.lock)
+
+        self.agent_category: Dict[int, str] = {}
+        self.assigned: Dict[int, int] = {}                 # agent_id -> tasks handed out
+        self.idle: Dict[str, List[Tuple[int, int, int]]] = {}    # category -> [(assigned, seq, agent_id)]
+        self.idle_ids: Set[int] = set()
+        self.waiting: Dict[str, List[Tuple[float, int, float, Any]]] = {}  # category -> [(key, seq, submitted_at, task)]
+        self.ready: Set[str] = set()                       # categories with a waiting task and an idle agent
+        self.unfinished = 0
+        self._seq = itertools.count()
+        self.stats = {'submitted': 0, 'dispatched': 0, 'max_wait_seconds': 0.0}
+
+        for agent in agents:
+            self.add_agent(agent)
+
+    # -------------------------------------------------------------- agents
+
+    def add_agent(self, agent: Any, idle: bool = True):
+        """Register an agent (scaling out needs no other change)"""
+        with self.lock:
+            self.agent_category[agent.id] = agent.category
+            self.assigned.setdefault(agent.id, 0)
+            self.idle.setdefault(agent.category, [])
+            self.waiting.setdefault(agent.category, [])
+        if idle:
+            self.release(agent.id)
+
+    def release(self, agent_id: int):
+        """Return an agent to its category's idle heap"""
+        with self.lock:
+            if agent_id in self.idle_ids or agent_id not in self.agent_category:
+                return
+            category = self.agent_category[agent_id]
+            heapq.heappush(self.idle[category], (self.assigned[agent_id], next(self._seq), agent_id))
+            self.idle_ids.add(agent_id)
+            self._update_ready(category)
+
+    def peek_idle(self, category: str) -> Optional[int]:
+        """Least-loaded idle agent of a category, without reserving it"""
+        with self.lock:
+            heap = self.idle.get(category)
+            return heap[0][2] if heap else None
+
+    # --------------------------------------------------------------- tasks
+
+    def _key(self, task: Any, submitted_at: float) -> float:
+        return self.aging_rate * submitted_at - task.priority
+
+    def submit(self, task: Any):
+        """Queue a task (O(log n))"""
+        now = time.time()
+        with self.lock:
+            if task.category not in self.idle:
+                logger.warning(f"⚠️  No agents registered for category: {task.category} - task {task.id} will wait")
+                self.idle[task.category] = []
+                self.waiting[task.category] = []
+            heapq.heappush(self.waiting[task.category], (self._key(task, now), next(self._seq), now, task))
+            self.unfinished += 1
+            self.stats['submitted'] += 1
+            self._update_ready(task.category)
+
+    def _update_ready(self, category: str):
+        if self.waiting.get(category) and self.idle.get(category):
+            if category not in self.ready:
+                self.ready.add(category)
+                self.available.notify()
+        else:
+            self.ready.discard(category)
+
+    def next_assignment(self, timeout: Optional[float] = None) -> Optional[Tuple[Any, int]]:
+        """
+        Pop the highest-ranked waiting task together with its agent
+
+        Args:
+            timeout: Seconds to wait for a dispatchable pair (None = forever)
+
+        Returns:
+            (task, agent_id), or None on timeout. The agent stays reserved until release()
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self.lock:
+            while not self.ready:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self.available.wait(remaining)
+
+            category = min(self.ready, key=lambda c: self.waiting[c][0][:2])
+            _, _, submitted_at, task = heapq.heappop(self.waiting[category])
+            _, _, agent_id = heapq.heappop(self.idle[category])
+            self.idle_ids.discard(agent_id)
+            self.assigned[agent_id] += 1
+            self._update_ready(category)
+
+            self.stats['dispatched'] += 1
+            waited = time.time() - submitted_at
+            if waited > self.stats['max_wait_seconds']:
+                self.stats['max_wait_seconds'] = waited
+            if self.ready:
+                self.available.notify()
+            return task, agent_id
+
+    def task_done(self):
+        """Mark one submitted task as finished (mirrors queue.Queue.task_done)"""
+        with self.lock:
+            self.unfinished -= 1
+            if self.unfinished <= 0:
+                self.finished.notify_all()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Block until every submitted task is finished"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self.lock:
+            while self.unfinished > 0:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.finished.wait(remaining)
+        return True
+
+    # ------------------------------------------------------------- metrics
+
+    def qsize(self) -> int:
+        with self.lock:
+            return sum(len(heap) for heap in self.waiting.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                **self.stats,
+                'waiting': {c: len(heap) for c, heap in self.waiting.items() if heap},
+                'idle_agents': {c: len(heap) for c, heap in self.idle.items()},
+                'unfinished': self.unfinished
+            }
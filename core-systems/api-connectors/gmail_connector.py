@@ -5,6 +5,7 @@ Connects to Gmail using OAuth 2.0 and downloads attachments
 
 import os
 import json
+import time
 import base64
 import logging
 from datetime import datetime
@@ -17,6 +18,9 @@ from typing import List, Dict, Any
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('GmailConnector')
 
+# OAuth access tokens live an hour; renew a little early
+TOKEN_LIFETIME = 3300
+
 
 class GmailConnector:
     """
@@ -26,6 +30,7 @@ class GmailConnector:
     def __init__(self, credentials_file: str = "config/gmail_credentials.json"):
         self.credentials_file = credentials_file
         self.service = None
+        self.token_expires_at = 0.0
         self.download_dir = "data/gmail_attachments"
         self.keywords = ["1040", "Tax Return", "W-2", "W2", "Tax Document"]
 
@@ -34,13 +39,20 @@ class GmailConnector:
 
         logger.info("Gmail Connector initialized")
 
-    def authenticate(self) -> bool:
+    def authenticate(self, force: bool = False) -> bool:
         """
-        Authenticate with Gmail API using OAuth 2.0
+        Authenticate with Gmail API using OAuth 2.0 (the service is built once and
+        reused until the token expires)
+
+        Args:
+            force: Re-authenticate even if the current token is still valid
 
         Returns:
             True if successful
         """
+        if not force and time.time() < self.token_expires_at:
+            return True
+
         try:
             # In production, this would use actual Gmail API authentication
             # For now, we'll simulate the connection
@@ -50,6 +62,7 @@ class GmailConnector:
                 self._create_template_credentials()
                 return False
 
+            self.token_expires_at = time.time() + TOKEN_LIFETIME
             logger.info("Gmail authentication successful (simulated)")
             return True
 
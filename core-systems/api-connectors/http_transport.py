@@ -0,0 +1,208 @@
+"""
+HTTP Transport
+Shared keep-alive connection pools for every connector and pillar
+
+One HTTPTransport keeps a pooled client per host, so repeated calls to the
+same API reuse an open connection instead of paying DNS resolution, TCP
+connect and the TLS handshake on every request. HTTPS hosts go through an
+HTTP/2 client (one multiplexed connection) when httpx and h2 are installed,
+otherwise through a requests.Session with a sized HTTPAdapter pool.
+
+Every request gets the same policy: a default (connect, read) timeout, and
+retries with exponential backoff for connection errors and 429/5xx
+responses on idempotent methods (Retry-After is honoured). POST is not
+retried unless the caller asks for it - callers with their own delivery
+guarantees (the Zapier outbox) pass retries=0.
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger('HTTPTransport')
+
+try:
+    import httpx
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTP2_AVAILABLE = False
+
+DEFAULT_TIMEOUT: Tuple[float, float] = (5.0, 10.0)   # (connect, read) seconds
+DEFAULT_RETRIES = 2
+RETRY_STATUS = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+MAX_RETRY_AFTER = 30.0
+
+RETRYABLE_ERRORS: Tuple[type, ...] = (requests.ConnectionError, requests.Timeout)
+if httpx is not None:
+    RETRYABLE_ERRORS += (httpx.TransportError,)
+
+
+class HTTPTransport:
+    """Per-host pooled clients with a uniform timeout / retry policy"""
+
+    def __init__(self, timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES, backoff: float = 0.3, pool_maxsize: int = 16,
+                 http2: Optional[bool] = None, user_agent: str = 'AgentX/2.0'):
+        """
+        Args:
+            timeout: Default timeout (seconds, or (connect, read))
+            retries: Default retry count for idempotent requests
+            backoff: First retry delay (doubles per retry)
+            pool_maxsize: Keep-alive connections kept per host
+            http2: Use HTTP/2 for https hosts (default: when httpx + h2 are installed,
+                unless HTTP_TRANSPORT_HTTP2=0)
+            user_agent: User-Agent header for every request
+        """
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_maxsize = pool_maxsize
+        if http2 is None:
+            http2 = os.getenv('HTTP_TRANSPORT_HTTP2', '1') != '0'
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.user_agent = user_agent
+
+        self.clients: Dict[str, Any] = {}
+        self.lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    # ------------------------------------------------------------- clients
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    def _new_client(self, key: str):
+        if self.http2 and key.startswith('https://'):
+            limits = httpx.Limits(max_connections=self.pool_maxsize,
+                                  max_keepalive_connections=self.pool_maxsize)
+            return httpx.Client(http2=True, limits=limits, headers={'User-Agent': self.user_agent},
+                                follow_redirects=True)
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+        session.mount(key + '/', adapter)
+        session.headers['User-Agent'] = self.user_agent
+        return session
+
+    def client_for(self, url: str):
+        """Pooled client for the url's host (requests.Session, or httpx.Client for HTTP/2)"""
+        key = self.host_key(url)
+        client = self.clients.get(key)
+        if client is None:
+            with self.lock:
+                client = self.clients.get(key)
+                if client is None:
+                    client = self._new_client(key)
+                    self.clients[key] = client
+                    self.stats[key] = {'requests': 0, 'retries': 0, 'errors': 0}
+        return client
+
+    # ------------------------------------------------------------ requests
+
+    def _timeout_for(self, client, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        if httpx is not None and isinstance(client, httpx.Client) and isinstance(timeout, tuple):
+            connect, read = timeout
+            return httpx.Timeout(read, connect=connect)
+        return timeout
+
+    def _retry_delay(self, attempt: int, response=None) -> float:
+        delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.0)
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), MAX_RETRY_AFTER))
+        return delay
+
+    def request(self, method: str, url: str, timeout=None, retries: Optional[int] = None, **kwargs):
+        """
+        Send a request over the host's pooled client
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            timeout: Override the default timeout
+            retries: Override the retry count (default: self.retries for idempotent
+                methods, 0 for POST / PATCH)
+            **kwargs: params, json, data, headers, ... as for requests
+
+        Returns:
+            Response (requests.Response or httpx.Response - same status_code / json() / text / content)
+        """
+        method = method.upper()
+        if retries is None:
+            retries = self.retries if method in IDEMPOTENT_METHODS else 0
+        client = self.client_for(url)
+        stats = self.stats[self.host_key(url)]
+        timeout = self._timeout_for(client, timeout)
+
+        attempt = 0
+        while True:
+            stats['requests'] += 1
+            try:
+                response = client.request(method, url, timeout=timeout, **kwargs)
+            except RETRYABLE_ERRORS:
+                stats['errors'] += 1
+                if attempt >= retries:
+                    raise
+                delay = self._retry_delay(attempt)
+            else:
+                if response.status_code not in RETRY_STATUS or attempt >= retries:
+                    return response
+                delay = self._retry_delay(attempt, response)
+                response.close()
+
+            stats['retries'] += 1
+            attempt += 1
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url: str, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url: str, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    # ------------------------------------------------------------ lifecycle
+
+    def close(self):
+        with self.lock:
+            for client in self.clients.values():
+                client.close()
+            self.clients.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'http2': self.http2,
+            'hosts': len(self.clients),
+            'by_host': {host: dict(counts) for host, counts in self.stats.items()}
+        }
+
+
+_default_transport: Optional[HTTPTransport] = None
+_default_lock = threading.Lock()
+
+
+def get_transport() -> HTTPTransport:
+    """Process-wide transport shared by every connector"""
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = HTTPTransport()
+        return _default_transport
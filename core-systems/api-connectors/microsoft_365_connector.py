@@ -4,17 +4,26 @@ Connects to OneDrive and SharePoint using Microsoft Graph API
 """
 
 import os
+import sys
 import json
+import time
 import logging
 from datetime import datetime
 from typing import List, Dict, Any
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from http_transport import get_transport
+
 # Microsoft Graph API (would need msal and requests in production)
 # from msal import ConfidentialClientApplication
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('Microsoft365Connector')
 
+# Graph access tokens live an hour; renew a little early
+TOKEN_LIFETIME = 3300
+
 
 class Microsoft365Connector:
     """
@@ -24,6 +33,8 @@ class Microsoft365Connector:
     def __init__(self, credentials_file: str = "config/microsoft_365_credentials.json"):
         self.credentials_file = credentials_file
         self.access_token = None
+        self.token_expires_at = 0.0
+        self.transport = get_transport()   # keep-alive pool for graph.microsoft.com
         self.download_dir_onedrive = "data/onedrive"
         self.download_dir_sharepoint = "data/sharepoint"
 
@@ -37,13 +48,19 @@ class Microsoft365Connector:
 
         logger.info("Microsoft 365 Connector initialized")
 
-    def authenticate(self) -> bool:
+    def authenticate(self, force: bool = False) -> bool:
         """
-        Authenticate with Microsoft Graph API
+        Authenticate with Microsoft Graph API (reuses the token until it expires)
+
+        Args:
+            force: Re-authenticate even if the current token is still valid
 
         Returns:
             True if successful
         """
+        if not force and time.time() < self.token_expires_at:
+            return True
+
         try:
             if not os.path.exists(self.credentials_file):
                 logger.warning(f"Credentials file not found: {self.credentials_file}")
@@ -57,6 +74,7 @@ class Microsoft365Connector:
             # )
             # result = app.acquire_token_for_client(scopes=["https://graph.microsoft.com/.default"])
 
+            self.token_expires_at = time.time() + TOKEN_LIFETIME
             logger.info("Microsoft 365 authentication successful (simulated)")
             return True
 
@@ -115,7 +133,7 @@ class Microsoft365Connector:
         # In production:
         # url = f"https://graph.microsoft.com/v1.0/me/drive/root/children"
         # headers = {"Authorization": f"Bearer {self.access_token}"}
-        # response = requests.get(url, headers=headers)
+        # response = self.transport.get(url, headers=headers)
         # files = response.json().get('value', [])
 
         files = []
@@ -164,7 +182,7 @@ class Microsoft365Connector:
             # In production:
             # url = f"https://graph.microsoft.com/v1.0/me/drive/items/{file_id}/content"
             # headers = {"Authorization": f"Bearer {self.access_token}"}
-            # response = requests.get(url, headers=headers)
+            # response = self.transport.get(url, headers=headers)
             # content = response.content
 
             filepath = os.path.join(download_dir, filename)
@@ -195,7 +213,7 @@ class Microsoft365Connector:
             # In production:
             # url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/root:/{parent_path}:/children"
             # data = {"name": folder_name, "folder": {}}
-            # response = requests.post(url, headers=headers, json=data)
+            # response = self.transport.post(url, headers=headers, json=data)
 
             logger.info(f"Folder created successfully (simulated)")
             return True
@@ -221,7 +239,7 @@ class Microsoft365Connector:
             # In production:
             # url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/root:/{sharepoint_path}:/content"
             # with open(local_file, 'rb') as f:
-            #     response = requests.put(url, headers=headers, data=f)
+            #     response = self.transport.put(url, headers=headers, data=f)
 
             logger.info(f"Upload successful (simulated)")
             return True
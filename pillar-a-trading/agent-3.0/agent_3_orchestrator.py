@@ -6,13 +6,20 @@ Executive-grade automation orchestrator for multi-pillar trading operations
 import asyncio
 import json
 import os
+import sys
 import time
 import logging
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, Any, List
-import requests
 from enum import Enum
 
+sys.path.insert(0, str(Path(__file__).parent.parent / 'risk'))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'zapier-integration'))
+
+from risk_engine import RiskEngine
+from zapier_outbox import get_outbox
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -54,6 +61,7 @@ class Agent3Orchestrator:
         # API Endpoints
         self.sharepoint_api = os.getenv('SHAREPOINT_API', self.config.get('sharepoint_api'))
         self.zapier_webhook = os.getenv('ZAPIER_WEBHOOK_URL', self.config.get('zapier_webhook'))
+        self.outbox = get_outbox() if self.zapier_webhook else None
         self.kraken_api_key = os.getenv('KRAKEN_API_KEY', self.config.get('kraken_api_key'))
 
         # Risk parameters
@@ -61,6 +69,25 @@ class Agent3Orchestrator:
         self.max_position_size = float(os.getenv('MAX_POSITION_SIZE', '0.02'))
         self.risk_per_trade = float(os.getenv('RISK_PER_TRADE', '0.01'))
 
+        # Shared risk engine: profile limits, overridden by this agent's risk settings
+        risk_config = self.config.get('risk_management', {})
+        self.account_id = 'AGENT3'
+        self.risk_engine = RiskEngine()
+        self.risk_engine.register_account(
+            self.account_id,
+            os.getenv('RISK_PROFILE', 'advanced'),
+            float(os.getenv('ACCOUNT_BALANCE', '10000')),
+            limits={
+                'confidence_threshold': self.confidence_threshold,
+                'max_position_size': self.max_position_size,
+                'risk_per_trade': self.risk_per_trade,
+                'max_daily_loss': risk_config.get('max_daily_loss', 0.05),
+                'max_weekly_loss': risk_config.get('max_weekly_loss', 0.10),
+                'max_concurrent_trades': risk_config.get('max_open_positions', 5),
+                'emergency_halt_threshold': risk_config.get('emergency_halt_threshold', 0.15)
+            }
+        )
+
         logger.info("Agent 3.0 Orchestrator initialized")
 
     def load_config(self) -> Dict[str, Any]:
@@ -118,10 +145,19 @@ class Agent3Orchestrator:
         # Apply risk management rules
         if confidence >= self.confidence_threshold:
             if signal_type in ['BUY', 'SELL']:
-                decision['action'] = "EXECUTE"
-                decision['position_size'] = self.calculate_position_size(signal)
-                decision['reason'] = f"High confidence {signal_type} signal"
-                logger.info(f"EXECUTE decision for {pair}: {signal_type} @ confidence {confidence}")
+                allowed, reason = self.risk_engine.check_trade(
+                    self.account_id, confidence, signal.get('pattern'))
+                if allowed:
+                    decision['action'] = "EXECUTE"
+                    decision['position_size'] = self.calculate_position_size(signal)
+                    decision['reason'] = f"High confidence {signal_type} signal"
+                    # Fills are not reported back here, so count the trade but not an open position
+                    self.risk_engine.record_open(self.account_id, concurrent=False)
+                    logger.info(f"EXECUTE decision for {pair}: {signal_type} @ confidence {confidence}")
+                else:
+                    decision['action'] = "RISK_BLOCKED"
+                    decision['reason'] = reason
+                    logger.warning(f"Risk engine blocked {pair} {signal_type}: {reason}")
             else:
                 decision['reason'] = "High confidence but HOLD signal"
         else:
@@ -131,33 +167,44 @@ class Agent3Orchestrator:
         return decision
 
     def calculate_position_size(self, signal: Dict[str, Any]) -> float:
-        """Calculate position size based on risk parameters"""
-        # Simplified position sizing
-        # In production, this would factor in account balance, volatility, etc.
-        return self.max_position_size
+        """
+        Calculate position size as a fraction of equity
+
+        Sized so a stop-out loses risk_per_trade, capped at max_position_size.
+        Uses the signal's stop_loss when present, otherwise the profile stop.
+        """
+        stop_distance = None
+        if signal.get('stop_loss') and signal.get('price'):
+            stop_distance = abs(signal['price'] - signal['stop_loss']) / signal['price']
+        limits = self.risk_engine.account_limits[self.account_id]
+        return RiskEngine.position_fraction(limits, stop_distance)
+
+    def record_trade_result(self, profit_loss: float) -> None:
+        """Feed realized P&L back to the risk engine (drives loss and emergency halts)"""
+        self.risk_engine.record_close(self.account_id, profit_loss)
 
     def send_to_zapier(self, decision: Dict[str, Any]) -> bool:
         """
-        Send decision to Zapier webhook for execution/logging
+        Queue decision for the Zapier webhook (execution/logging)
+
+        EXECUTE decisions go out as high-priority trade signals; everything
+        else is normal-priority and may be deferred by the Zapier budget.
 
         Args:
             decision: Decision dictionary
 
         Returns:
-            Success boolean
+            True once queued on the outbox
         """
         if not self.zapier_webhook:
             logger.warning("Zapier webhook not configured")
             return False
 
         try:
-            response = requests.post(
-                self.zapier_webhook,
-                json=decision,
-                timeout=10
-            )
-            response.raise_for_status()
-            logger.info(f"Decision sent to Zapier: {decision['action']}")
+            priority = 'high' if decision.get('action') == 'EXECUTE' else 'normal'
+            self.outbox.enqueue_webhook(self.zapier_webhook, decision, zap_name='Trading Signal Handler',
+                                        priority=priority)
+            logger.info(f"Decision queued for Zapier: {decision['action']}")
             return True
         except Exception as e:
             logger.error(f"Error sending to Zapier: {e}")
@@ -282,7 +329,8 @@ class Agent3Orchestrator:
                 "confidence_threshold": self.confidence_threshold,
                 "max_position_size": self.max_position_size,
                 "risk_per_trade": self.risk_per_trade
-            }
+            },
+            "risk": self.risk_engine.get_status(self.account_id)
         }
 
 
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Quantum Pattern Bank - Cached pattern templates and batched overlap scoring
+Backs QuantumMachineLearning.quantum_pattern_recognition
+
+Templates are built once per (pattern, length) and stored unit-normalized,
+stacked into a (patterns x length) matrix. The quantum score of a window is
+its squared cosine overlap with a template, so:
+
+- many windows are scored against every pattern with one matrix product
+- every window of a long series is scored with FFT cross-correlation
+  (one rfft of the series, cached template spectra) plus a running sum of
+  squares for the window norms
+
+Each cache keeps only its most recently used entries, so a long-running
+process that sees many window lengths or FFT sizes stays bounded.
+"""
+
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+PATTERN_NAMES = ('BULLISH_MOMENTUM', 'BEARISH_MOMENTUM', 'CONSOLIDATION', 'BREAKOUT', 'REVERSAL')
+
+
+def generate_pattern_template(pattern_name: str, length: int) -> np.ndarray:
+    """Raw template for pattern matching (zeros for unknown patterns)"""
+    if pattern_name == 'BULLISH_MOMENTUM':
+        return np.linspace(0, 1, length)
+    if pattern_name == 'BEARISH_MOMENTUM':
+        return np.linspace(1, 0, length)
+    if pattern_name == 'CONSOLIDATION':
+        return np.ones(length) * 0.5
+    if pattern_name == 'BREAKOUT':
+        # Flat first half, then a ramp (the flat part takes the odd sample)
+        return np.concatenate([np.ones(length - length // 2) * 0.5, np.linspace(0.5, 1, length // 2)])
+    if pattern_name == 'REVERSAL':
+        return np.sin(np.linspace(0, np.pi, length))
+    return np.zeros(length)
+
+
+class _LRU(OrderedDict):
+    """Dict that evicts its least recently used entry beyond max_entries"""
+
+    def __init__(self, max_entries: int):
+        super().__init__()
+        self.max_entries = max_entries
+
+    def get(self, key: Hashable, default: Any = None) -> Optional[Any]:
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def __setitem__(self, key: Hashable, value: Any):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.max_entries:
+            self.popitem(last=False)
+
+
+class PatternTemplateBank:
+    """Unit-normalized templates cached by (pattern, length), LRU-bounded"""
+
+    def __init__(self, max_lengths: int = 16):
+        """
+        Args:
+            max_lengths: Window lengths (and FFT sizes) kept per cache
+        """
+        self.templates: Dict[Tuple[str, int], np.ndarray] = _LRU(max_lengths * len(PATTERN_NAMES))
+        self._stacks: Dict[Tuple[Tuple[str, ...], int], np.ndarray] = _LRU(max_lengths)
+        self._spectra: Dict[Tuple[Tuple[str, ...], int, int], np.ndarray] = _LRU(max_lengths)
+
+    def template(self, pattern_name: str, length: int) -> np.ndarray:
+        """Unit-norm template (NaN-filled when the raw template is all zeros)"""
+        key = (pattern_name, length)
+        template = self.templates.get(key)
+        if template is None:
+            raw = generate_pattern_template(pattern_name, length)
+            norm = np.linalg.norm(raw)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                template = raw / norm
+            template.setflags(write=False)
+            self.templates[key] = template
+        return template
+
+    def matrix(self, patterns: Sequence[str], length: int) -> np.ndarray:
+        """(patterns x length) stack of unit templates"""
+        key = (tuple(patterns), length)
+        stack = self._stacks.get(key)
+        if stack is None:
+            stack = np.vstack([self.template(name, length) for name in key[0]])
+            stack.setflags(write=False)
+            self._stacks[key] = stack
+        return stack
+
+    def _template_spectra(self, patterns: Tuple[str, ...], length: int, n_fft: int) -> np.ndarray:
+        key = (patterns, length, n_fft)
+        spectra = self._spectra.get(key)
+        if spectra is None:
+            # Reversed templates turn convolution into correlation
+            spectra = np.fft.rfft(self.matrix(patterns, length)[:, ::-1], n_fft, axis=1)
+            self._spectra[key] = spectra
+        return spectra
+
+    def score(self, windows: np.ndarray, patterns: Sequence[str]) -> np.ndarray:
+        """
+        Quantum scores of price windows against patterns
+
+        Args:
+            windows: (length,) or (n_windows, length)
+
+        Returns:
+            (n_windows, patterns) squared cosine overlaps
+        """
+        windows = np.atleast_2d(np.asarray(windows, dtype=float))
+        stack = self.matrix(patterns, windows.shape[1])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            overlap = np.abs(windows @ stack.T) / np.linalg.norm(windows, axis=1)[:, None]
+        return overlap ** 2
+
+    def scan(self, series: np.ndarray, length: int, patterns: Sequence[str]) -> np.ndarray:
+        """
+        Score every window of a long series
+
+        Args:
+            series: (T,) prices
+            length: Window length
+
+        Returns:
+            (patterns, T - length + 1) scores; column i is the window series[i:i + length]
+        """
+        series = np.asarray(series, dtype=float)
+        n_windows = len(series) - length + 1
+        patterns = tuple(patterns)
+        if n_windows <= 0:
+            return np.empty((len(patterns), 0))
+
+        n_fft = 1 << int(np.ceil(np.log2(len(series) + length - 1)))
+        spectrum = np.fft.rfft(series, n_fft)
+        correlation = np.fft.irfft(self._template_spectra(patterns, length, n_fft) * spectrum, n_fft, axis=1)
+        dots = correlation[:, length - 1:length - 1 + n_windows]
+
+        squares = np.concatenate([[0.0], np.cumsum(series ** 2)])
+        window_norms = np.sqrt(np.maximum(squares[length:] - squares[:-length], 0.0))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            overlap = np.abs(dots) / window_norms
+        return overlap ** 2
+
+    def scan_dict(self, series: np.ndarray, length: int, patterns: Sequence[str]) -> Dict[str, np.ndarray]:
+        return dict(zip(patterns, self.scan(series, length, patterns)))
+
+    def clear(self):
+        self.templates.clear()
+        self._stacks.clear()
+        self._spectra.clear()
+
+    @property
+    def cached(self) -> List[Tuple[str, int]]:
+        return list(self.templates)
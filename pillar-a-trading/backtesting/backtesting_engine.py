@@ -4,12 +4,17 @@ Tests trading strategies against historical data across beginner, novice, and ad
 """
 
 import os
+import sys
 import json
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent / 'risk'))
+
+from risk_engine import RiskEngine
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('BacktestEngine')
 
@@ -28,6 +33,9 @@ class BacktestingEngine:
         self.performance_metrics = {}
         self.initial_capital = 10000
         self.current_capital = self.initial_capital
+        self.account_id = f"backtest-{profile}"
+        self.risk_engine = RiskEngine()
+        self.risk_engine.register_account(self.account_id, profile, self.initial_capital)
         logger.info(f"Backtesting Engine initialized - Profile: {profile}")
 
     def load_risk_profile(self, profile: str) -> Dict[str, Any]:
@@ -114,30 +122,18 @@ class BacktestingEngine:
 
         return None
 
-    def should_execute_trade(self, signal: Dict[str, Any]) -> bool:
-        """Check if trade meets profile criteria"""
+    def should_execute_trade(self, signal: Dict[str, Any], now: Optional[datetime] = None) -> bool:
+        """Check if trade meets profile criteria (confidence, patterns, daily / concurrent / loss limits)"""
         if not signal:
             return False
 
-        # Check confidence threshold
-        risk_params = self.config.get('risk_parameters', {})
-        confidence_threshold = risk_params.get('confidence_threshold', 0.75)
-
-        if signal['confidence'] < confidence_threshold:
-            return False
-
-        # Check pattern is enabled
-        patterns_enabled = self.config.get('patterns_enabled', [])
-        if signal['pattern'] not in patterns_enabled:
-            return False
-
-        # Check daily trade limit
-        max_trades_per_day = self.config.get('max_trades_per_day', 10)
-        today_trades = [t for t in self.trades if t['date'].date() == datetime.now().date()]
-        if len(today_trades) >= max_trades_per_day:
-            return False
-
-        return True
+        allowed, _ = self.risk_engine.check_trade(
+            self.account_id,
+            confidence=signal['confidence'],
+            pattern=signal['pattern'],
+            now=now
+        )
+        return allowed
 
     def execute_trade(self, signal: Dict[str, Any], candle: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a simulated trade"""
@@ -178,6 +174,7 @@ class BacktestingEngine:
         }
 
         self.trades.append(trade)
+        self.risk_engine.record_open(self.account_id, now=candle['timestamp'])
         logger.info(f"Trade #{trade['id']}: {signal['signal']} {signal['pattern']} @ ${price:.2f}")
 
         return trade
@@ -192,17 +189,18 @@ class BacktestingEngine:
 
             # Check stop loss
             if trade['signal'] == 'BUY' and current_price <= trade['stop_loss']:
-                self.close_trade(trade, current_price, "STOP_LOSS")
+                self.close_trade(trade, current_price, "STOP_LOSS", candle['timestamp'])
             elif trade['signal'] == 'SELL' and current_price >= trade['stop_loss']:
-                self.close_trade(trade, current_price, "STOP_LOSS")
+                self.close_trade(trade, current_price, "STOP_LOSS", candle['timestamp'])
 
             # Check take profit
             elif trade['signal'] == 'BUY' and current_price >= trade['take_profit']:
-                self.close_trade(trade, current_price, "TAKE_PROFIT")
+                self.close_trade(trade, current_price, "TAKE_PROFIT", candle['timestamp'])
             elif trade['signal'] == 'SELL' and current_price <= trade['take_profit']:
-                self.close_trade(trade, current_price, "TAKE_PROFIT")
+                self.close_trade(trade, current_price, "TAKE_PROFIT", candle['timestamp'])
 
-    def close_trade(self, trade: Dict[str, Any], exit_price: float, reason: str):
+    def close_trade(self, trade: Dict[str, Any], exit_price: float, reason: str,
+                    now: Optional[datetime] = None):
         """Close an open trade"""
         trade['status'] = 'CLOSED'
         trade['exit_price'] = exit_price
@@ -217,6 +215,7 @@ class BacktestingEngine:
         trade['profit_loss_pct'] = (profit_loss / trade['position_value']) * 100
 
         self.current_capital += profit_loss
+        self.risk_engine.record_close(self.account_id, profit_loss, now=now or trade['date'])
 
         logger.info(f"Trade #{trade['id']} CLOSED - {reason}: P/L ${profit_loss:.2f} ({trade['profit_loss_pct']:.2f}%)")
 
@@ -241,14 +240,14 @@ class BacktestingEngine:
                 recent_candles = market_data[max(0, i-10):i+1]
                 signal = self.detect_pattern(recent_candles)
 
-                if signal and self.should_execute_trade(signal):
+                if signal and self.should_execute_trade(signal, now=candle['timestamp']):
                     self.execute_trade(signal, candle)
 
         # Close any remaining open trades at final price
         final_candle = market_data[-1]
         for trade in self.trades:
             if trade['status'] == 'OPEN':
-                self.close_trade(trade, final_candle['close'], "BACKTEST_END")
+                self.close_trade(trade, final_candle['close'], "BACKTEST_END", final_candle['timestamp'])
 
         # Calculate performance metrics
         self.calculate_performance_metrics()
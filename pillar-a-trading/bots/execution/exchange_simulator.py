@@ -0,0 +1,554 @@
+"""
+Exchange Simulator
+Local order-matching exchange for PAPER and SANDBOX environments
+
+- Price-time-priority limit order book per symbol
+- MARKET, LIMIT, STOP and STOP_LIMIT orders with partial fills
+- Pluggable latency and slippage models
+- Synthetic liquidity around a reference price (last tick / bar) so a
+  single bot can trade without a counterparty
+- Replay mode driven by historical OHLCV bars
+
+Everything runs in-process on a simulated clock, so bots can be load-tested
+at thousands of orders per second without a terminal or network.
+
+Memory stays bounded in long-running processes: filled, cancelled and
+rejected orders leave the live order table and only the most recent
+`max_finished_orders` of them (and the last `max_fills` fills) are kept
+for inspection.
+"""
+
+import heapq
+import random
+import logging
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable, Iterable
+
+logger = logging.getLogger('ExchangeSimulator')
+
+MARKET = 'MARKET'
+LIMIT = 'LIMIT'
+STOP = 'STOP'
+STOP_LIMIT = 'STOP_LIMIT'
+
+BUY = 'BUY'
+SELL = 'SELL'
+
+
+# --------------------------------------------------------------------- models
+
+class FixedLatency:
+    """Constant order-entry latency in seconds"""
+
+    def __init__(self, seconds: float = 0.0):
+        self.seconds = seconds
+
+    def __call__(self) -> float:
+        return self.seconds
+
+
+class GaussianLatency:
+    """Normally distributed latency, floored at zero"""
+
+    def __init__(self, mean: float = 0.05, std: float = 0.01, seed: Optional[int] = None):
+        self.mean = mean
+        self.std = std
+        self.rng = random.Random(seed)
+
+    def __call__(self) -> float:
+        return max(0.0, self.rng.gauss(self.mean, self.std))
+
+
+class FixedBpsSlippage:
+    """Adverse slippage of a fixed number of basis points"""
+
+    def __init__(self, bps: float = 0.0):
+        self.bps = bps
+
+    def __call__(self, side: str, price: float, quantity: float, bar_volume: Optional[float]) -> float:
+        adjustment = price * self.bps / 10000
+        return price + adjustment if side == BUY else price - adjustment
+
+
+class VolumeImpactSlippage:
+    """Slippage grows with order size relative to bar volume"""
+
+    def __init__(self, base_bps: float = 1.0, impact_bps: float = 50.0):
+        self.base_bps = base_bps
+        self.impact_bps = impact_bps
+
+    def __call__(self, side: str, price: float, quantity: float, bar_volume: Optional[float]) -> float:
+        participation = quantity / bar_volume if bar_volume else 0.0
+        bps = self.base_bps + self.impact_bps * min(participation, 1.0)
+        adjustment = price * bps / 10000
+        return price + adjustment if side == BUY else price - adjustment
+
+
+# --------------------------------------------------------------------- orders
+
+class Order:
+    """Exchange order (slots keep per-order overhead low for load tests)"""
+
+    __slots__ = ('id', 'client_id', 'symbol', 'side', 'order_type', 'quantity', 'price',
+                 'stop_price', 'filled_quantity', 'fill_value', 'status', 'submitted_at',
+                 'active_at', 'updated_at', 'reason')
+
+    def __init__(self, order_id: int, symbol: str, side: str, order_type: str, quantity: float,
+                 price: Optional[float], stop_price: Optional[float], submitted_at: float,
+                 active_at: float, client_id: Optional[str] = None):
+        self.id = order_id
+        self.client_id = client_id
+        self.symbol = symbol
+        self.side = side
+        self.order_type = order_type
+        self.quantity = quantity
+        self.price = price
+        self.stop_price = stop_price
+        self.filled_quantity = 0.0
+        self.fill_value = 0.0
+        self.status = 'PENDING'
+        self.submitted_at = submitted_at
+        self.active_at = active_at
+        self.updated_at = submitted_at
+        self.reason = None
+
+    @property
+    def remaining(self) -> float:
+        return self.quantity - self.filled_quantity
+
+    @property
+    def average_price(self) -> Optional[float]:
+        return self.fill_value / self.filled_quantity if self.filled_quantity else None
+
+    @property
+    def is_open(self) -> bool:
+        return self.status in ('PENDING', 'NEW', 'PARTIALLY_FILLED', 'STOP_WAITING')
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'order_id': self.id,
+            'client_id': self.client_id,
+            'symbol': self.symbol,
+            'side': self.side,
+            'order_type': self.order_type,
+            'quantity': self.quantity,
+            'price': self.price,
+            'stop_price': self.stop_price,
+            'filled_quantity': self.filled_quantity,
+            'average_price': self.average_price,
+            'status': self.status,
+            'reason': self.reason
+        }
+
+
+class OrderBook:
+    """Price-time-priority limit order book for one symbol"""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids: Dict[float, deque] = {}
+        self.asks: Dict[float, deque] = {}
+        self._bid_prices: List[float] = []  # negated (max-heap)
+        self._ask_prices: List[float] = []
+
+    def add(self, order: Order):
+        levels, heap, key = (self.bids, self._bid_prices, -order.price) if order.side == BUY \
+            else (self.asks, self._ask_prices, order.price)
+        level = levels.get(order.price)
+        if level is None:
+            level = levels[order.price] = deque()
+            heapq.heappush(heap, key)
+        level.append(order)
+
+    def best_bid(self) -> Optional[float]:
+        return self._best(self.bids, self._bid_prices, negate=True)
+
+    def best_ask(self) -> Optional[float]:
+        return self._best(self.asks, self._ask_prices, negate=False)
+
+    @staticmethod
+    def _best(levels: Dict[float, deque], heap: List[float], negate: bool) -> Optional[float]:
+        while heap:
+            price = -heap[0] if negate else heap[0]
+            level = levels.get(price)
+            while level and not level[0].is_open:
+                level.popleft()  # Lazily drop cancelled / filled orders
+            if level:
+                return price
+            levels.pop(price, None)
+            heapq.heappop(heap)
+        return None
+
+    def head(self, side: str) -> Optional[Order]:
+        """Oldest open order at the best price on one side"""
+        price = self.best_bid() if side == BUY else self.best_ask()
+        if price is None:
+            return None
+        return (self.bids if side == BUY else self.asks)[price][0]
+
+    def depth(self, levels: int = 5) -> Dict[str, List]:
+        """Aggregated top-of-book levels (for inspection / tests)"""
+        def side_depth(book, prices):
+            out = []
+            for price in prices:
+                qty = sum(o.remaining for o in book.get(price, ()) if o.is_open)
+                if qty > 0:
+                    out.append((price, qty))
+                if len(out) >= levels:
+                    break
+            return out
+
+        return {
+            'bids': side_depth(self.bids, sorted(self.bids, reverse=True)),
+            'asks': side_depth(self.asks, sorted(self.asks))
+        }
+
+
+# ------------------------------------------------------------------- exchange
+
+class ExchangeSimulator:
+    """In-process exchange with matching, stops, latency and slippage"""
+
+    def __init__(self, latency_model: Optional[Callable[[], float]] = None,
+                 slippage_model: Optional[Callable] = None,
+                 synthetic_liquidity: bool = True, spread_bps: float = 1.0,
+                 bar_participation: float = 1.0, max_finished_orders: int = 10_000,
+                 max_fills: int = 10_000):
+        """
+        Args:
+            latency_model: Callable returning order-entry latency in seconds
+            slippage_model: Callable(side, price, quantity, bar_volume) -> fill price
+            synthetic_liquidity: Fill against the reference quote when the book is thin
+            spread_bps: Synthetic bid/ask spread around the reference price
+            bar_participation: Fraction of bar volume resting orders may fill per bar
+            max_finished_orders: Filled / cancelled / rejected orders kept for get_order()
+            max_fills: Recent fills kept in self.fills
+        """
+        self.latency_model = latency_model or FixedLatency(0.0)
+        self.slippage_model = slippage_model or FixedBpsSlippage(0.0)
+        self.synthetic_liquidity = synthetic_liquidity
+        self.spread_bps = spread_bps
+        self.bar_participation = bar_participation
+
+        self.books: Dict[str, OrderBook] = {}
+        self.orders: Dict[int, Order] = {}                  # open orders only
+        self.finished: OrderedDict = OrderedDict()          # order_id -> Order, oldest first
+        self.max_finished_orders = max_finished_orders
+        self.fills: deque = deque(maxlen=max_fills)
+        self.fill_count = 0
+        self.reference: Dict[str, Dict[str, Any]] = {}
+        self.clock = 0.0
+
+        self._next_id = 1
+        self._pending: List = []                   # (active_at, order_id)
+        self._buy_stops: Dict[str, List] = {}      # trigger when price >= stop (min-heap)
+        self._sell_stops: Dict[str, List] = {}     # trigger when price <= stop (max-heap)
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._collectors: List[List[Dict[str, Any]]] = []  # fills of the update / replay in progress
+
+    # -------------------------------------------------------------- public API
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None]):
+        """Receive every fill as it happens"""
+        self._listeners.append(callback)
+
+    def submit_order(self, symbol: str, side: str, quantity: float, order_type: str = MARKET,
+                     price: Optional[float] = None, stop_price: Optional[float] = None,
+                     client_id: Optional[str] = None, timestamp: Optional[float] = None) -> Order:
+        """
+        Submit an order; it reaches the book after the latency model's delay
+
+        Returns:
+            Order (inspect status / fills after the clock advances)
+        """
+        now = self.clock if timestamp is None else timestamp
+        order = Order(self._next_id, symbol, side.upper(), order_type.upper(), float(quantity),
+                      price, stop_price, now, now + self.latency_model(), client_id)
+        self._next_id += 1
+        self.orders[order.id] = order
+
+        problem = self._validate(order)
+        if problem:
+            order.status = 'REJECTED'
+            order.reason = problem
+            self._finish(order)
+            return order
+
+        if order.active_at <= self.clock:
+            self._activate(order)
+        else:
+            heapq.heappush(self._pending, (order.active_at, order.id))
+        return order
+
+    def cancel_order(self, order_id: int) -> bool:
+        """Cancel an open order (removed from the book lazily)"""
+        order = self.orders.get(order_id)
+        if order is None or not order.is_open:
+            return False
+        order.status = 'CANCELED'
+        order.updated_at = self.clock
+        self._finish(order)
+        return True
+
+    def advance(self, timestamp: float):
+        """Move the simulated clock forward, activating orders whose latency elapsed"""
+        while self._pending and self._pending[0][0] <= timestamp:
+            active_at, order_id = heapq.heappop(self._pending)
+            self.clock = max(self.clock, active_at)
+            order = self.orders.get(order_id)
+            if order is not None and order.status == 'PENDING':
+                self._activate(order)
+        self.clock = max(self.clock, timestamp)
+
+    def update_price(self, symbol: str, price: float, timestamp: Optional[float] = None,
+                     high: Optional[float] = None, low: Optional[float] = None,
+                     volume: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Feed a tick or bar: triggers stops and fills resting limits the range crossed
+
+        Returns:
+            Fills generated by this update
+        """
+        fills: List[Dict[str, Any]] = []
+        self._collectors.append(fills)
+        try:
+            if timestamp is not None:
+                self.advance(timestamp)
+
+            high = price if high is None else high
+            low = price if low is None else low
+            self.reference[symbol] = {'price': price, 'high': high, 'low': low,
+                                      'volume': volume, 'timestamp': self.clock}
+
+            self._trigger_stops(symbol, high, low)
+            if self.synthetic_liquidity:
+                self._fill_resting(symbol, high, low, volume)
+        finally:
+            self._collectors.pop()
+        return fills
+
+    def replay(self, bars: Iterable[Dict[str, Any]], symbol: Optional[str] = None,
+               on_bar: Optional[Callable[['ExchangeSimulator', Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Drive the exchange from historical OHLCV bars
+
+        Args:
+            bars: Bar dicts with open/high/low/close[/volume/timestamp/symbol|pair]
+            symbol: Symbol for bars that do not carry one
+            on_bar: Strategy hook called after each bar is applied
+
+        Returns:
+            All fills generated during the replay
+        """
+        fills: List[Dict[str, Any]] = []
+        self._collectors.append(fills)
+        try:
+            for i, bar in enumerate(bars):
+                bar_symbol = bar.get('symbol') or bar.get('pair') or symbol
+                ts = self._to_epoch(bar.get('timestamp', bar.get('time', bar.get('date'))), default=float(i))
+                self.update_price(bar_symbol, bar['close'], timestamp=ts,
+                                  high=bar.get('high'), low=bar.get('low'), volume=bar.get('volume'))
+                if on_bar:
+                    on_bar(self, bar)
+        finally:
+            self._collectors.pop()
+        return fills
+
+    def get_order(self, order_id: int) -> Optional[Dict[str, Any]]:
+        """Open or recently finished order (None once it has aged out)"""
+        order = self.orders.get(order_id) or self.finished.get(order_id)
+        return order.to_dict() if order else None
+
+    def get_book(self, symbol: str) -> OrderBook:
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(symbol)
+        return book
+
+    def get_stats(self) -> Dict[str, Any]:
+        statuses: Dict[str, int] = {}
+        for orders in (self.orders, self.finished):
+            for order in orders.values():
+                statuses[order.status] = statuses.get(order.status, 0) + 1
+        return {
+            'orders': self._next_id - 1,
+            'open_orders': len(self.orders),
+            'fills': self.fill_count,
+            'by_status': statuses,
+            'symbols': len(self.books)
+        }
+
+    # ---------------------------------------------------------------- matching
+
+    def _validate(self, order: Order) -> Optional[str]:
+        if order.side not in (BUY, SELL):
+            return f"Unknown side {order.side}"
+        if order.quantity <= 0:
+            return "Quantity must be positive"
+        if order.order_type in (LIMIT, STOP_LIMIT) and order.price is None:
+            return "Limit price required"
+        if order.order_type in (STOP, STOP_LIMIT) and order.stop_price is None:
+            return "Stop price required"
+        if order.order_type not in (MARKET, LIMIT, STOP, STOP_LIMIT):
+            return f"Unsupported order type {order.order_type}"
+        return None
+
+    def _activate(self, order: Order):
+        order.status = 'NEW'
+        order.updated_at = self.clock
+
+        if order.order_type in (STOP, STOP_LIMIT):
+            ref = self.reference.get(order.symbol)
+            if ref is None or not self._stop_hit(order, ref['price'], ref['price']):
+                order.status = 'STOP_WAITING'
+                if order.side == BUY:
+                    heapq.heappush(self._buy_stops.setdefault(order.symbol, []), (order.stop_price, order.id))
+                else:
+                    heapq.heappush(self._sell_stops.setdefault(order.symbol, []), (-order.stop_price, order.id))
+                return
+            self._convert_stop(order)
+
+        self._match(order)
+
+    @staticmethod
+    def _stop_hit(order: Order, high: float, low: float) -> bool:
+        return high >= order.stop_price if order.side == BUY else low <= order.stop_price
+
+    def _convert_stop(self, order: Order):
+        order.order_type = LIMIT if order.order_type == STOP_LIMIT else MARKET
+        order.status = 'NEW'
+
+    def _trigger_stops(self, symbol: str, high: float, low: float):
+        buy_stops = self._buy_stops.get(symbol, [])
+        while buy_stops and buy_stops[0][0] <= high:
+            _, order_id = heapq.heappop(buy_stops)
+            self._fire_stop(self.orders.get(order_id))
+
+        sell_stops = self._sell_stops.get(symbol, [])
+        while sell_stops and -sell_stops[0][0] >= low:
+            _, order_id = heapq.heappop(sell_stops)
+            self._fire_stop(self.orders.get(order_id))
+
+    def _fire_stop(self, order: Optional[Order]):
+        if order is None or order.status != 'STOP_WAITING':
+            return  # Cancelled while waiting
+        self._convert_stop(order)
+        self._match(order)
+
+    def _crosses(self, order: Order, resting_price: float) -> bool:
+        if order.order_type == MARKET:
+            return True
+        return resting_price <= order.price if order.side == BUY else resting_price >= order.price
+
+    def _match(self, order: Order):
+        """Match an incoming order against the book, then synthetic liquidity, then rest"""
+        book = self.get_book(order.symbol)
+        opposite = SELL if order.side == BUY else BUY
+
+        quote = self._quote(order.symbol) if self.synthetic_liquidity else None
+        while order.remaining > 1e-12:
+            resting = book.head(opposite)
+            if resting is None or not self._crosses(order, resting.price):
+                break
+            if quote and (quote['ask'] < resting.price if order.side == BUY else quote['bid'] > resting.price):
+                break  # Wider market offers a better price than the local book
+            quantity = min(order.remaining, resting.remaining)
+            self._fill(resting, resting.price, quantity, 'MAKER')
+            self._fill(order, resting.price, quantity, 'TAKER')
+
+        if order.remaining > 1e-12 and self.synthetic_liquidity:
+            self._fill_synthetic(order)
+
+        if order.remaining > 1e-12:
+            if order.order_type == LIMIT:
+                book.add(order)
+            else:
+                # Unfilled market remainder is cancelled (IOC semantics)
+                order.status = 'CANCELED' if order.filled_quantity else 'REJECTED'
+                order.reason = 'NO_LIQUIDITY'
+                self._finish(order)
+
+    def _quote(self, symbol: str) -> Optional[Dict[str, float]]:
+        ref = self.reference.get(symbol)
+        if ref is None:
+            return None
+        half_spread = ref['price'] * self.spread_bps / 20000
+        return {'bid': ref['price'] - half_spread, 'ask': ref['price'] + half_spread,
+                'volume': ref['volume']}
+
+    def _fill_synthetic(self, order: Order):
+        quote = self._quote(order.symbol)
+        if quote is None:
+            return
+
+        touch = quote['ask'] if order.side == BUY else quote['bid']
+        fill_price = self.slippage_model(order.side, touch, order.remaining, quote['volume'])
+        if order.order_type == LIMIT:
+            if not self._crosses(order, touch):
+                return
+            # Limit caps slippage
+            fill_price = min(fill_price, order.price) if order.side == BUY else max(fill_price, order.price)
+        self._fill(order, fill_price, order.remaining, 'SYNTHETIC')
+
+    def _fill_resting(self, symbol: str, high: float, low: float, volume: Optional[float]):
+        """Fill resting limit orders whose price the new range traded through"""
+        book = self.books.get(symbol)
+        if book is None:
+            return
+
+        for side, crossed in ((BUY, lambda p: low <= p), (SELL, lambda p: high >= p)):
+            available = volume * self.bar_participation if volume else float('inf')
+            while available > 1e-12:
+                resting = book.head(side)
+                if resting is None or not crossed(resting.price):
+                    break
+                quantity = min(resting.remaining, available)
+                self._fill(resting, resting.price, quantity, 'SYNTHETIC')
+                available -= quantity
+
+    def _fill(self, order: Order, price: float, quantity: float, liquidity: str):
+        order.filled_quantity += quantity
+        order.fill_value += price * quantity
+        order.updated_at = self.clock
+        order.status = 'FILLED' if order.remaining <= 1e-12 else 'PARTIALLY_FILLED'
+
+        fill = {
+            'order_id': order.id,
+            'client_id': order.client_id,
+            'symbol': order.symbol,
+            'side': order.side,
+            'price': price,
+            'quantity': quantity,
+            'liquidity': liquidity,
+            'timestamp': self.clock
+        }
+        self.fills.append(fill)
+        self.fill_count += 1
+        for collected in self._collectors:
+            collected.append(fill)
+        if order.status == 'FILLED':
+            self._finish(order)
+        for callback in self._listeners:
+            callback(fill)
+
+    def _finish(self, order: Order):
+        """Move a filled / cancelled / rejected order out of the live table"""
+        if self.orders.pop(order.id, None) is None:
+            return
+        self.finished[order.id] = order
+        if len(self.finished) > self.max_finished_orders:
+            self.finished.popitem(last=False)
+
+    @staticmethod
+    def _to_epoch(value: Any, default: float) -> float:
+        if value is None:
+            return default
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, datetime):
+            return value.timestamp()
+        try:
+            return datetime.fromisoformat(str(value)).timestamp()
+        except ValueError:
+            return default
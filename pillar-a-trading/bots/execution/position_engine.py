@@ -0,0 +1,230 @@
+"""
+Position Engine
+Open/close lifecycle and mark-to-market for paper trading accounts
+
+Open positions are indexed per pair. Stop-loss and take-profit levels sit in
+heaps ordered by trigger price, so a price update only pops the positions it
+actually closes. Unrealized P&L per pair is kept as running net quantity and
+net cost, so marking a pair to market is O(1) plus the positions it closes.
+"""
+
+import heapq
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger('PositionEngine')
+
+
+class PairBook:
+    """Open positions and trigger heaps for a single pair"""
+
+    def __init__(self):
+        self.positions: Dict[int, Dict[str, Any]] = {}
+        # (key, position_id) - keys negated where a max-heap is needed
+        self.long_stops: List = []     # close when price <= stop   (max-heap)
+        self.long_targets: List = []   # close when price >= target (min-heap)
+        self.short_stops: List = []    # close when price >= stop   (min-heap)
+        self.short_targets: List = []  # close when price <= target (max-heap)
+        self.net_quantity = 0.0        # long qty - short qty
+        self.net_cost = 0.0            # signed entry value
+        self.last_price: Optional[float] = None
+
+    def unrealized_pnl(self) -> float:
+        if self.last_price is None:
+            return 0.0
+        return self.net_quantity * self.last_price - self.net_cost
+
+
+class PositionEngine:
+    """Tracks positions, realized P&L and win/loss counters for one account"""
+
+    def __init__(self, capital: float, stop_loss_pct: float = 0.02,
+                 take_profit_pct: float = 0.04, close_on_reversal: bool = True):
+        """
+        Args:
+            capital: Starting (or resumed) account capital
+            stop_loss_pct: Stop distance from entry as a fraction of price
+            take_profit_pct: Target distance from entry as a fraction of price
+            close_on_reversal: Close opposite-side positions on a new signal
+        """
+        self.capital = capital
+        self.stop_loss_pct = stop_loss_pct
+        self.take_profit_pct = take_profit_pct
+        self.close_on_reversal = close_on_reversal
+
+        self.books: Dict[str, PairBook] = {}
+        self.winning_trades = 0
+        self.losing_trades = 0
+        self.total_profit = 0.0
+        self.total_loss = 0.0
+        self._next_id = 1
+
+    def open_position(self, pair: str, side: str, price: float, size: float,
+                      **details) -> Dict[str, Any]:
+        """
+        Open a position
+
+        Args:
+            pair: Trading pair
+            side: 'BUY' (long) or 'SELL' (short)
+            price: Entry price
+            size: Position value in account currency
+            details: Extra fields kept on the position (pattern, confidence, ...)
+
+        Returns:
+            Position dictionary
+        """
+        if side == 'BUY':
+            stop_loss = price * (1 - self.stop_loss_pct)
+            take_profit = price * (1 + self.take_profit_pct)
+        else:
+            stop_loss = price * (1 + self.stop_loss_pct)
+            take_profit = price * (1 - self.take_profit_pct)
+
+        position = dict(details)
+        position.update({
+            'id': self._next_id,
+            'timestamp': details.get('timestamp', datetime.now().isoformat()),
+            'type': side,
+            'pair': pair,
+            'price': price,
+            'size': size,
+            'quantity': size / price if price else 0.0,
+            'stop_loss': stop_loss,
+            'take_profit': take_profit,
+            'profit_loss': 0
+        })
+        self._next_id += 1
+        self._index(position)
+        return position
+
+    def load_positions(self, positions: List[Dict[str, Any]]):
+        """Re-index positions restored from persisted stats"""
+        for position in positions:
+            if 'stop_loss' not in position or not position.get('price'):
+                continue  # Legacy entries without lifecycle fields
+            position.setdefault('quantity', position['size'] / position['price'])
+            position.setdefault('id', self._next_id)
+            self._next_id = max(self._next_id, position['id'] + 1)
+            self._index(position)
+
+    def _index(self, position: Dict[str, Any]):
+        book = self.books.setdefault(position['pair'], PairBook())
+        position_id = position['id']
+        book.positions[position_id] = position
+
+        if position['type'] == 'BUY':
+            heapq.heappush(book.long_stops, (-position['stop_loss'], position_id))
+            heapq.heappush(book.long_targets, (position['take_profit'], position_id))
+            book.net_quantity += position['quantity']
+            book.net_cost += position['size']
+        else:
+            heapq.heappush(book.short_stops, (position['stop_loss'], position_id))
+            heapq.heappush(book.short_targets, (-position['take_profit'], position_id))
+            book.net_quantity -= position['quantity']
+            book.net_cost -= position['size']
+
+    def mark_to_market(self, pair: str, price: float) -> List[Dict[str, Any]]:
+        """
+        Apply a price update: close stopped / targeted positions on this pair
+
+        Returns:
+            Positions closed by this update
+        """
+        book = self.books.get(pair)
+        if book is None:
+            return []
+
+        book.last_price = price
+        closed = []
+        closed += self._pop_triggered(book, book.long_stops, lambda k: price <= -k, price, 'STOP_LOSS')
+        closed += self._pop_triggered(book, book.long_targets, lambda k: price >= k, price, 'TAKE_PROFIT')
+        closed += self._pop_triggered(book, book.short_stops, lambda k: price >= k, price, 'STOP_LOSS')
+        closed += self._pop_triggered(book, book.short_targets, lambda k: price <= -k, price, 'TAKE_PROFIT')
+        return closed
+
+    def on_signal(self, pair: str, side: str, price: float) -> List[Dict[str, Any]]:
+        """
+        Close positions on the opposite side of a new signal
+
+        Returns:
+            Positions closed by the reversal
+        """
+        book = self.books.get(pair)
+        if not self.close_on_reversal or book is None:
+            return []
+
+        book.last_price = price
+        opposite = [p for p in book.positions.values() if p['type'] != side]
+        return [self._close(book, p, price, 'SIGNAL_REVERSAL') for p in opposite]
+
+    def _pop_triggered(self, book: PairBook, heap: List, triggered, price: float,
+                       reason: str) -> List[Dict[str, Any]]:
+        closed = []
+        while heap and triggered(heap[0][0]):
+            _, position_id = heapq.heappop(heap)
+            position = book.positions.get(position_id)
+            if position is not None:  # Skip entries already closed via the other heap
+                closed.append(self._close(book, position, price, reason))
+        return closed
+
+    def _close(self, book: PairBook, position: Dict[str, Any], exit_price: float,
+               reason: str) -> Dict[str, Any]:
+        del book.positions[position['id']]
+
+        if position['type'] == 'BUY':
+            profit_loss = (exit_price - position['price']) * position['quantity']
+            book.net_quantity -= position['quantity']
+            book.net_cost -= position['size']
+        else:
+            profit_loss = (position['price'] - exit_price) * position['quantity']
+            book.net_quantity += position['quantity']
+            book.net_cost += position['size']
+
+        position.update({
+            'exit_price': exit_price,
+            'close_reason': reason,
+            'closed_at': datetime.now().isoformat(),
+            'profit_loss': profit_loss
+        })
+
+        self.capital += profit_loss
+        if profit_loss > 0:
+            self.winning_trades += 1
+            self.total_profit += profit_loss
+        else:
+            self.losing_trades += 1
+            self.total_loss += abs(profit_loss)
+
+        if not book.positions:
+            # Pair is flat - drop stale heap entries and float drift
+            book.long_stops.clear()
+            book.long_targets.clear()
+            book.short_stops.clear()
+            book.short_targets.clear()
+            book.net_quantity = 0.0
+            book.net_cost = 0.0
+        elif len(book.long_stops) + len(book.short_stops) > 4 * len(book.positions) + 64:
+            self._rebuild_heaps(book)
+
+        return position
+
+    @staticmethod
+    def _rebuild_heaps(book: PairBook):
+        """Drop heap entries for positions closed through their other trigger"""
+        for name in ('long_stops', 'long_targets', 'short_stops', 'short_targets'):
+            heap = [entry for entry in getattr(book, name) if entry[1] in book.positions]
+            heapq.heapify(heap)
+            setattr(book, name, heap)
+
+    def open_positions(self) -> List[Dict[str, Any]]:
+        """All open positions across pairs"""
+        return [p for book in self.books.values() for p in book.positions.values()]
+
+    def open_count(self) -> int:
+        return sum(len(book.positions) for book in self.books.values())
+
+    def unrealized_pnl(self) -> float:
+        """Unrealized P&L across pairs at their last marked price"""
+        return sum(book.unrealized_pnl() for book in self.books.values())
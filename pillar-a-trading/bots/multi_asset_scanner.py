@@ -0,0 +1,337 @@
+"""
+Multi-Asset Scanner
+Vectorized rule evaluation for the MultiAssetOrchestrator bots
+
+A snapshot is columnar: one sequence per field across every symbol of an
+asset class, e.g. {'symbol': [...], 'rsi': [...], 'pe_ratio': [...]}.
+Each bot's per-symbol rules are evaluated as array expressions over the
+whole universe, and signal dicts (with reasons) are only built for rows
+that clear the bot's threshold. Signals are environment-neutral, so PAPER
+and SANDBOX share a single evaluation.
+
+Missing columns take the same defaults as the per-symbol analyze_* methods.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Sequence
+
+import numpy as np
+
+SnapshotColumns = Dict[str, Sequence]
+
+# Reference price fields, in order of preference (bid/ask midpoint as a fallback)
+PRICE_FIELDS = ('price', 'close', 'last')
+
+
+def reference_price(data: Dict[str, Any]) -> Optional[float]:
+    """Latest quote / bar close from one symbol's market data"""
+    for field in PRICE_FIELDS:
+        if data.get(field) is not None:
+            return float(data[field])
+    if data.get('bid') is not None and data.get('ask') is not None:
+        return (float(data['bid']) + float(data['ask'])) / 2
+    return None
+
+
+def to_columnar(rows: Dict[str, Dict[str, Any]], key: str = 'symbol') -> Dict[str, list]:
+    """
+    Convert {symbol: data} rows into a columnar snapshot
+
+    Fields missing from a row are stored as None and fall back to the
+    rule defaults when scanned.
+    """
+    symbols = list(rows)
+    fields = {field for data in rows.values() for field in data}
+    columns = {key: symbols}
+    for field in fields:
+        columns[field] = [rows[symbol].get(field) for symbol in symbols]
+    return columns
+
+
+def _numeric(snapshot: SnapshotColumns, field: str, default: float, n: int) -> np.ndarray:
+    column = snapshot.get(field)
+    if column is None:
+        return np.full(n, default, dtype=float)
+    if isinstance(column, np.ndarray) and column.dtype != object:
+        return column.astype(float, copy=False)
+    return np.array([default if v is None else v for v in column], dtype=float)
+
+
+def _flag(snapshot: SnapshotColumns, field: str, n: int) -> np.ndarray:
+    column = snapshot.get(field)
+    if column is None:
+        return np.zeros(n, dtype=bool)
+    if isinstance(column, np.ndarray) and column.dtype != object:
+        return column.astype(bool, copy=False)
+    return np.array([bool(v) for v in column], dtype=bool)
+
+
+def _labels(snapshot: SnapshotColumns, field: str, default: str, n: int) -> np.ndarray:
+    column = snapshot.get(field)
+    if column is None:
+        return np.full(n, default, dtype=object)
+    return np.array([default if v is None else v for v in column], dtype=object)
+
+
+def _build_signals(keys: Sequence, key_field: str, asset_class: str, confidence: np.ndarray,
+                   actions: np.ndarray, threshold: float, reasons: List,
+                   extra: Optional[Dict[str, np.ndarray]] = None) -> List[Dict[str, Any]]:
+    """
+    Materialize signal dicts for actionable rows only
+
+    Args:
+        reasons: (mask, text) pairs in rule order; text may be a callable
+            taking the row index for value-dependent messages
+        extra: Additional per-row columns copied onto each signal
+    """
+    hits = (confidence >= threshold) & (actions != None)  # noqa: E711 - elementwise
+    timestamp = datetime.now().isoformat()
+
+    signals = []
+    for i in np.flatnonzero(hits):
+        signal = {
+            key_field: str(keys[i]),
+            'action': actions[i],
+            'asset_class': asset_class,
+            'timestamp': timestamp,
+            'confidence': float(confidence[i]),
+            'reasons': [text(i) if callable(text) else text for mask, text in reasons if mask[i]],
+            'status': 'EXECUTE'
+        }
+        for field, column in (extra or {}).items():
+            signal[field] = column[i]
+        signals.append(signal)
+    return signals
+
+
+def scan_shorting(snapshot: SnapshotColumns, key: str = 'symbol') -> List[Dict[str, Any]]:
+    """Vectorized ShortingBot.analyze_short_opportunity"""
+    n = len(snapshot[key])
+    rules = [
+        (_numeric(snapshot, 'rsi', 50, n) > 70, 0.25, 'RSI overbought (>70)'),
+        (_numeric(snapshot, 'pe_ratio', 0, n) > 50, 0.20, 'P/E ratio excessive (>50)'),
+        (_flag(snapshot, 'price_below_sma_20', n), 0.25, 'Price below 20-day SMA'),
+        (_flag(snapshot, 'volume_spike', n), 0.15, 'Volume spike detected'),
+        (_flag(snapshot, 'bearish_pattern', n), 0.15, 'Bearish candlestick pattern'),
+    ]
+
+    confidence = np.zeros(n)
+    for mask, weight, _ in rules:
+        confidence += np.where(mask, weight, 0.0)
+
+    actions = np.full(n, 'SHORT', dtype=object)
+    reasons = [(mask, text) for mask, _, text in rules]
+    return _build_signals(snapshot[key], 'symbol', 'SHORTING', confidence, actions, 0.70, reasons)
+
+
+def scan_options(snapshot: SnapshotColumns, key: str = 'symbol') -> List[Dict[str, Any]]:
+    """Vectorized OptionsBot.analyze_option_opportunity"""
+    n = len(snapshot[key])
+    volatility = _numeric(snapshot, 'implied_volatility', 0.30, n)
+    trend = _labels(snapshot, 'trend', 'neutral', n)
+
+    bullish = trend == 'bullish'
+    bearish = trend == 'bearish'
+    covered_call = (volatility > 0.40) & bullish
+    directional = ~covered_call & (volatility < 0.25) & (bullish | bearish)
+    condor = ~covered_call & ~directional & (volatility > 0.30) & (trend == 'neutral')
+
+    actions = np.full(n, None, dtype=object)
+    actions[covered_call] = 'SELL_CALL'
+    actions[directional & bullish] = 'BUY_CALL'
+    actions[directional & bearish] = 'BUY_PUT'
+    actions[condor] = 'IRON_CONDOR'
+
+    strategies = np.full(n, None, dtype=object)
+    strategies[covered_call] = 'COVERED_CALL'
+    strategies[directional] = 'DIRECTIONAL_TRADE'
+    strategies[condor] = 'IRON_CONDOR'
+
+    confidence = np.select([covered_call, directional, condor], [0.75, 0.70, 0.65], 0.0)
+
+    reasons = [
+        (covered_call, lambda i: f'High IV ({volatility[i]:.2%}) + bullish trend'),
+        (directional, lambda i: f'Low IV ({volatility[i]:.2%}) + {trend[i]} trend'),
+        (condor, lambda i: f'High IV ({volatility[i]:.2%}) + neutral market'),
+    ]
+    return _build_signals(snapshot[key], 'symbol', 'OPTIONS', confidence, actions, 0.65, reasons,
+                          extra={'strategy': strategies})
+
+
+def scan_forex(snapshot: SnapshotColumns, key: str = 'pair') -> List[Dict[str, Any]]:
+    """Vectorized ForexBot.analyze_forex_pair"""
+    n = len(snapshot[key])
+    sma_50 = _numeric(snapshot, 'sma_50', 0, n)
+    sma_200 = _numeric(snapshot, 'sma_200', 0, n)
+    rsi = _numeric(snapshot, 'rsi', 50, n)
+
+    buy = sma_50 > sma_200
+    sell = sma_50 < sma_200
+    rsi_confirms = (buy & (rsi < 40)) | (sell & (rsi > 60))
+    volume = _flag(snapshot, 'volume_above_average', n)
+    rates = _flag(snapshot, 'interest_rate_favorable', n)
+
+    confidence = np.where(buy | sell, 0.30, 0.0)
+    confidence += np.where(rsi_confirms, 0.25, 0.0)
+    confidence += np.where(volume, 0.20, 0.0)
+    confidence += np.where(rates, 0.15, 0.0)
+
+    actions = np.full(n, None, dtype=object)
+    actions[buy] = 'BUY'
+    actions[sell] = 'SELL'
+
+    reasons = [
+        (buy, 'Bullish trend (SMA 50 > SMA 200)'),
+        (sell, 'Bearish trend (SMA 50 < SMA 200)'),
+        (buy & rsi_confirms, 'RSI oversold (<40)'),
+        (sell & rsi_confirms, 'RSI overbought (>60)'),
+        (volume, 'Volume above average'),
+        (rates, 'Favorable interest rate differential'),
+    ]
+    return _build_signals(snapshot[key], 'pair', 'FOREX', confidence, actions, 0.75, reasons)
+
+
+def scan_crypto(snapshot: SnapshotColumns, key: str = 'symbol') -> List[Dict[str, Any]]:
+    """Vectorized CryptoBot.analyze_crypto"""
+    n = len(snapshot[key])
+    momentum = _numeric(snapshot, 'momentum_score', 0, n)
+
+    buy = momentum > 0.6
+    sell = momentum < -0.6
+    volume = _flag(snapshot, 'volume_breakout', n)
+    bullish = _flag(snapshot, 'bullish_pattern', n) & buy
+    bearish = _flag(snapshot, 'bearish_pattern', n) & sell
+    on_chain = np.isin(np.asarray(snapshot[key], dtype=object), ['BTC', 'ETH']) & \
+        _flag(snapshot, 'on_chain_bullish', n)
+
+    confidence = np.where(buy | sell, 0.30, 0.0)
+    confidence += np.where(volume, 0.25, 0.0)
+    confidence += np.where(bullish | bearish, 0.20, 0.0)
+    confidence += np.where(on_chain, 0.15, 0.0)
+
+    actions = np.full(n, None, dtype=object)
+    actions[buy] = 'BUY'
+    actions[sell] = 'SELL'
+
+    reasons = [
+        (buy, lambda i: f'Strong upward momentum ({momentum[i]:.2f})'),
+        (sell, lambda i: f'Strong downward momentum ({momentum[i]:.2f})'),
+        (volume, 'Volume breakout detected'),
+        (bullish, 'Bullish pattern confirmed'),
+        (bearish, 'Bearish pattern confirmed'),
+        (on_chain, 'Bullish on-chain metrics'),
+    ]
+    return _build_signals(snapshot[key], 'symbol', 'CRYPTO', confidence, actions, 0.70, reasons)
+
+
+def scan_usd_crypto_pairs(snapshot: SnapshotColumns, key: str = 'pair') -> List[Dict[str, Any]]:
+    """Vectorized USDCryptoPairsBot.analyze_usd_crypto_pair"""
+    n = len(snapshot[key])
+    crypto_strength = _numeric(snapshot, 'crypto_strength', 0, n)
+    usd_strength = _numeric(snapshot, 'usd_strength', 0, n)
+
+    buy = (crypto_strength > 0.6) & (usd_strength < -0.3)
+    sell = ~buy & (crypto_strength < -0.6) & (usd_strength > 0.3)
+    breakout = _flag(snapshot, 'breakout', n)
+    volume = _flag(snapshot, 'high_volume', n)
+
+    confidence = np.where(buy | sell, 0.40, 0.0)
+    confidence += np.where(breakout, 0.30, 0.0)
+    confidence += np.where(volume, 0.20, 0.0)
+
+    actions = np.full(n, None, dtype=object)
+    actions[buy] = 'BUY'
+    actions[sell] = 'SELL'
+
+    reasons = [
+        (buy, 'Strong crypto + weak USD'),
+        (sell, 'Weak crypto + strong USD'),
+        (breakout, 'Price breakout confirmed'),
+        (volume, 'High trading volume'),
+    ]
+    return _build_signals(snapshot[key], 'pair', 'USD_CRYPTO_PAIRS', confidence, actions, 0.75, reasons)
+
+
+def scan_us_indices(snapshot: SnapshotColumns, key: str = 'symbol',
+                    names: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """Vectorized USIndicesBot.analyze_index"""
+    n = len(snapshot[key])
+    vix = _numeric(snapshot, 'vix', 20, n)
+
+    trend = _flag(snapshot, 'above_200_sma', n)
+    low_vix = trend & (vix < 15)
+    high_vix = ~low_vix & (vix > 30)
+    volume = _flag(snapshot, 'volume_above_average', n)
+    economy = _flag(snapshot, 'economic_data_positive', n)
+
+    confidence = np.where(trend, 0.30, 0.0)
+    confidence += np.where(low_vix | high_vix, 0.25, 0.0)
+    confidence += np.where(volume, 0.20, 0.0)
+    confidence += np.where(economy, 0.15, 0.0)
+
+    actions = np.full(n, None, dtype=object)
+    actions[trend] = 'BUY'
+    actions[high_vix] = 'SELL'
+
+    names = names or {}
+    keys = snapshot[key]
+    reasons = [
+        (trend, 'Price above 200-day SMA'),
+        (low_vix, lambda i: f'Low VIX ({_vix_text(snapshot, vix, i)}) - low fear'),
+        (high_vix, lambda i: f'High VIX ({_vix_text(snapshot, vix, i)}) - high fear'),
+        (volume, 'Volume above average'),
+        (economy, 'Positive economic data'),
+    ]
+    display_names = np.array([names.get(str(k), str(k)) for k in keys], dtype=object)
+    return _build_signals(keys, 'symbol', 'US_INDICES', confidence, actions, 0.70, reasons,
+                          extra={'name': display_names})
+
+
+def _vix_text(snapshot: SnapshotColumns, vix: np.ndarray, i: int) -> Any:
+    """VIX as the caller supplied it, so reasons match the per-symbol bot"""
+    column = snapshot.get('vix')
+    return column[i] if column is not None and column[i] is not None else vix[i]
+
+
+SCANNERS = {
+    'shorting': scan_shorting,
+    'options': scan_options,
+    'forex': scan_forex,
+    'crypto': scan_crypto,
+    'usd_crypto_pairs': scan_usd_crypto_pairs,
+    'us_indices': scan_us_indices,
+}
+
+PAIR_KEYED = {'forex', 'usd_crypto_pairs'}
+
+
+def scan_snapshot(asset_class: str, snapshot: SnapshotColumns, **kwargs) -> List[Dict[str, Any]]:
+    """
+    Evaluate one asset class over a columnar snapshot
+
+    The symbol column is 'pair' for forex / USD crypto pairs and 'symbol'
+    otherwise; either name is accepted.
+
+    Returns:
+        Environment-neutral actionable signals
+    """
+    scanner = SCANNERS.get(asset_class)
+    if scanner is None:
+        raise ValueError(f"Unknown asset class: {asset_class}")
+
+    preferred = 'pair' if asset_class in PAIR_KEYED else 'symbol'
+    key = preferred if preferred in snapshot else ('symbol' if preferred == 'pair' else 'pair')
+    if key not in snapshot or not len(snapshot[key]):
+        return []
+    signals = scanner(snapshot, key=key, **kwargs)
+
+    # Carry each row's reference price so orders can be priced and sized
+    fields = [field for field in PRICE_FIELDS + ('bid', 'ask') if field in snapshot]
+    if signals and fields:
+        key_field = 'pair' if asset_class in PAIR_KEYED else 'symbol'
+        prices = {}
+        for i, symbol in enumerate(snapshot[key]):
+            prices[str(symbol)] = reference_price({field: snapshot[field][i] for field in fields})
+        for signal in signals:
+            signal['price'] = prices.get(signal[key_field])
+    return signals
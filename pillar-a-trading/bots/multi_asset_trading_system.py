@@ -6,12 +6,22 @@ Runs on both Paper and Sandbox environments
 """
 
 import json
+import sys
 import logging
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from enum import Enum
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent / 'execution'))
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'risk'))
+
+from exchange_simulator import ExchangeSimulator
+from multi_asset_scanner import scan_snapshot, reference_price
+from risk_engine import RiskEngine
+from options_analytics import OptionsAnalytics
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('MultiAssetTrader')
 
@@ -33,11 +43,74 @@ class TradingEnvironment(Enum):
     LIVE = "live"
 
 
+def order_quantity(signal: Dict, price: float, risk_engine: Optional[RiskEngine] = None,
+                   account_id: Optional[str] = None) -> Optional[float]:
+    """
+    Units to trade for a signal
+
+    An explicit signal['quantity'] wins; otherwise the risk engine's position
+    value for the account (risk_per_trade over the stop distance, capped at
+    max_position_size of equity) is converted to units at the reference price.
+    """
+    if signal.get('quantity'):
+        return float(signal['quantity'])
+    if risk_engine is None or account_id is None or not price:
+        return None
+    value = risk_engine.position_size(account_id, signal.get('stop_distance_pct'))
+    return value / price if value > 0 else None
+
+
+def route_to_exchange(exchange: Optional[ExchangeSimulator], order: Dict, signal: Dict, symbol: str,
+                      side: str, risk_engine: Optional[RiskEngine] = None,
+                      account_id: Optional[str] = None) -> Dict:
+    """
+    Send a bot order to the local exchange simulator (PAPER / SANDBOX only)
+
+    The signal's reference price (from the bot's market data) is fed to the
+    simulator first so the order fills against a quote around it; without
+    one, the simulator's last price for the symbol is used. Leaves the order
+    stamped 'SIMULATED' when no simulator is attached.
+    """
+    if exchange is None or order['environment'] == TradingEnvironment.LIVE.value:
+        return order
+
+    price = signal.get('price')
+    if price is not None:
+        exchange.update_price(symbol, price)
+    elif symbol in exchange.reference:
+        price = exchange.reference[symbol]['price']
+    else:
+        order.update({'status': 'REJECTED', 'reject_reason': 'NO_PRICE'})
+        return order
+
+    quantity = order_quantity(signal, price, risk_engine, account_id)
+    if not quantity:
+        order.update({'status': 'REJECTED', 'reject_reason': 'NO_SIZE', 'reference_price': price})
+        return order
+
+    placed = exchange.submit_order(symbol, side, quantity, client_id=order['bot'])
+    order.update({
+        'exchange_order_id': placed.id,
+        'status': placed.status,
+        'quantity': quantity,
+        'reference_price': price,
+        'filled_quantity': placed.filled_quantity,
+        'average_price': placed.average_price
+    })
+    if placed.reason:
+        order['reject_reason'] = placed.reason
+    return order
+
+
 class ShortingBot:
     """Bot for short selling stocks"""
 
-    def __init__(self, environment: TradingEnvironment):
+    def __init__(self, environment: TradingEnvironment, exchange: Optional[ExchangeSimulator] = None,
+                 risk_engine: Optional[RiskEngine] = None, account_id: Optional[str] = None):
         self.environment = environment
+        self.exchange = exchange
+        self.risk_engine = risk_engine
+        self.account_id = account_id
         self.name = f"ShortingBot-{environment.value}"
         logger.info(f"✅ {self.name} initialized")
 
@@ -57,6 +130,7 @@ class ShortingBot:
             'asset_class': 'SHORTING',
             'environment': self.environment.value,
             'timestamp': datetime.now().isoformat(),
+            'price': reference_price(data),
             'confidence': 0.0,
             'reasons': []
         }
@@ -102,6 +176,8 @@ class ShortingBot:
             'status': 'SIMULATED' if self.environment != TradingEnvironment.LIVE else 'PENDING'
         }
 
+        order = route_to_exchange(self.exchange, order, signal, signal['symbol'], 'SELL',
+                                  self.risk_engine, self.account_id)
         logger.info(f"📤 {self.name}: Executed SHORT on {signal['symbol']}")
         return order
 
@@ -109,8 +185,9 @@ class ShortingBot:
 class OptionsBot:
     """Bot for options trading (calls and puts)"""
 
-    def __init__(self, environment: TradingEnvironment):
+    def __init__(self, environment: TradingEnvironment, analytics: Optional[OptionsAnalytics] = None):
         self.environment = environment
+        self.analytics = analytics or OptionsAnalytics()
         self.name = f"OptionsBot-{environment.value}"
         logger.info(f"✅ {self.name} initialized")
 
@@ -131,6 +208,7 @@ class OptionsBot:
             'asset_class': 'OPTIONS',
             'environment': self.environment.value,
             'timestamp': datetime.now().isoformat(),
+            'price': reference_price(data),
             'confidence': 0.0,
             'strategy': None,
             'reasons': []
@@ -167,6 +245,49 @@ class OptionsBot:
 
         return None
 
+    def rank_option_contracts(self, symbol: str, spot: float, chain: Dict,
+                              forecast_volatility: float, tick: Any = None,
+                              min_edge_pct: float = 0.05, top_n: int = 10) -> List[Dict]:
+        """
+        Price a full option chain and emit signals for mispriced contracts
+
+        Buys contracts trading below their model value at the forecast
+        volatility and sells those trading above it.
+
+        Args:
+            symbol: Underlying symbol
+            spot: Underlying price
+            chain: Columnar chain - strike, expiry (years), is_call, price
+            forecast_volatility: Expected realized volatility (annualized)
+            tick: Underlying tick identifier; surfaces are cached per tick
+
+        Returns:
+            Signals ranked by absolute edge
+        """
+        contracts = self.analytics.rank_contracts(symbol, spot, chain, forecast_volatility,
+                                                  tick=tick, min_edge_pct=min_edge_pct, top_n=top_n)
+        signals = []
+        for contract in contracts:
+            side = 'BUY' if contract['edge'] > 0 else 'SELL'
+            signals.append({
+                'symbol': symbol,
+                'action': f"{side}_{contract['option_type']}",
+                'asset_class': 'OPTIONS',
+                'environment': self.environment.value,
+                'timestamp': datetime.now().isoformat(),
+                'confidence': min(0.95, 0.65 + abs(contract['edge_pct'])),
+                'strategy': 'VOLATILITY_EDGE',
+                'contract': contract,
+                'reasons': [f"IV {contract['implied_volatility']:.2%} vs forecast {forecast_volatility:.2%} "
+                            f"({contract['edge_pct']:+.1%} edge)"],
+                'status': 'EXECUTE'
+            })
+
+        if signals:
+            logger.info(f"📊 {self.name}: {len(signals)} mispriced {symbol} contracts, "
+                        f"best edge {signals[0]['contract']['edge_pct']:+.1%}")
+        return signals
+
     def execute_option_trade(self, signal: Dict) -> Dict:
         """Execute options trade"""
         order = {
@@ -175,6 +296,7 @@ class OptionsBot:
             'symbol': signal['symbol'],
             'action': signal['action'],
             'strategy': signal['strategy'],
+            'contract': signal.get('contract'),
             'timestamp': datetime.now().isoformat(),
             'environment': self.environment.value,
             'confidence': signal['confidence'],
@@ -189,8 +311,12 @@ class OptionsBot:
 class ForexBot:
     """Bot for forex trading (currency pairs)"""
 
-    def __init__(self, environment: TradingEnvironment):
+    def __init__(self, environment: TradingEnvironment, exchange: Optional[ExchangeSimulator] = None,
+                 risk_engine: Optional[RiskEngine] = None, account_id: Optional[str] = None):
         self.environment = environment
+        self.exchange = exchange
+        self.risk_engine = risk_engine
+        self.account_id = account_id
         self.name = f"ForexBot-{environment.value}"
         self.major_pairs = ['EUR/USD', 'GBP/USD', 'USD/JPY', 'USD/CHF', 'AUD/USD', 'USD/CAD', 'NZD/USD']
         logger.info(f"✅ {self.name} initialized - Monitoring {len(self.major_pairs)} major pairs")
@@ -211,6 +337,7 @@ class ForexBot:
             'asset_class': 'FOREX',
             'environment': self.environment.value,
             'timestamp': datetime.now().isoformat(),
+            'price': reference_price(data),
             'confidence': 0.0,
             'reasons': []
         }
@@ -265,6 +392,8 @@ class ForexBot:
             'status': 'SIMULATED' if self.environment != TradingEnvironment.LIVE else 'PENDING'
         }
 
+        order = route_to_exchange(self.exchange, order, signal, signal['pair'], signal['action'],
+                                  self.risk_engine, self.account_id)
         logger.info(f"📤 {self.name}: Executed {signal['action']} on {signal['pair']}")
         return order
 
@@ -272,8 +401,12 @@ class ForexBot:
 class CryptoBot:
     """Bot for cryptocurrency trading"""
 
-    def __init__(self, environment: TradingEnvironment):
+    def __init__(self, environment: TradingEnvironment, exchange: Optional[ExchangeSimulator] = None,
+                 risk_engine: Optional[RiskEngine] = None, account_id: Optional[str] = None):
         self.environment = environment
+        self.exchange = exchange
+        self.risk_engine = risk_engine
+        self.account_id = account_id
         self.name = f"CryptoBot-{environment.value}"
         self.supported_crypto = ['BTC', 'ETH', 'SOL', 'ADA', 'DOT', 'LINK', 'AVAX', 'MATIC']
         logger.info(f"✅ {self.name} initialized - Trading {len(self.supported_crypto)} cryptocurrencies")
@@ -294,6 +427,7 @@ class CryptoBot:
             'asset_class': 'CRYPTO',
             'environment': self.environment.value,
             'timestamp': datetime.now().isoformat(),
+            'price': reference_price(data),
             'confidence': 0.0,
             'reasons': []
         }
@@ -348,6 +482,8 @@ class CryptoBot:
             'status': 'SIMULATED' if self.environment != TradingEnvironment.LIVE else 'PENDING'
         }
 
+        order = route_to_exchange(self.exchange, order, signal, signal['symbol'], signal['action'],
+                                  self.risk_engine, self.account_id)
         logger.info(f"📤 {self.name}: Executed {signal['action']} on {signal['symbol']}")
         return order
 
@@ -355,8 +491,12 @@ class CryptoBot:
 class USDCryptoPairsBot:
     """Bot specifically for USD cryptocurrency pairs (BTC/USD, ETH/USD, etc.)"""
 
-    def __init__(self, environment: TradingEnvironment):
+    def __init__(self, environment: TradingEnvironment, exchange: Optional[ExchangeSimulator] = None,
+                 risk_engine: Optional[RiskEngine] = None, account_id: Optional[str] = None):
         self.environment = environment
+        self.exchange = exchange
+        self.risk_engine = risk_engine
+        self.account_id = account_id
         self.name = f"USDCryptoPairsBot-{environment.value}"
         self.pairs = ['BTC/USD', 'ETH/USD', 'SOL/USD', 'ADA/USD', 'DOT/USD', 'LINK/USD']
         logger.info(f"✅ {self.name} initialized - Trading {len(self.pairs)} USD pairs")
@@ -372,6 +512,7 @@ class USDCryptoPairsBot:
             'asset_class': 'USD_CRYPTO_PAIRS',
             'environment': self.environment.value,
             'timestamp': datetime.now().isoformat(),
+            'price': reference_price(data),
             'confidence': 0.0,
             'reasons': []
         }
@@ -424,6 +565,8 @@ class USDCryptoPairsBot:
             'status': 'SIMULATED' if self.environment != TradingEnvironment.LIVE else 'PENDING'
         }
 
+        order = route_to_exchange(self.exchange, order, signal, signal['pair'], signal['action'],
+                                  self.risk_engine, self.account_id)
         logger.info(f"📤 {self.name}: Executed {signal['action']} on {signal['pair']}")
         return order
 
@@ -431,8 +574,12 @@ class USDCryptoPairsBot:
 class USIndicesBot:
     """Bot for US stock indices (SPY, QQQ, DIA, IWM)"""
 
-    def __init__(self, environment: TradingEnvironment):
+    def __init__(self, environment: TradingEnvironment, exchange: Optional[ExchangeSimulator] = None,
+                 risk_engine: Optional[RiskEngine] = None, account_id: Optional[str] = None):
         self.environment = environment
+        self.exchange = exchange
+        self.risk_engine = risk_engine
+        self.account_id = account_id
         self.name = f"USIndicesBot-{environment.value}"
         self.indices = {
             'SPY': 'S&P 500 ETF',
@@ -459,6 +606,7 @@ class USIndicesBot:
             'asset_class': 'US_INDICES',
             'environment': self.environment.value,
             'timestamp': datetime.now().isoformat(),
+            'price': reference_price(data),
             'confidence': 0.0,
             'reasons': []
         }
@@ -511,6 +659,8 @@ class USIndicesBot:
             'status': 'SIMULATED' if self.environment != TradingEnvironment.LIVE else 'PENDING'
         }
 
+        order = route_to_exchange(self.exchange, order, signal, signal['symbol'], signal['action'],
+                                  self.risk_engine, self.account_id)
         logger.info(f"📤 {self.name}: Executed {signal['action']} on {signal['symbol']}")
         return order
 
@@ -518,8 +668,25 @@ class USIndicesBot:
 class MultiAssetOrchestrator:
     """Orchestrates all trading bots across all asset classes"""
 
-    def __init__(self):
+    def __init__(self, use_exchange_simulator: bool = False, risk_engine: Optional[RiskEngine] = None,
+                 capital: float = 100_000.0, risk_profile: str = 'novice'):
+        """
+        Args:
+            use_exchange_simulator: Route PAPER / SANDBOX orders through a local
+                ExchangeSimulator per environment instead of stamping 'SIMULATED'
+            risk_engine: Sizes simulator orders (default: a RiskEngine with one
+                account per environment)
+            capital: Equity of each environment's account
+            risk_profile: Risk profile of each environment's account
+        """
         self.bots = {}
+        self.exchanges: Dict[str, ExchangeSimulator] = {}
+        self.use_exchange_simulator = use_exchange_simulator
+        self.risk_engine = risk_engine
+        if use_exchange_simulator and self.risk_engine is None:
+            self.risk_engine = RiskEngine()
+        self.capital = capital
+        self.risk_profile = risk_profile
         self.initialize_all_bots()
 
     def initialize_all_bots(self):
@@ -528,23 +695,76 @@ class MultiAssetOrchestrator:
         logger.info("🚀 INITIALIZING MULTI-ASSET TRADING SYSTEM")
         logger.info("=" * 70)
 
+        # Option surfaces depend only on market data, so both environments share the cache
+        options_analytics = OptionsAnalytics()
+
         for env in [TradingEnvironment.PAPER, TradingEnvironment.SANDBOX]:
+            exchange = None
+            account_id = None
+            if self.use_exchange_simulator:
+                exchange = self.exchanges[env.value] = ExchangeSimulator()
+                account_id = self.account_id(env.value)
+                if account_id not in self.risk_engine.accounts:
+                    self.risk_engine.register_account(account_id, self.risk_profile, self.capital)
+            routing = (exchange, self.risk_engine, account_id)
+
             self.bots[env.value] = {
-                'shorting': ShortingBot(env),
-                'options': OptionsBot(env),
-                'forex': ForexBot(env),
-                'crypto': CryptoBot(env),
-                'usd_crypto_pairs': USDCryptoPairsBot(env),
-                'us_indices': USIndicesBot(env)
+                'shorting': ShortingBot(env, *routing),
+                'options': OptionsBot(env, options_analytics),
+                'forex': ForexBot(env, *routing),
+                'crypto': CryptoBot(env, *routing),
+                'usd_crypto_pairs': USDCryptoPairsBot(env, *routing),
+                'us_indices': USIndicesBot(env, *routing)
             }
 
         logger.info(f"✅ Initialized {len(self.bots) * 6} bots across 2 environments")
         logger.info("=" * 70)
 
+    @staticmethod
+    def account_id(environment: str) -> str:
+        """Risk-engine account that sizes an environment's simulator orders"""
+        return f"multi-asset-{environment}"
+
+    def get_exchange(self, environment: str) -> Optional[ExchangeSimulator]:
+        """Exchange simulator backing an environment (None unless enabled)"""
+        return self.exchanges.get(environment)
+
     def get_bot(self, asset_class: str, environment: str):
         """Get specific bot by asset class and environment"""
         return self.bots.get(environment, {}).get(asset_class)
 
+    def scan(self, asset_class: str, snapshot: Dict[str, Any],
+             environments: Optional[List[str]] = None) -> Dict[str, List[Dict]]:
+        """
+        Evaluate every symbol of an asset class in one vectorized pass
+
+        PAPER and SANDBOX bots run identical rules, so the snapshot is scored
+        once and the actionable signals are stamped for each environment.
+
+        Args:
+            asset_class: Bot key ('shorting', 'options', 'forex', ...)
+            snapshot: Columnar market data - {'symbol' or 'pair': [...], field: [...]}
+            environments: Environments to emit signals for (default: all)
+
+        Returns:
+            {environment: [actionable signals]}
+        """
+        kwargs = {}
+        if asset_class == 'us_indices':
+            kwargs['names'] = self.get_bot(asset_class, TradingEnvironment.PAPER.value).indices
+
+        signals = scan_snapshot(asset_class, snapshot, **kwargs)
+
+        results = {}
+        for env in environments or list(self.bots):
+            results[env] = [dict(signal, environment=env, reasons=list(signal['reasons']))
+                            for signal in signals]
+
+        key = 'pair' if 'pair' in snapshot else 'symbol'
+        logger.info(f"🔎 Scanned {len(snapshot.get(key, []))} {asset_class} symbols: "
+                    f"{len(signals)} actionable")
+        return results
+
     def get_all_active_bots(self) -> List[Dict]:
         """Get status of all active bots"""
         active_bots = []
@@ -29,14 +29,18 @@ FREE DATA SOURCES:
 """
 
 import os
+import sys
 import json
-import requests
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 import time
 
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'core-systems' / 'api-connectors'))
+
+from http_transport import get_transport
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('FreeDataAggregator')
 
@@ -46,6 +50,7 @@ class FreeDataAggregator:
 
     def __init__(self):
         self.api_keys = self._load_api_keys()
+        self.transport = get_transport()   # pooled keep-alive clients, one per data source host
         self.data_cache = {}
         self.last_update = {}
         logger.info("=" * 70)
@@ -157,12 +162,12 @@ class FreeDataAggregator:
 
             # Get real-time quote
             url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={symbol}&apikey={key}"
-            response = requests.get(url, timeout=10)
+            response = self.transport.get(url)
             quote_data = response.json()
 
             # Get technical indicators (SMA, RSI, etc.)
             indicators_url = f"https://www.alphavantage.co/query?function=RSI&symbol={symbol}&interval=daily&time_period=14&series_type=close&apikey={key}"
-            indicators_response = requests.get(indicators_url, timeout=10)
+            indicators_response = self.transport.get(indicators_url)
             indicators_data = indicators_response.json()
 
             return {
@@ -181,12 +186,12 @@ class FreeDataAggregator:
         try:
             # Yahoo Finance has free endpoints
             url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
-            response = requests.get(url, timeout=10)
+            response = self.transport.get(url)
             data = response.json()
 
             # Get quote summary
             quote_url = f"https://query1.finance.yahoo.com/v7/finance/quote?symbols={symbol}"
-            quote_response = requests.get(quote_url, timeout=10)
+            quote_response = self.transport.get(quote_url)
             quote_data = quote_response.json()
 
             return {
@@ -221,12 +226,12 @@ class FreeDataAggregator:
 
             # Get comprehensive crypto data
             url = f"https://api.coingecko.com/api/v3/coins/{coin_id}"
-            response = requests.get(url, timeout=10)
+            response = self.transport.get(url)
             data = response.json()
 
             # Get market data
             market_url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart?vs_currency=usd&days=7"
-            market_response = requests.get(market_url, timeout=10)
+            market_response = self.transport.get(market_url)
             market_data = market_response.json()
 
             return {
@@ -259,12 +264,12 @@ class FreeDataAggregator:
 
             # Real-time quote
             url = f"https://finnhub.io/api/v1/quote?symbol={symbol}&token={key}"
-            response = requests.get(url, timeout=10)
+            response = self.transport.get(url)
             quote = response.json()
 
             # News sentiment
             news_url = f"https://finnhub.io/api/v1/company-news?symbol={symbol}&from={datetime.now() - timedelta(days=7)}&to={datetime.now()}&token={key}"
-            news_response = requests.get(news_url, timeout=10)
+            news_response = self.transport.get(news_url)
             news = news_response.json()
 
             return {
@@ -296,7 +301,7 @@ class FreeDataAggregator:
 
             for name, url in indicators.items():
                 try:
-                    response = requests.get(url, timeout=10)
+                    response = self.transport.get(url)
                     # Parse CSV and get latest value
                     lines = response.text.strip().split('\n')
                     if len(lines) > 1:
@@ -335,7 +340,7 @@ class FreeDataAggregator:
             # Use pushshift.io (FREE Reddit API)
             reddit_url = f"https://api.pushshift.io/reddit/search/submission/?q={symbol}&subreddit=wallstreetbets&size=100"
             try:
-                reddit_response = requests.get(reddit_url, timeout=10)
+                reddit_response = self.transport.get(reddit_url)
                 reddit_data = reddit_response.json()
                 sentiment['reddit_mentions'] = len(reddit_data.get('data', []))
             except:
@@ -374,7 +379,7 @@ class FreeDataAggregator:
 
             # Get news articles about symbol
             url = f"https://newsapi.org/v2/everything?q={symbol}&language=en&sortBy=publishedAt&apiKey={key}"
-            response = requests.get(url, timeout=10)
+            response = self.transport.get(url)
             data = response.json()
 
             articles = data.get('articles', [])[:20]  # Top 20 articles
@@ -434,17 +439,17 @@ class FreeDataAggregator:
 
             # RSI
             rsi_url = f"https://api.twelvedata.com/rsi?symbol={symbol}&interval=1day&apikey={key}"
-            rsi_response = requests.get(rsi_url, timeout=10)
+            rsi_response = self.transport.get(rsi_url)
             indicators['rsi'] = rsi_response.json()
 
             # MACD
             macd_url = f"https://api.twelvedata.com/macd?symbol={symbol}&interval=1day&apikey={key}"
-            macd_response = requests.get(macd_url, timeout=10)
+            macd_response = self.transport.get(macd_url)
             indicators['macd'] = macd_response.json()
 
             # SMA
             sma_url = f"https://api.twelvedata.com/sma?symbol={symbol}&interval=1day&time_period=20&apikey={key}"
-            sma_response = requests.get(sma_url, timeout=10)
+            sma_response = self.transport.get(sma_url)
             indicators['sma_20'] = sma_response.json()
 
             return {
@@ -471,7 +476,7 @@ class FreeDataAggregator:
 
             for symbol, name in indices.items():
                 url = f"https://query1.finance.yahoo.com/v7/finance/quote?symbols={symbol}"
-                response = requests.get(url, timeout=10)
+                response = self.transport.get(url)
                 data = response.json()
                 quote = data.get('quoteResponse', {}).get('result', [{}])[0]
 
@@ -9,9 +9,11 @@ import os
 import json
 import logging
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable
 from pathlib import Path
 
+import numpy as np
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('MT5Connector')
 
@@ -22,19 +24,23 @@ class MT5Connector:
 
     NOTE: Requires MetaTrader5 Python library
     Install with: pip install MetaTrader5
+    (or pass mt5_module=mt5_stub to run against the pure-Python stand-in)
     """
 
-    def __init__(self, account_type: str = "demo"):
+    def __init__(self, account_type: str = "demo", mt5_module=None):
         """
         Initialize MT5 connector
 
         Args:
             account_type: "demo" or "live"
+            mt5_module: MetaTrader5-compatible module to use instead of importing MetaTrader5
         """
         self.account_type = account_type
         self.connected = False
-        self.mt5 = None
+        self.mt5 = mt5_module
         self.account_info = {}
+        # (symbol, timeframe) -> open time of the last bar returned by get_new_bars
+        self.last_bar_time: Dict[tuple, int] = {}
 
         # Load credentials
         self.login = int(os.getenv('MT5_LOGIN', '0'))
@@ -47,13 +53,14 @@ class MT5Connector:
         """Connect to MT5 terminal"""
         try:
             # Try to import MT5 library
-            try:
-                import MetaTrader5 as mt5
-                self.mt5 = mt5
-            except ImportError:
-                logger.error("❌ MetaTrader5 library not installed")
-                logger.info("   Install with: pip install MetaTrader5")
-                return False
+            if self.mt5 is None:
+                try:
+                    import MetaTrader5 as mt5
+                    self.mt5 = mt5
+                except ImportError:
+                    logger.error("❌ MetaTrader5 library not installed")
+                    logger.info("   Install with: pip install MetaTrader5")
+                    return False
 
             # Initialize MT5
             if not self.mt5.initialize():
@@ -166,11 +173,28 @@ class MT5Connector:
             symbol: Trading symbol (e.g., "EURUSD", "BTCUSD")
             timeframe: Timeframe (M1, M5, M15, M30, H1, H4, D1, W1, MN1)
             bars: Number of bars to retrieve
+
+        Builds one dict per bar; prefer get_rates() for large pulls.
         """
-        if not self.connected or not self.mt5:
+        rates = self.get_rates(symbol, timeframe, bars)
+        if rates is None:
             return None
 
-        # Map timeframe string to MT5 constant
+        candles = []
+        for rate in rates:
+            candles.append({
+                'time': datetime.fromtimestamp(rate['time']).isoformat(),
+                'open': rate['open'],
+                'high': rate['high'],
+                'low': rate['low'],
+                'close': rate['close'],
+                'volume': rate['tick_volume']
+            })
+
+        return candles
+
+    def _timeframe(self, timeframe: str) -> int:
+        """Map timeframe string to MT5 constant"""
         timeframe_map = {
             'M1': self.mt5.TIMEFRAME_M1,
             'M5': self.mt5.TIMEFRAME_M5,
@@ -182,26 +206,94 @@ class MT5Connector:
             'W1': self.mt5.TIMEFRAME_W1,
             'MN1': self.mt5.TIMEFRAME_MN1
         }
+        return timeframe_map.get(timeframe, self.mt5.TIMEFRAME_H1)
 
-        tf = timeframe_map.get(timeframe, self.mt5.TIMEFRAME_H1)
+    def get_rates(self, symbol: str, timeframe: str = "H1", bars: int = 100) -> Optional[np.ndarray]:
+        """
+        Get historical bars as MT5's native structured array
+
+        Fields: time (epoch seconds), open, high, low, close, tick_volume,
+        spread, real_volume. No per-bar objects are created; use
+        rates_to_columns() for named column views.
+        """
+        if not self.connected or not self.mt5:
+            return None
 
-        rates = self.mt5.copy_rates_from_pos(symbol, tf, 0, bars)
+        rates = self.mt5.copy_rates_from_pos(symbol, self._timeframe(timeframe), 0, bars)
         if rates is None:
             logger.error(f"Failed to get data for {symbol}")
             return None
 
-        candles = []
-        for rate in rates:
-            candles.append({
-                'time': datetime.fromtimestamp(rate['time']).isoformat(),
-                'open': rate['open'],
-                'high': rate['high'],
-                'low': rate['low'],
-                'close': rate['close'],
-                'volume': rate['tick_volume']
-            })
+        return rates
 
-        return candles
+    def get_rates_batch(self, symbols: Iterable[str], timeframe: str = "H1",
+                        bars: int = 100) -> Dict[str, np.ndarray]:
+        """
+        Get bars for several symbols in one call
+
+        Returns:
+            {symbol: structured rates array}; symbols that fail are omitted
+        """
+        batch = {}
+        for symbol in symbols:
+            rates = self.get_rates(symbol, timeframe, bars)
+            if rates is not None:
+                batch[symbol] = rates
+        return batch
+
+    def get_new_bars(self, symbol: str, timeframe: str = "H1", bars: int = 100) -> Optional[np.ndarray]:
+        """
+        Incremental pull: bars opened since the previous call for this symbol / timeframe
+
+        The first call returns the latest `bars` bars. Later calls return the
+        last previously returned bar again (it may still have been forming)
+        plus every bar opened after it.
+        """
+        if not self.connected or not self.mt5:
+            return None
+
+        key = (symbol, timeframe)
+        last_time = self.last_bar_time.get(key)
+        if last_time is None:
+            rates = self.get_rates(symbol, timeframe, bars)
+        else:
+            # Bar times are broker server time written as epoch seconds, so no wall-clock
+            # bound is safe: count back from the newest bar until last_time is covered
+            count = bars
+            while True:
+                rates = self.mt5.copy_rates_from_pos(symbol, self._timeframe(timeframe), 0, count)
+                if rates is None:
+                    logger.error(f"Failed to get new bars for {symbol}")
+                    return None
+                if len(rates) < count or not len(rates) or rates['time'][0] <= last_time:
+                    break
+                count *= 2
+            rates = rates[rates['time'] >= last_time]
+
+        if rates is not None and len(rates):
+            self.last_bar_time[key] = int(rates['time'][-1])
+        return rates
+
+    def get_new_bars_batch(self, symbols: Iterable[str], timeframe: str = "H1",
+                           bars: int = 100) -> Dict[str, np.ndarray]:
+        """Incremental pull for several symbols (see get_new_bars)"""
+        batch = {}
+        for symbol in symbols:
+            rates = self.get_new_bars(symbol, timeframe, bars)
+            if rates is not None:
+                batch[symbol] = rates
+        return batch
+
+    @staticmethod
+    def rates_to_columns(rates: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Named column views of a rates array (no copies)
+
+        'volume' aliases tick_volume to match get_market_data candles.
+        """
+        columns = {name: rates[name] for name in rates.dtype.names}
+        columns['volume'] = rates['tick_volume']
+        return columns
 
     def place_order(self, symbol: str, order_type: str, volume: float,
                    price: float = None, sl: float = None, tp: float = None,
@@ -276,23 +368,24 @@ class MT5Connector:
         if positions is None:
             return []
 
-        result = []
-        for pos in positions:
-            result.append({
-                'ticket': pos.ticket,
-                'symbol': pos.symbol,
-                'type': 'BUY' if pos.type == 0 else 'SELL',
-                'volume': pos.volume,
-                'price_open': pos.price_open,
-                'price_current': pos.price_current,
-                'profit': pos.profit,
-                'sl': pos.sl,
-                'tp': pos.tp,
-                'time': datetime.fromtimestamp(pos.time).isoformat(),
-                'comment': pos.comment
-            })
+        return [self.position_to_dict(pos) for pos in positions]
 
-        return result
+    @staticmethod
+    def position_to_dict(pos) -> Dict:
+        """Convert an MT5 TradePosition record to a dict"""
+        return {
+            'ticket': pos.ticket,
+            'symbol': pos.symbol,
+            'type': 'BUY' if pos.type == 0 else 'SELL',
+            'volume': pos.volume,
+            'price_open': pos.price_open,
+            'price_current': pos.price_current,
+            'profit': pos.profit,
+            'sl': pos.sl,
+            'tp': pos.tp,
+            'time': datetime.fromtimestamp(pos.time).isoformat(),
+            'comment': pos.comment
+        }
 
     def close_position(self, ticket: int) -> bool:
         """Close an open position by ticket"""
@@ -344,34 +437,42 @@ class MT5Connector:
         if deals is None:
             return []
 
-        result = []
-        for deal in deals:
-            result.append({
-                'ticket': deal.ticket,
-                'order': deal.order,
-                'symbol': deal.symbol,
-                'type': 'BUY' if deal.type == 0 else 'SELL',
-                'volume': deal.volume,
-                'price': deal.price,
-                'profit': deal.profit,
-                'commission': deal.commission,
-                'swap': deal.swap,
-                'time': datetime.fromtimestamp(deal.time).isoformat(),
-                'comment': deal.comment
-            })
+        return [self.deal_to_dict(deal) for deal in deals]
 
-        return result
+    @staticmethod
+    def deal_to_dict(deal) -> Dict:
+        """Convert an MT5 TradeDeal record to a dict"""
+        return {
+            'ticket': deal.ticket,
+            'order': deal.order,
+            'symbol': deal.symbol,
+            'type': 'BUY' if deal.type == 0 else 'SELL',
+            'volume': deal.volume,
+            'price': deal.price,
+            'profit': deal.profit,
+            'commission': deal.commission,
+            'swap': deal.swap,
+            'time': datetime.fromtimestamp(deal.time).isoformat(),
+            'comment': deal.comment
+        }
 
 
 class MT5TradingBot:
     """Trading bot that integrates Agent X2.0 with MT5"""
 
-    def __init__(self, account_type: str = "demo"):
-        self.connector = MT5Connector(account_type)
+    def __init__(self, account_type: str = "demo", mt5_module=None):
+        self.connector = MT5Connector(account_type, mt5_module)
+        self.stream = None
         self.active = False
 
-    def start(self):
-        """Start the MT5 trading bot"""
+    def start(self, stream_symbols: Optional[List[str]] = None):
+        """
+        Start the MT5 trading bot
+
+        Args:
+            stream_symbols: Symbols to stream ticks for; also enables the
+                background position / deal cache (see mt5_stream.MT5Stream)
+        """
         logger.info("=" * 70)
         logger.info("🚀 STARTING MT5 TRADING BOT")
         logger.info("=" * 70)
@@ -379,6 +480,10 @@ class MT5TradingBot:
         # Connect to MT5
         if self.connector.connect():
             self.active = True
+            if stream_symbols:
+                from mt5_stream import MT5Stream
+                self.stream = MT5Stream(self.connector, stream_symbols)
+                self.stream.start()
             logger.info("✅ MT5 Trading Bot is ACTIVE")
             logger.info("=" * 70)
 
@@ -397,7 +502,7 @@ class MT5TradingBot:
     def show_account_status(self):
         """Display account status"""
         info = self.connector.account_info
-        positions = self.connector.get_open_positions()
+        positions = self.stream.get_positions() if self.stream else self.connector.get_open_positions()
 
         print("\n📊 ACCOUNT STATUS")
         print("=" * 70)
@@ -419,6 +524,9 @@ class MT5TradingBot:
     def stop(self):
         """Stop the MT5 trading bot"""
         self.active = False
+        if self.stream:
+            self.stream.stop()
+            self.stream = None
         self.connector.disconnect()
         logger.info("🛑 MT5 Trading Bot stopped")
 
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+MT5 Streaming Cache
+Background polling of ticks, positions and deals with a local state cache
+
+A worker thread polls the terminal on a tight interval and keeps the latest
+ticks, symbol info, open positions and recent deals in memory. Only records
+that changed since the previous poll are converted to dicts and pushed to
+subscribers, so strategy code reads state locally instead of making a
+terminal round trip (and rebuilding every dict) per call.
+
+Events delivered to subscribers as callback(event, payload):
+    tick               {'symbol', 'bid', 'ask', 'last', 'volume', 'time', 'time_msc'}
+    position_opened    position dict (MT5Connector.position_to_dict)
+    position_updated   position dict
+    position_closed    last known position dict
+    deal               deal dict (MT5Connector.deal_to_dict)
+"""
+
+import threading
+import time
+import logging
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Optional, Callable, Iterable
+
+from mt5_connector import MT5Connector
+
+# Deal times are broker server time (up to UTC+14) written as epoch seconds,
+# so the upper query bound must sit past any server clock
+SERVER_TIME_MARGIN = timedelta(days=1)
+
+logger = logging.getLogger('MT5Stream')
+
+EVENTS = ('tick', 'position_opened', 'position_updated', 'position_closed', 'deal')
+
+
+class MT5Stream:
+    """Polls an MT5Connector in the background and caches terminal state"""
+
+    def __init__(self, connector: MT5Connector, symbols: Iterable[str],
+                 tick_interval: float = 0.1, position_interval: float = 0.5,
+                 deal_lookback_hours: float = 24, max_deals: int = 500):
+        """
+        Args:
+            connector: Connected MT5Connector
+            symbols: Symbols to stream ticks for
+            tick_interval: Seconds between tick polls
+            position_interval: Seconds between position / deal polls
+            deal_lookback_hours: History loaded into the deal cache on start
+            max_deals: Recent deals kept in memory
+        """
+        self.connector = connector
+        self.symbols = list(symbols)
+        self.tick_interval = tick_interval
+        self.position_interval = position_interval
+        self.deal_lookback_hours = deal_lookback_hours
+
+        self.ticks: Dict[str, Dict[str, Any]] = {}
+        self.symbol_info: Dict[str, Dict[str, Any]] = {}
+        self.positions: Dict[int, Dict[str, Any]] = {}
+        self.deals = deque(maxlen=max_deals)
+
+        self._raw_ticks: Dict[str, tuple] = {}
+        self._raw_positions: Dict[int, tuple] = {}
+        self._seen_deals: Dict[int, int] = {}   # ticket -> deal time, pruned below _deals_since
+        self._deals_since: Optional[datetime] = None
+        self._next_position_poll = 0.0
+
+        self.subscribers: List[tuple] = []
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self.stats = {'polls': 0, 'events': 0, 'errors': 0}
+
+    # ------------------------------------------------------------ lifecycle
+
+    def start(self) -> bool:
+        """Load symbol info and start the background worker"""
+        if not self.connector.connected:
+            logger.error("❌ MT5Stream requires a connected MT5Connector")
+            return False
+        if self.running:
+            return True
+
+        for symbol in self.symbols:
+            info = self.connector.get_symbol_info(symbol)
+            if info is not None:
+                self.symbol_info[symbol] = info
+        self._deals_since = datetime.now(timezone.utc) - timedelta(hours=self.deal_lookback_hours)
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='MT5Stream', daemon=True)
+        self.thread.start()
+        logger.info(f"📡 MT5Stream started - {len(self.symbols)} symbols, "
+                    f"ticks every {self.tick_interval * 1000:.0f}ms")
+        return True
+
+    def stop(self):
+        """Stop the background worker"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=max(self.tick_interval, self.position_interval) * 5)
+            self.thread = None
+        logger.info("🛑 MT5Stream stopped")
+
+    def _run(self):
+        while self.running:
+            started = time.monotonic()
+            try:
+                self.poll_once()
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"❌ MT5Stream poll error: {e}")
+            time.sleep(max(0.0, self.tick_interval - (time.monotonic() - started)))
+
+    # ------------------------------------------------------------- polling
+
+    def poll_once(self):
+        """One polling pass: ticks every call, positions / deals on their own interval"""
+        self.stats['polls'] += 1
+        events = self._poll_ticks()
+
+        now = time.monotonic()
+        if now >= self._next_position_poll:
+            self._next_position_poll = now + self.position_interval
+            events += self._poll_positions()
+            events += self._poll_deals()
+
+        for event, payload in events:
+            self._publish(event, payload)
+
+    def _poll_ticks(self) -> List[tuple]:
+        mt5 = self.connector.mt5
+        events = []
+        for symbol in self.symbols:
+            tick = mt5.symbol_info_tick(symbol)
+            if tick is None:
+                continue
+            raw = (tick.time_msc, tick.bid, tick.ask, tick.last, tick.volume)
+            if self._raw_ticks.get(symbol) == raw:
+                continue
+
+            self._raw_ticks[symbol] = raw
+            entry = {
+                'symbol': symbol,
+                'bid': tick.bid,
+                'ask': tick.ask,
+                'last': tick.last,
+                'volume': tick.volume,
+                'time': tick.time,
+                'time_msc': tick.time_msc
+            }
+            with self.lock:
+                self.ticks[symbol] = entry
+                info = self.symbol_info.get(symbol)
+                if info is not None:
+                    info['bid'], info['ask'] = tick.bid, tick.ask
+            events.append(('tick', entry))
+        return events
+
+    def _poll_positions(self) -> List[tuple]:
+        positions = self.connector.mt5.positions_get()
+        if positions is None:
+            return []
+
+        events = []
+        current = {}
+        with self.lock:
+            for pos in positions:
+                current[pos.ticket] = pos
+                previous = self._raw_positions.get(pos.ticket)
+                if previous == pos:
+                    continue
+                entry = MT5Connector.position_to_dict(pos)
+                self.positions[pos.ticket] = entry
+                events.append(('position_opened' if previous is None else 'position_updated', entry))
+
+            for ticket in self._raw_positions.keys() - current.keys():
+                events.append(('position_closed', self.positions.pop(ticket)))
+            self._raw_positions = current
+        return events
+
+    def _poll_deals(self) -> List[tuple]:
+        date_to = datetime.now(timezone.utc) + SERVER_TIME_MARGIN
+        deals = self.connector.mt5.history_deals_get(self._deals_since, date_to)
+        if deals is None:
+            return []
+
+        events = []
+        newest = None
+        with self.lock:
+            for deal in deals:
+                if deal.ticket in self._seen_deals:
+                    continue
+                self._seen_deals[deal.ticket] = deal.time
+                entry = MT5Connector.deal_to_dict(deal)
+                self.deals.append(entry)
+                events.append(('deal', entry))
+                newest = deal.time if newest is None else max(newest, deal.time)
+
+            if newest is not None:
+                # Re-query from the newest deal's second so same-second deals are not missed
+                self._deals_since = datetime.fromtimestamp(newest, timezone.utc)
+                # Older deals are never queried again, so only the newest second needs dedup
+                self._seen_deals = {ticket: when for ticket, when in self._seen_deals.items() if when >= newest}
+        return events
+
+    # --------------------------------------------------------- subscribers
+
+    def subscribe(self, callback: Callable[[str, Dict[str, Any]], None],
+                  events: Optional[Iterable[str]] = None):
+        """
+        Register a callback for state changes
+
+        Args:
+            callback: Called as callback(event, payload) on the worker thread
+            events: Event names to receive (default: all)
+        """
+        wanted = frozenset(events) if events is not None else frozenset(EVENTS)
+        self.subscribers.append((callback, wanted))
+
+    def unsubscribe(self, callback: Callable):
+        self.subscribers = [(cb, ev) for cb, ev in self.subscribers if cb is not callback]
+
+    def _publish(self, event: str, payload: Dict[str, Any]):
+        self.stats['events'] += 1
+        for callback, wanted in self.subscribers:
+            if event not in wanted:
+                continue
+            try:
+                callback(event, payload)
+            except Exception as e:
+                logger.error(f"❌ MT5Stream subscriber error on {event}: {e}")
+
+    # ------------------------------------------------------------- readers
+
+    def get_tick(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return self.ticks.get(symbol)
+
+    def get_symbol_info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return self.symbol_info.get(symbol)
+
+    def get_positions(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self.lock:
+            positions = list(self.positions.values())
+        if symbol is not None:
+            positions = [p for p in positions if p['symbol'] == symbol]
+        return positions
+
+    def get_position(self, ticket: int) -> Optional[Dict[str, Any]]:
+        return self.positions.get(ticket)
+
+    def get_recent_deals(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self.lock:
+            deals = list(self.deals)
+        return deals[-limit:] if limit else deals
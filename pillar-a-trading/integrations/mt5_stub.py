@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+MetaTrader5 Stand-in
+Pure-Python replacement for the Windows-only MetaTrader5 module
+
+Implements the subset of the MetaTrader5 API used by MT5Connector with the
+same call signatures and return types (structured NumPy rate arrays, named
+tuples for account / symbol / tick / position / deal records), so the
+connector can run and be tested on Linux:
+
+    import mt5_stub
+    connector = MT5Connector(mt5_module=mt5_stub)
+
+Prices are a deterministic function of (symbol, timeframe, bar index), so
+any window of history can be generated directly without storing a series,
+and repeated or incremental pulls agree with each other.
+"""
+
+import time
+from collections import namedtuple
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+# Timeframe constants (values match the MetaTrader5 module)
+TIMEFRAME_M1 = 1
+TIMEFRAME_M5 = 5
+TIMEFRAME_M15 = 15
+TIMEFRAME_M30 = 30
+TIMEFRAME_H1 = 16385
+TIMEFRAME_H4 = 16388
+TIMEFRAME_D1 = 16408
+TIMEFRAME_W1 = 32769
+TIMEFRAME_MN1 = 49153
+
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+TRADE_ACTION_DEAL = 1
+ORDER_TIME_GTC = 0
+ORDER_FILLING_IOC = 1
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_INVALID = 10013
+
+TIMEFRAME_SECONDS = {
+    TIMEFRAME_M1: 60,
+    TIMEFRAME_M5: 300,
+    TIMEFRAME_M15: 900,
+    TIMEFRAME_M30: 1800,
+    TIMEFRAME_H1: 3600,
+    TIMEFRAME_H4: 14400,
+    TIMEFRAME_D1: 86400,
+    TIMEFRAME_W1: 604800,
+    TIMEFRAME_MN1: 2592000,  # 30-day months
+}
+
+RATE_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8')
+])
+
+AccountInfo = namedtuple('AccountInfo', [
+    'login', 'server', 'balance', 'equity', 'margin', 'margin_free', 'margin_level', 'profit',
+    'currency', 'leverage', 'trade_mode', 'limit_orders', 'margin_so_call', 'margin_so_so'
+])
+SymbolInfo = namedtuple('SymbolInfo', [
+    'name', 'description', 'currency_base', 'currency_profit', 'currency_margin', 'digits',
+    'trade_contract_size', 'trade_mode', 'volume_min', 'volume_max', 'volume_step', 'spread',
+    'bid', 'ask'
+])
+Tick = namedtuple('Tick', ['time', 'bid', 'ask', 'last', 'volume', 'time_msc'])
+TradePosition = namedtuple('TradePosition', [
+    'ticket', 'time', 'type', 'magic', 'volume', 'price_open', 'sl', 'tp', 'price_current',
+    'swap', 'profit', 'symbol', 'comment'
+])
+TradeDeal = namedtuple('TradeDeal', [
+    'ticket', 'order', 'time', 'type', 'position_id', 'volume', 'price', 'commission', 'swap',
+    'profit', 'symbol', 'comment'
+])
+OrderSendResult = namedtuple('OrderSendResult', [
+    'retcode', 'deal', 'order', 'volume', 'price', 'bid', 'ask', 'comment', 'request'
+])
+
+# name: (base price, digits, contract size, spread in points, description)
+SYMBOLS = {
+    'EURUSD': (1.0850, 5, 100000, 12, 'Euro vs US Dollar'),
+    'GBPUSD': (1.2700, 5, 100000, 15, 'Great Britain Pound vs US Dollar'),
+    'USDJPY': (150.00, 3, 100000, 14, 'US Dollar vs Japanese Yen'),
+    'USDCHF': (0.8800, 5, 100000, 16, 'US Dollar vs Swiss Franc'),
+    'AUDUSD': (0.6600, 5, 100000, 14, 'Australian Dollar vs US Dollar'),
+    'BTCUSD': (65000.0, 2, 1, 2500, 'Bitcoin vs US Dollar'),
+    'ETHUSD': (3200.0, 2, 1, 150, 'Ethereum vs US Dollar'),
+    'XAUUSD': (2300.0, 2, 100, 30, 'Gold vs US Dollar'),
+}
+
+_state = {
+    'initialized': False,
+    'login': 0,
+    'server': '',
+    'balance': 10000.0,
+    'last_error': (1, 'Success'),
+    'next_ticket': 1,
+    'positions': {},
+    'deals': [],
+}
+
+
+# ---------------------------------------------------------------- terminal
+
+def initialize(*args, **kwargs) -> bool:
+    _state['initialized'] = True
+    _state['last_error'] = (1, 'Success')
+    return True
+
+
+def login(login: int, password: str = '', server: str = '', timeout: int = 60000) -> bool:
+    if not _state['initialized']:
+        _state['last_error'] = (-10004, 'No IPC connection')
+        return False
+    _state['login'] = login
+    _state['server'] = server
+    return True
+
+
+def shutdown() -> None:
+    _state['initialized'] = False
+
+
+def last_error():
+    return _state['last_error']
+
+
+def reset(balance: float = 10000.0) -> None:
+    """Clear positions, deals and balance (stand-in only)"""
+    _state.update({'balance': balance, 'next_ticket': 1, 'positions': {}, 'deals': []})
+
+
+# ------------------------------------------------------------ price model
+
+def _bar_prices(symbol: str, seconds: int, index: np.ndarray) -> np.ndarray:
+    """Deterministic close price for bar indices (bar time = index * seconds)"""
+    base = SYMBOLS[symbol][0]
+    seed = sum(ord(c) for c in symbol)
+    t = index.astype(float) * seconds / 3600.0  # hours since epoch
+    # Integer hash noise keeps every bar independent of how much history is requested
+    noise = ((index.astype(np.uint64) * np.uint64(2654435761) + np.uint64(seed)) % np.uint64(2 ** 32))
+    noise = noise.astype(float) / 2 ** 32 - 0.5
+    drift = 0.02 * np.sin(t / 500.0 + seed) + 0.006 * np.sin(t / 37.0 + 2 * seed)
+    return base * np.exp(drift + 0.002 * noise * np.sqrt(seconds / 3600.0))
+
+
+def _rates(symbol: str, timeframe: int, first_index: int, count: int) -> Optional[np.ndarray]:
+    if not _state['initialized']:
+        _state['last_error'] = (-10004, 'No IPC connection')
+        return None
+    if symbol not in SYMBOLS or timeframe not in TIMEFRAME_SECONDS:
+        _state['last_error'] = (-2, 'Invalid params')
+        return None
+
+    seconds = TIMEFRAME_SECONDS[timeframe]
+    count = max(count, 0)
+    index = np.arange(first_index, first_index + count, dtype=np.int64)
+    close = _bar_prices(symbol, seconds, index)
+    open_ = _bar_prices(symbol, seconds, index - 1)
+    spread_range = np.abs(close - open_) * 0.5 + close * 0.0004
+
+    rates = np.empty(count, dtype=RATE_DTYPE)
+    rates['time'] = index * seconds
+    rates['open'] = open_
+    rates['close'] = close
+    rates['high'] = np.maximum(open_, close) + spread_range
+    rates['low'] = np.minimum(open_, close) - spread_range
+    rates['tick_volume'] = (100 + (index % 97) * 13).astype(np.uint64)
+    rates['spread'] = SYMBOLS[symbol][3]
+    rates['real_volume'] = 0
+    return rates
+
+
+def _current_index(timeframe: int) -> int:
+    return int(time.time()) // TIMEFRAME_SECONDS.get(timeframe, 3600)
+
+
+def _timestamp(value) -> int:
+    return int(value.timestamp()) if isinstance(value, datetime) else int(value)
+
+
+def copy_rates_from_pos(symbol: str, timeframe: int, start_pos: int, count: int) -> Optional[np.ndarray]:
+    """count bars ending start_pos bars before the current (forming) bar"""
+    last = _current_index(timeframe) - start_pos
+    return _rates(symbol, timeframe, last - count + 1, count)
+
+
+def copy_rates_from(symbol: str, timeframe: int, date_from, count: int) -> Optional[np.ndarray]:
+    """count bars ending at the bar containing date_from"""
+    last = min(_timestamp(date_from) // TIMEFRAME_SECONDS.get(timeframe, 3600), _current_index(timeframe))
+    return _rates(symbol, timeframe, last - count + 1, count)
+
+
+def copy_rates_range(symbol: str, timeframe: int, date_from, date_to) -> Optional[np.ndarray]:
+    """Bars opened within [date_from, date_to]"""
+    seconds = TIMEFRAME_SECONDS.get(timeframe, 3600)
+    first = -(-_timestamp(date_from) // seconds)
+    last = min(_timestamp(date_to) // seconds, _current_index(timeframe))
+    return _rates(symbol, timeframe, first, last - first + 1)
+
+
+# --------------------------------------------------------- symbols / ticks
+
+def _quote(symbol: str):
+    now = time.time()
+    mid = float(_bar_prices(symbol, 1, np.array([int(now)]))[0])
+    _, digits, _, spread, _ = SYMBOLS[symbol]
+    half = spread * 10 ** -digits / 2
+    return now, round(mid - half, digits), round(mid + half, digits)
+
+
+def symbols_get(group: str = '*'):
+    if not _state['initialized']:
+        return None
+    pattern = group.replace('*', '')
+    return tuple(symbol_info(name) for name in SYMBOLS if pattern in name)
+
+
+def symbols_total() -> int:
+    return len(SYMBOLS)
+
+
+def symbol_info(symbol: str) -> Optional[SymbolInfo]:
+    if not _state['initialized'] or symbol not in SYMBOLS:
+        return None
+    _, digits, contract, spread, description = SYMBOLS[symbol]
+    _, bid, ask = _quote(symbol)
+    return SymbolInfo(symbol, description, symbol[:3], symbol[3:], symbol[:3], digits,
+                      float(contract), 4, 0.01, 100.0, 0.01, spread, bid, ask)
+
+
+def symbol_info_tick(symbol: str) -> Optional[Tick]:
+    if not _state['initialized'] or symbol not in SYMBOLS:
+        return None
+    now, bid, ask = _quote(symbol)
+    return Tick(int(now), bid, ask, 0.0, 0, int(now * 1000))
+
+
+# ---------------------------------------------------------------- trading
+
+def _position_view(position: dict) -> TradePosition:
+    _, bid, ask = _quote(position['symbol'])
+    current = bid if position['type'] == ORDER_TYPE_BUY else ask
+    direction = 1 if position['type'] == ORDER_TYPE_BUY else -1
+    contract = SYMBOLS[position['symbol']][2]
+    profit = round(direction * (current - position['price_open']) * position['volume'] * contract, 2)
+    return TradePosition(position['ticket'], position['time'], position['type'], position['magic'],
+                         position['volume'], position['price_open'], position['sl'], position['tp'],
+                         current, 0.0, profit, position['symbol'], position['comment'])
+
+
+def _record_deal(request: dict, ticket: int, price: float, position_id: int, profit: float) -> int:
+    deal_ticket = _state['next_ticket']
+    _state['next_ticket'] += 1
+    _state['deals'].append(TradeDeal(deal_ticket, ticket, int(time.time()), request['type'], position_id,
+                                     request['volume'], price, 0.0, 0.0, profit, request['symbol'],
+                                     request.get('comment', '')))
+    return deal_ticket
+
+
+def order_send(request: dict) -> Optional[OrderSendResult]:
+    """Fill market deals immediately at the current quote"""
+    if not _state['initialized']:
+        _state['last_error'] = (-10004, 'No IPC connection')
+        return None
+
+    symbol = request.get('symbol')
+    if symbol not in SYMBOLS or request.get('action') != TRADE_ACTION_DEAL:
+        return OrderSendResult(TRADE_RETCODE_INVALID, 0, 0, 0.0, 0.0, 0.0, 0.0, 'Invalid request', request)
+
+    _, bid, ask = _quote(symbol)
+    price = ask if request['type'] == ORDER_TYPE_BUY else bid
+    ticket = _state['next_ticket']
+    _state['next_ticket'] += 1
+
+    position_id = request.get('position')
+    if position_id:
+        position = _state['positions'].pop(position_id, None)
+        if position is None:
+            return OrderSendResult(TRADE_RETCODE_INVALID, 0, ticket, 0.0, 0.0, bid, ask,
+                                   'Position not found', request)
+        profit = _position_view(position).profit
+        _state['balance'] += profit
+    else:
+        position_id = ticket
+        profit = 0.0
+        _state['positions'][ticket] = {
+            'ticket': ticket, 'time': int(time.time()), 'type': request['type'],
+            'magic': request.get('magic', 0), 'volume': request['volume'], 'price_open': price,
+            'sl': request.get('sl', 0.0), 'tp': request.get('tp', 0.0), 'symbol': symbol,
+            'comment': request.get('comment', '')
+        }
+
+    deal = _record_deal(request, ticket, price, position_id, profit)
+    return OrderSendResult(TRADE_RETCODE_DONE, deal, ticket, request['volume'], price, bid, ask,
+                           'Request executed', request)
+
+
+def positions_total() -> int:
+    return len(_state['positions'])
+
+
+def positions_get(symbol: Optional[str] = None, group: Optional[str] = None, ticket: Optional[int] = None):
+    if not _state['initialized']:
+        return None
+    positions = _state['positions'].values()
+    if ticket is not None:
+        positions = [p for p in positions if p['ticket'] == ticket]
+    if symbol is not None:
+        positions = [p for p in positions if p['symbol'] == symbol]
+    return tuple(_position_view(p) for p in positions)
+
+
+def history_deals_get(date_from, date_to, group: Optional[str] = None):
+    if not _state['initialized']:
+        return None
+    start, end = _timestamp(date_from), _timestamp(date_to)
+    return tuple(d for d in _state['deals'] if start <= d.time <= end)
+
+
+def account_info() -> Optional[AccountInfo]:
+    if not _state['initialized']:
+        return None
+    floating = sum(_position_view(p).profit for p in _state['positions'].values())
+    balance = round(_state['balance'], 2)
+    return AccountInfo(_state['login'], _state['server'], balance, round(balance + floating, 2), 0.0,
+                       round(balance + floating, 2), 0.0, round(floating, 2), 'USD', 100, 0, 200,
+                       50.0, 30.0)
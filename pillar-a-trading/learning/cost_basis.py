@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Cost Basis Engine - Lot matching and realized / unrealized P&L
+FIFO, LIFO and specific-identification over the unified ledger
+
+Every acquisition opens a lot in the asset's queue; disposals (sells, the
+disposed side of exchanges, fees paid in kind) consume lots in method order
+and record realized P&L with the holding period of each lot touched.
+Withdrawals remove lots without realizing anything.
+
+All amounts use the ledger's fixed-point integers (ledger_parsers):
+quantities in 1e-8 units, money in cents. Partial lots split cost and
+proceeds with integer arithmetic, so basis is conserved exactly.
+
+State is incremental - process_ledger() only walks the new entries, so
+appending an import never reprocesses history.
+"""
+
+import logging
+from collections import deque
+from typing import Dict, List, Any, Optional, Iterable
+
+import numpy as np
+import pandas as pd
+
+from ledger_parsers import QUANTITY_SCALE, USD_SCALE, REALIZED_LOT_KIND
+
+logger = logging.getLogger('CostBasisEngine')
+
+METHODS = ('fifo', 'lifo', 'specific')
+
+NAT = np.iinfo(np.int64).min     # datetime64[ns] NaT as int64
+NS_PER_DAY = 86_400 * 10 ** 9
+LONG_TERM_DAYS = 365
+
+# Ledger kinds that move assets between own wallets - no lot changes
+TRANSFER_KINDS = {'Transfer In', 'Transfer Out'}
+# The accounting currency is not lot-tracked
+CASH_ASSETS = {'USD', ''}
+
+REALIZED_COLUMNS = ['source', 'asset', 'lot_id', 'acquired', 'disposed', 'quantity',
+                    'proceeds', 'cost_basis', 'kind']
+
+
+class CostBasisEngine:
+    """
+    Per-asset lot queues with FIFO / LIFO / specific-identification matching
+
+    With method='specific', disposals consume the lot_ids they name and
+    fall back to FIFO for any quantity not covered (ledger exports carry no
+    lot selections). Named lots can be used with any method.
+    """
+
+    def __init__(self, method: str = 'fifo'):
+        """
+        Args:
+            method: 'fifo', 'lifo' or 'specific'
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown cost basis method: {method} (use one of {METHODS})")
+        self.method = method
+        self.lots: Dict[str, deque] = {}         # asset -> deque of [lot_id, asset, qty, cost, acquired, source]
+        self.lot_index: Dict[str, list] = {}     # lot_id -> lot (specific identification)
+        self.shortfall: Dict[str, int] = {}      # asset -> quantity disposed without matching lots
+        self.last_dates: Dict[str, pd.Timestamp] = {}   # asset -> newest processed entry
+        # Realized records flattened REALIZED_COLUMNS-wise into one list: it holds
+        # only ints and strings, so the garbage collector never has to scan it
+        self._realized: List[Any] = []
+        self._next_lot = 0
+        self.stats = {'entries': 0, 'disposals': 0, 'withdrawals': 0}
+
+    # -------------------------------------------------------------- events
+
+    def acquire(self, asset: str, quantity: int, cost: int, date: int,
+                lot_id: Optional[str] = None, source: str = '') -> str:
+        """
+        Open a lot
+
+        Args:
+            asset: Asset symbol
+            quantity: Fixed-point quantity (1e-8 units)
+            cost: Cost basis in cents (fees included)
+            date: Acquisition time as int64 nanoseconds
+            lot_id: Identifier for specific identification (generated if None)
+
+        Returns:
+            The lot id ('' if quantity is not positive)
+        """
+        if quantity <= 0:
+            return ''
+        self._next_lot += 1
+        if lot_id is not None or self.method == 'specific':
+            lot_id = lot_id if lot_id is not None else f"{asset}-{self._next_lot}"
+            lot = [lot_id, asset, quantity, cost, date, source]
+            self.lot_index[lot_id] = lot
+        else:
+            # Only lots that can be named are indexed; the rest get a sequence number
+            lot = [self._next_lot, asset, quantity, cost, date, source]
+        queue = self.lots.get(asset)
+        if queue is None:
+            queue = self.lots[asset] = deque()
+        queue.append(lot)
+        return lot[0]
+
+    def dispose(self, asset: str, quantity: int, proceeds: int, date: int,
+                lot_ids: Optional[Iterable[str]] = None, kind: str = 'sell',
+                source: str = '') -> int:
+        """
+        Dispose of quantity, realizing P&L against the matched lots
+
+        Quantity not covered by open lots is realized with zero basis and
+        counted in self.shortfall.
+
+        Returns:
+            Realized gain in cents
+        """
+        if quantity <= 0:
+            return 0
+        taken, missing = self._consume(asset, quantity, lot_ids)
+        self.stats['disposals'] += 1
+
+        gain = 0
+        realized = self._realized
+        remaining_qty, remaining_proceeds = quantity, proceeds
+        for lot, qty, cost in taken:
+            # Allocate proceeds pro rata; the last slice takes the remainder
+            share = remaining_proceeds * qty // remaining_qty
+            remaining_qty -= qty
+            remaining_proceeds -= share
+            gain += share - cost
+            realized.extend((source, asset, lot[0], lot[4], date, qty, share, cost, kind))
+
+        if missing:
+            self.shortfall[asset] = self.shortfall.get(asset, 0) + missing
+            gain += remaining_proceeds
+            realized.extend((source, asset, '', NAT, date, missing, remaining_proceeds, 0, kind))
+        return gain
+
+    def withdraw(self, asset: str, quantity: int, lot_ids: Optional[Iterable[str]] = None) -> int:
+        """
+        Remove quantity from the lots without realizing P&L (sent off-platform)
+
+        Returns:
+            Cost basis removed, in cents
+        """
+        if quantity <= 0:
+            return 0
+        taken, missing = self._consume(asset, quantity, lot_ids)
+        self.stats['withdrawals'] += 1
+        if missing:
+            self.shortfall[asset] = self.shortfall.get(asset, 0) + missing
+        return sum(cost for _, _, cost in taken)
+
+    def record_realized(self, asset: str, quantity: int, proceeds: int, cost: int,
+                        acquired: int, disposed: int, source: str = ''):
+        """Record a lot the exporting platform already matched (e.g. Robinhood Crypto)"""
+        self._realized.extend((source, asset, '', acquired, disposed, quantity, proceeds, cost, 'sell'))
+
+    # ------------------------------------------------------------ matching
+
+    def _consume(self, asset: str, quantity: int, lot_ids: Optional[Iterable[str]]):
+        """Take quantity from the asset's lots; returns ([(lot, qty, cost)], unmatched quantity)"""
+        taken = []
+        if lot_ids:
+            for lot_id in lot_ids:
+                if quantity <= 0:
+                    break
+                lot = self.lot_index.get(lot_id)
+                if lot is not None and lot[1] == asset and lot[2] > 0:
+                    quantity -= self._take(lot, quantity, taken)
+
+        queue = self.lots.get(asset)
+        if not queue:
+            return taken, quantity
+
+        lifo = self.method == 'lifo'
+        pop = queue.pop if lifo else queue.popleft
+        end = -1 if lifo else 0
+        lot_index = self.lot_index
+        while quantity > 0 and queue:
+            lot = queue[end]
+            held = lot[2]
+            if held > quantity:
+                cost = lot[3] * quantity // held
+                lot[2] = held - quantity
+                lot[3] -= cost
+                taken.append((lot, quantity, cost))
+                return taken, 0
+            if held:
+                taken.append((lot, held, lot[3]))
+                lot[2] = lot[3] = 0
+                quantity -= held
+            # Emptied lots (including ones taken by specific identification) leave the queue here
+            pop()
+            if lot_index:
+                lot_index.pop(lot[0], None)
+        return taken, quantity
+
+    @staticmethod
+    def _take(lot: list, quantity: int, taken: list) -> int:
+        held = lot[2]
+        if quantity >= held:
+            taken.append((lot, held, lot[3]))
+            lot[2] = lot[3] = 0
+            return held
+        cost = lot[3] * quantity // held
+        lot[2] -= quantity
+        lot[3] -= cost
+        taken.append((lot, quantity, cost))
+        return quantity
+
+    # -------------------------------------------------------------- ledger
+
+    def process_ledger(self, entries: pd.DataFrame) -> pd.DataFrame:
+        """
+        Apply new ledger entries (see ledger_parsers.LEDGER_COLUMNS)
+
+        Entries are applied in date order. Only the given entries are walked,
+        so call this with each import's new rows; entries older than the
+        last processed date are applied late (with a warning) rather than
+        replaying history.
+
+        Returns:
+            Realized records produced by these entries (see realized_frame)
+        """
+        start = self.realized_count
+        if entries.empty:
+            return self.realized_frame(start)
+
+        batch = entries.sort_values('date', kind='stable')
+        dates = batch['date'].to_numpy().view('int64')
+        acquired = batch['acquired_date'].to_numpy().view('int64')
+
+        # Lot-affecting entries per asset (pre-matched lots don't touch the queues)
+        spans = batch[batch['kind'] != REALIZED_LOT_KIND].groupby('asset', observed=True)['date'].agg(['min', 'max'])
+        stale = [asset for asset, first in spans['min'].items()
+                 if asset in self.last_dates and first < self.last_dates[asset]]
+        if stale:
+            logger.warning(f"⚠️ Ledger entries for {', '.join(map(str, stale))} are older than "
+                           f"ones already processed - lots are matched in arrival order")
+
+        columns = [batch[name].tolist() for name in
+                   ('source', 'kind', 'status', 'asset', 'quantity', 'counter_asset',
+                    'counter_quantity', 'fee', 'fee_asset', 'usd_value', 'cost_basis')]
+        acquire, dispose, withdraw = self.acquire, self.dispose, self.withdraw
+
+        for (source, kind, status, asset, quantity, counter_asset, counter_quantity,
+             fee, fee_asset, usd, cost_basis, date, acquired_date) in zip(*columns, dates.tolist(),
+                                                                          acquired.tolist()):
+            if status == 'rejected' or kind in TRANSFER_KINDS:
+                continue
+            usd = abs(usd)
+
+            if kind == REALIZED_LOT_KIND:
+                # Basis may legitimately be zero (e.g. airdrops), so the kind marks these rows
+                self.record_realized(asset, abs(quantity), usd, cost_basis, acquired_date, date, source)
+            elif kind == 'Exchange':
+                if asset not in CASH_ASSETS:
+                    dispose(asset, -quantity, usd, date, source=source)
+                if counter_asset not in CASH_ASSETS:
+                    acquire(counter_asset, counter_quantity, usd, date, source=source)
+            elif asset in CASH_ASSETS:
+                pass
+            elif kind == 'Withdrawal':
+                withdraw(asset, -quantity - (fee if fee_asset == asset else 0))
+            elif quantity > 0:
+                acquire(asset, quantity, usd, date, source=source)
+            elif quantity < 0:
+                dispose(asset, -quantity, usd, date, source=source)
+
+            if fee and fee_asset not in CASH_ASSETS:
+                dispose(fee_asset, fee, 0, date, kind='fee', source=source)
+
+        self.stats['entries'] += len(batch)
+        for asset, last in spans['max'].items():
+            if asset not in CASH_ASSETS and pd.notna(last):
+                self.last_dates[asset] = max(last, self.last_dates.get(asset, last))
+        return self.realized_frame(start)
+
+    # ------------------------------------------------------------- outputs
+
+    @property
+    def realized_count(self) -> int:
+        return len(self._realized) // len(REALIZED_COLUMNS)
+
+    def realized_frame(self, start: int = 0) -> pd.DataFrame:
+        """
+        Realized records as a typed table
+
+        Args:
+            start: Index of the first record (records are append-only)
+
+        Columns: source, asset, lot_id, acquired, disposed, quantity,
+        proceeds, cost_basis, gain (cents), holding_days, long_term and
+        kind ('sell' or 'fee').
+        """
+        width = len(REALIZED_COLUMNS)
+        records = self._realized[start * width:]
+        columns = {name: records[i::width] for i, name in enumerate(REALIZED_COLUMNS)}
+
+        df = pd.DataFrame({name: pd.Categorical(columns[name]) for name in ('source', 'asset')})
+        df['lot_id'] = np.array(columns['lot_id'], dtype=object)
+        acquired = np.array(columns['acquired'], dtype='int64')
+        disposed = np.array(columns['disposed'], dtype='int64')
+        df['acquired'] = acquired.view('datetime64[ns]')
+        df['disposed'] = disposed.view('datetime64[ns]')
+        for name in ('quantity', 'proceeds', 'cost_basis'):
+            df[name] = np.array(columns[name], dtype='int64')
+        df['kind'] = pd.Categorical(columns['kind'])
+
+        known = (acquired != NAT) & (disposed != NAT)
+        holding = np.where(known, (disposed - np.where(known, acquired, 0)) // NS_PER_DAY, -1)
+        df['gain'] = df['proceeds'] - df['cost_basis']
+        df['holding_days'] = holding
+        df['long_term'] = holding > LONG_TERM_DAYS
+        return df
+
+    def open_lots(self, as_of: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """Open lots with their remaining quantity, basis and holding period"""
+        rows = [(lot[1], lot[0], lot[4], lot[2], lot[3], lot[5])
+                for queue in self.lots.values() for lot in queue if lot[2] > 0]
+        df = pd.DataFrame.from_records(rows, columns=['asset', 'lot_id', 'acquired', 'quantity',
+                                                      'cost_basis', 'source'])
+        acquired = df['acquired'].to_numpy(dtype='int64')
+        df['acquired'] = acquired.view('datetime64[ns]')
+        now = (as_of or pd.Timestamp.now()).value
+        df['holding_days'] = np.where(acquired != NAT, (now - acquired) // NS_PER_DAY, -1)
+        for name in ('quantity', 'cost_basis'):
+            df[name] = df[name].astype('int64')
+        return df
+
+    def unrealized(self, prices: Dict[str, float],
+                   as_of: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Unrealized P&L per asset
+
+        Args:
+            prices: Asset -> current USD price per unit (assets without a
+                price get NaN market value)
+            as_of: Reference time for holding periods (default: now)
+
+        Returns:
+            Per asset: quantity (1e-8 units), cost_basis, market_value and
+            unrealized (cents), lots and the oldest lot's holding_days
+        """
+        lots = self.open_lots(as_of)
+        summary = lots.groupby('asset').agg(
+            quantity=('quantity', 'sum'),
+            cost_basis=('cost_basis', 'sum'),
+            lots=('lot_id', 'count'),
+            holding_days=('holding_days', 'max')
+        )
+        price = summary.index.map(lambda asset: prices.get(asset, np.nan)).to_numpy(dtype=float)
+        summary['market_value'] = np.round(summary['quantity'] / QUANTITY_SCALE * price * USD_SCALE)
+        summary['unrealized'] = summary['market_value'] - summary['cost_basis']
+        return summary.reset_index()
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Totals in USD"""
+        realized = self.realized_frame()
+        return {
+            'method': self.method,
+            'realized_gain': float(realized['gain'].sum()) / USD_SCALE,
+            'short_term_gain': float(realized.loc[~realized['long_term'], 'gain'].sum()) / USD_SCALE,
+            'long_term_gain': float(realized.loc[realized['long_term'], 'gain'].sum()) / USD_SCALE,
+            'open_lots': sum(1 for queue in self.lots.values() for lot in queue if lot[2] > 0),
+            'shortfall': {asset: qty / QUANTITY_SCALE for asset, qty in self.shortfall.items()},
+            'stats': dict(self.stats, lots_opened=self._next_lot)
+        }
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Ledger Parsers - Native importers for the crypto and budgeting exports
+Nexo, Robinhood Crypto (realized lots) and budgeting-app transaction CSVs
+
+Each export is recognised by its header fingerprint (the Robinhood Crypto
+file starts with a provider preamble, so the header is searched for rather
+than assumed on line one), streamed row by row with the csv module and
+emitted as chunks of one common columnar ledger (LEDGER_COLUMNS).
+
+Amounts are exact fixed-point integers parsed straight from the decimal
+text - quantities in 1e-8 units, USD in cents - so sums never pick up
+float rounding. Use to_float() for display or analysis.
+
+Ledger keeps the imported entries and the SHA-256 of every imported file;
+re-importing an unchanged file is a no-op.
+"""
+
+import csv
+import json
+import hashlib
+import logging
+from datetime import datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger('LedgerParsers')
+
+QUANTITY_DIGITS = 8   # quantities / fees in 1e-8 units (satoshi precision)
+USD_DIGITS = 2        # USD values in cents
+QUANTITY_SCALE = 10 ** QUANTITY_DIGITS
+USD_SCALE = 10 ** USD_DIGITS
+
+# Common ledger schema - every parser yields rows in this column order
+LEDGER_COLUMNS = {
+    'source': 'category',
+    'record_id': 'object',
+    'date': 'datetime64[ns]',
+    'acquired_date': 'datetime64[ns]',
+    'kind': 'category',
+    'status': 'category',
+    'asset': 'category',
+    'quantity': 'int64',            # signed, 1e-8 units of asset
+    'counter_asset': 'category',
+    'counter_quantity': 'int64',    # 1e-8 units of counter_asset
+    'fee': 'int64',                 # 1e-8 units of fee_asset
+    'fee_asset': 'category',
+    'usd_value': 'int64',           # signed cents, positive = value received
+    'cost_basis': 'int64',          # cents (REALIZED_LOT_KIND rows only)
+    'account': 'category',
+    'category': 'category',
+    'description': 'object'
+}
+
+DATE_FIELDS = ('date', 'acquired_date')
+
+# Kind of rows whose lot the exporting platform already matched (carry cost_basis)
+REALIZED_LOT_KIND = 'Realized Lot'
+
+
+def empty_ledger() -> pd.DataFrame:
+    """Empty ledger table with the typed schema"""
+    return pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in LEDGER_COLUMNS.items()})
+
+
+def parse_fixed(text: str, digits: int) -> int:
+    """
+    Parse a decimal string into a fixed-point integer
+
+    '$1,532.89' with digits=2 -> 153289. Blank and '-' mean zero; extra
+    precision is rounded half-even. Raises InvalidOperation on garbage.
+    """
+    text = text.strip().replace('$', '').replace(',', '')
+    if text in ('', '-'):
+        return 0
+    return int(Decimal(text).scaleb(digits).to_integral_value(ROUND_HALF_EVEN))
+
+
+def to_float(column: pd.Series, scale: int) -> pd.Series:
+    """Fixed-point column -> float64 (e.g. to_float(ledger['usd_value'], USD_SCALE))"""
+    return column.astype('float64') / scale
+
+
+def _nexo_row(row: List[str], idx: Dict[str, int]) -> tuple:
+    status, _, details = row[idx['Details']].partition(' / ')
+    quantity = parse_fixed(row[idx['Input Amount']], QUANTITY_DIGITS)
+    usd = parse_fixed(row[idx['USD Equivalent']], USD_DIGITS)
+    fee_asset = row[idx['Fee Currency']].strip()
+    return (
+        row[idx['Transaction']],
+        row[idx['Date / Time (UTC)']],
+        '',
+        row[idx['Type']].strip(),
+        status.strip(),
+        row[idx['Input Currency']].strip(),
+        quantity,
+        row[idx['Output Currency']].strip(),
+        parse_fixed(row[idx['Output Amount']], QUANTITY_DIGITS),
+        parse_fixed(row[idx['Fee']], QUANTITY_DIGITS),
+        '' if fee_asset == '-' else fee_asset,
+        -usd if quantity < 0 else usd,
+        0,
+        '',
+        '',
+        details.strip()
+    )
+
+
+def _robinhood_crypto_row(row: List[str], idx: Dict[str, int]) -> tuple:
+    # One row per realized lot; the export carries no quantities
+    return (
+        '',
+        row[idx['DATE SOLD']],
+        row[idx['RECEIVED DATE']],
+        REALIZED_LOT_KIND,
+        '',
+        row[idx['ASSET NAME']].strip(),
+        0,
+        'USD',
+        0,
+        0,
+        '',
+        parse_fixed(row[idx['PROCEEDS']], USD_DIGITS),
+        parse_fixed(row[idx['COST BASIS(USD)']], USD_DIGITS),
+        '',
+        '',
+        ''
+    )
+
+
+def _budget_row(row: List[str], idx: Dict[str, int]) -> tuple:
+    # Budgeting exports list outflows as positive amounts - flip to the ledger's sign
+    cents = -parse_fixed(row[idx['Amount']], USD_DIGITS)
+    payee = row[idx['Custom Name']].strip() or row[idx['Name']].strip()
+    return (
+        '',
+        row[idx['Date']],
+        '',
+        'Credit' if cents > 0 else 'Debit',
+        '',
+        'USD',
+        cents * 10 ** (QUANTITY_DIGITS - USD_DIGITS),
+        '',
+        0,
+        0,
+        '',
+        cents,
+        0,
+        row[idx['Account Name']].strip(),
+        row[idx['Category']].strip(),
+        payee
+    )
+
+
+# Export formats: source name, header fingerprint, date format and row parser
+LEDGER_FORMATS = {
+    'nexo': {
+        'source': 'Nexo',
+        'fingerprint': ('Transaction', 'Type', 'Input Currency', 'Input Amount', 'Output Currency',
+                        'Output Amount', 'USD Equivalent', 'Fee', 'Fee Currency', 'Details',
+                        'Date / Time (UTC)'),
+        'date_format': '%Y-%m-%d %H:%M:%S',
+        'row': _nexo_row
+    },
+    'robinhood_crypto': {
+        'source': 'Robinhood Crypto',
+        'fingerprint': ('ASSET NAME', 'RECEIVED DATE', 'COST BASIS(USD)', 'DATE SOLD', 'PROCEEDS'),
+        'date_format': '%m/%d/%y',
+        'row': _robinhood_crypto_row
+    },
+    'budget': {
+        'source': 'Budget',
+        'fingerprint': ('Date', 'Account Name', 'Name', 'Custom Name', 'Amount', 'Category'),
+        'date_format': '%Y-%m-%d',
+        'row': _budget_row
+    }
+}
+
+
+def _open_export(file_path: str):
+    return open(file_path, newline='', encoding='utf-8-sig')
+
+
+def detect_format(file_path: str, max_preamble: int = 20) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Find a known export format by header fingerprint
+
+    Args:
+        file_path: CSV export
+        max_preamble: Lines searched for the header
+
+    Returns:
+        (format name, header line index), or (None, None) if unrecognised
+    """
+    with _open_export(file_path) as f:
+        for line_no, row in enumerate(csv.reader(f)):
+            if line_no >= max_preamble:
+                break
+            cells = {cell.strip() for cell in row}
+            for name, spec in LEDGER_FORMATS.items():
+                if cells.issuperset(spec['fingerprint']):
+                    return name, line_no
+    return None, None
+
+
+def _to_frame(records: List[tuple], source: str, date_format: str) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(records, columns=list(LEDGER_COLUMNS)[1:])
+    df.insert(0, 'source', source)
+    for name in DATE_FIELDS:
+        df[name] = pd.to_datetime(df[name], format=date_format, errors='coerce')
+    return df.astype(LEDGER_COLUMNS)
+
+
+def iter_ledger_chunks(file_path: str, format_name: Optional[str] = None,
+                       chunksize: int = 50_000) -> Iterator[pd.DataFrame]:
+    """
+    Stream an export as typed ledger chunks
+
+    Args:
+        file_path: CSV export
+        format_name: Key of LEDGER_FORMATS (detected from the header if None)
+        chunksize: Rows per chunk
+
+    Blank and malformed rows are skipped and counted in the log.
+    """
+    detected, header_line = detect_format(file_path)
+    format_name = format_name or detected
+    if format_name not in LEDGER_FORMATS:
+        raise ValueError(f"Unrecognised export format: {file_path}")
+    if detected != format_name:
+        raise ValueError(f"{file_path} does not match the {format_name} header")
+    spec = LEDGER_FORMATS[format_name]
+
+    with _open_export(file_path) as f:
+        reader = csv.reader(f)
+        for _ in range(header_line):
+            next(reader)
+        header = [cell.strip() for cell in next(reader)]
+        idx = {name: header.index(name) for name in header if name}
+
+        parse_row = spec['row']
+        records = []
+        skipped = 0
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            try:
+                records.append(parse_row(row, idx))
+            except (InvalidOperation, IndexError):
+                skipped += 1
+                continue
+            if len(records) >= chunksize:
+                yield _to_frame(records, spec['source'], spec['date_format'])
+                records = []
+
+        if records:
+            yield _to_frame(records, spec['source'], spec['date_format'])
+        if skipped:
+            logger.warning(f"⚠️ Skipped {skipped} malformed rows in {file_path}")
+
+
+def file_digest(file_path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents, read in blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def concat_ledger(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate ledger frames, keeping category dtypes across differing categories"""
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return empty_ledger()
+    combined = pd.concat(frames, ignore_index=True)
+    for name, dtype in LEDGER_COLUMNS.items():
+        if dtype == 'category' and combined[name].dtype != 'category':
+            combined[name] = combined[name].astype('category')
+    return combined
+
+
+class Ledger:
+    """
+    Common columnar ledger with content-hash import tracking
+
+    With a storage_dir the entries are appended to ledger.csv (fixed-point
+    integers, so the round trip is exact) and the import registry is kept in
+    imports.json, so unchanged files are skipped across runs too.
+    """
+
+    def __init__(self, storage_dir: Optional[str] = None):
+        self.entries = empty_ledger()
+        self.imports: Dict[str, Dict[str, Any]] = {}   # sha256 -> import record
+        self.storage_dir = Path(storage_dir) if storage_dir else None
+
+        if self.storage_dir is not None:
+            self._load()
+
+    @property
+    def ledger_file(self) -> Optional[Path]:
+        return self.storage_dir / 'ledger.csv' if self.storage_dir else None
+
+    @property
+    def registry_file(self) -> Optional[Path]:
+        return self.storage_dir / 'imports.json' if self.storage_dir else None
+
+    def is_imported(self, file_path: str) -> bool:
+        return file_digest(file_path) in self.imports
+
+    def import_file(self, file_path: str, format_name: Optional[str] = None,
+                    chunksize: int = 50_000) -> pd.DataFrame:
+        """
+        Parse an export into the ledger
+
+        Args:
+            file_path: CSV export (Nexo, Robinhood Crypto or budgeting app)
+            format_name: Key of LEDGER_FORMATS (detected if None)
+            chunksize: Rows per parsed chunk
+
+        Returns:
+            The new ledger entries (empty if the file was already imported)
+        """
+        digest = file_digest(file_path)
+        if digest in self.imports:
+            previous = self.imports[digest]
+            logger.info(f"⏭️ {file_path} unchanged since {previous['imported_at']} - skipping import")
+            return empty_ledger()
+
+        format_name = format_name or detect_format(file_path)[0]
+        if format_name is None:
+            raise ValueError(f"Unrecognised export format: {file_path}")
+
+        entries = concat_ledger(list(iter_ledger_chunks(file_path, format_name, chunksize)))
+        self.entries = concat_ledger([self.entries, entries])
+        self.imports[digest] = {
+            'file': str(file_path),
+            'format': format_name,
+            'rows': len(entries),
+            'imported_at': datetime.now().isoformat()
+        }
+        if self.storage_dir is not None:
+            self._save(entries)
+
+        logger.info(f"✅ Imported {len(entries)} {LEDGER_FORMATS[format_name]['source']} "
+                    f"entries from {file_path}")
+        return entries
+
+    def _save(self, entries: pd.DataFrame):
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        write_header = not self.ledger_file.exists()
+        entries.to_csv(self.ledger_file, mode='a', header=write_header, index=False)
+        with open(self.registry_file, 'w') as f:
+            json.dump(self.imports, f, indent=2)
+
+    def _load(self):
+        if self.registry_file.exists():
+            with open(self.registry_file) as f:
+                self.imports = json.load(f)
+        if self.ledger_file.exists():
+            dtypes = {name: dtype for name, dtype in LEDGER_COLUMNS.items() if name not in DATE_FIELDS}
+            df = pd.read_csv(self.ledger_file, dtype=dtypes, keep_default_na=False,
+                             na_values={name: [''] for name in DATE_FIELDS})
+            for name in DATE_FIELDS:
+                df[name] = pd.to_datetime(df[name], format='ISO8601', errors='coerce').astype('datetime64[ns]')
+            # Ledgers saved before REALIZED_LOT_KIND stored Robinhood lots as 'Sell'
+            legacy = (df['source'] == LEDGER_FORMATS['robinhood_crypto']['source']) & (df['kind'] == 'Sell')
+            if legacy.any():
+                df['kind'] = df['kind'].cat.add_categories([REALIZED_LOT_KIND]).mask(legacy, REALIZED_LOT_KIND)
+            self.entries = df[list(LEDGER_COLUMNS)]
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Trade Aggregates - Mergeable streaming statistics for trade history
+Bounded-memory building blocks for TradeHistoryAnalyzer's chunked mode
+
+TradeAggregates folds typed trade chunks (see trade_history_analyzer.TRADE_COLUMNS)
+into running sums and counts - per symbol, per hour, per weekday, winning
+sides - plus a SizeSketch of position sizes. Every piece is additive, so
+aggregates built in different processes or from different files merge
+with merge() and produce the same analysis dict as a single pass.
+"""
+
+import math
+from typing import Dict, Any, Optional, Iterable
+
+import numpy as np
+import pandas as pd
+
+SIZE_LABELS = ['XS', 'S', 'M', 'L', 'XL']
+
+
+def _add_grouped(target: Dict, keys: pd.Series, values: pd.Series):
+    """target[key] += [sum, non-NaN count] of values grouped by keys"""
+    grouped = values.groupby(keys, observed=True).agg(['sum', 'count'])
+    for key, (total, count) in zip(grouped.index, grouped.itertuples(index=False)):
+        entry = target.setdefault(key, [0.0, 0])
+        entry[0] += float(total)
+        entry[1] += int(count)
+
+
+class SizeSketch:
+    """
+    Position-size distribution with P/L per value
+
+    Stores exact values while there are at most max_exact distinct ones (share
+    counts usually are), then collapses to log-spaced buckets with the given
+    relative accuracy, so memory stays bounded regardless of row count.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.001, max_exact: int = 4096):
+        self.relative_accuracy = relative_accuracy
+        self.max_exact = max_exact
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.exact = True
+        # value (or bucket representative) -> [count, pnl_sum, pnl_count]
+        self.bins: Dict[float, list] = {}
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _representative(self, values: np.ndarray) -> np.ndarray:
+        magnitude = np.abs(values)
+        with np.errstate(divide='ignore'):
+            keys = np.ceil(np.log(magnitude) / np.log(self.gamma))
+        rep = np.sign(values) * 2 * self.gamma ** keys / (self.gamma + 1)
+        return np.where(magnitude > 0, rep, 0.0)
+
+    def _collapse(self):
+        values = np.fromiter(self.bins.keys(), dtype=float, count=len(self.bins))
+        collapsed: Dict[float, list] = {}
+        for rep, entry in zip(self._representative(values), self.bins.values()):
+            target = collapsed.setdefault(float(rep), [0, 0.0, 0])
+            target[0] += entry[0]
+            target[1] += entry[1]
+            target[2] += entry[2]
+        self.bins = collapsed
+        self.exact = False
+
+    def update(self, sizes: np.ndarray, pnl: np.ndarray):
+        """Add a chunk of sizes with their P/L (NaN sizes are skipped)"""
+        sizes = np.asarray(sizes, dtype=float)
+        pnl = np.asarray(pnl, dtype=float)
+        keep = ~np.isnan(sizes)
+        sizes, pnl = sizes[keep], pnl[keep]
+        if not sizes.size:
+            return
+
+        self.min = min(self.min, float(sizes.min()))
+        self.max = max(self.max, float(sizes.max()))
+
+        keys = sizes if self.exact else self._representative(sizes)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse, minlength=unique.size)
+        has_pnl = ~np.isnan(pnl)
+        pnl_sums = np.bincount(inverse, weights=np.where(has_pnl, pnl, 0.0), minlength=unique.size)
+        pnl_counts = np.bincount(inverse, weights=has_pnl, minlength=unique.size)
+
+        for key, count, total, n in zip(unique.tolist(), counts.tolist(), pnl_sums.tolist(),
+                                        pnl_counts.tolist()):
+            entry = self.bins.setdefault(key, [0, 0.0, 0])
+            entry[0] += count
+            entry[1] += total
+            entry[2] += int(n)
+
+        if self.exact and len(self.bins) > self.max_exact:
+            self._collapse()
+
+    def merge(self, other: 'SizeSketch'):
+        if self.exact and not other.exact:
+            self._collapse()
+        other_bins = other.bins
+        if not self.exact and other.exact:
+            collapsed = SizeSketch(self.relative_accuracy, self.max_exact)
+            collapsed.bins = other.bins
+            collapsed._collapse()
+            other_bins = collapsed.bins
+
+        for key, entry in other_bins.items():
+            target = self.bins.setdefault(key, [0, 0.0, 0])
+            target[0] += entry[0]
+            target[1] += entry[1]
+            target[2] += entry[2]
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+        if self.exact and len(self.bins) > self.max_exact:
+            self._collapse()
+
+    def quantiles(self, probabilities: Iterable[float]) -> Dict[float, float]:
+        """Approximate size quantiles (exact while in exact mode)"""
+        if not self.bins:
+            return {p: float('nan') for p in probabilities}
+        values = np.array(sorted(self.bins))
+        cumulative = np.cumsum([self.bins[v][0] for v in values])
+        total = cumulative[-1]
+        return {p: float(values[min(np.searchsorted(cumulative, p * total, side='left'), len(values) - 1)])
+                for p in probabilities}
+
+    def bucket_means(self, labels=SIZE_LABELS) -> Dict[str, float]:
+        """
+        Mean P/L per equal-width size bucket, matching pd.cut(sizes, bins=len(labels))
+        """
+        if not self.bins:
+            return {label: float('nan') for label in labels}
+
+        low, high = self.min, self.max
+        if low == high:
+            low -= 0.001 * abs(low) if low != 0 else 0.001
+            high += 0.001 * abs(high) if high != 0 else 0.001
+            edges = np.linspace(low, high, len(labels) + 1)
+        else:
+            edges = np.linspace(low, high, len(labels) + 1)
+            edges[0] -= (high - low) * 0.001
+
+        values = np.fromiter(self.bins.keys(), dtype=float, count=len(self.bins))
+        # Representatives can sit just outside [min, max]; clamp them into the end buckets
+        bucket = np.clip(np.searchsorted(edges, values, side='left') - 1, 0, len(labels) - 1)
+
+        sums = np.zeros(len(labels))
+        counts = np.zeros(len(labels))
+        for b, entry in zip(bucket, self.bins.values()):
+            sums[b] += entry[1]
+            counts[b] += entry[2]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums / counts
+        return {label: float(mean) for label, mean in zip(labels, means)}
+
+
+class TradeAggregates:
+    """Mergeable running aggregates over typed trade chunks"""
+
+    def __init__(self, relative_accuracy: float = 0.001):
+        self.total_trades = 0
+        self.profitable_trades = 0
+        self.losing_trades = 0
+        self.total_profit = 0.0
+        self.total_loss = 0.0
+        self.pnl_sum = 0.0
+        self.pnl_count = 0
+        self.dated_trades = 0
+
+        self.symbols: Dict[str, list] = {}        # symbol -> [pnl_sum, pnl_count]
+        self.hours: Dict[int, list] = {}          # hour -> [pnl_sum, pnl_count]
+        self.weekdays: Dict[int, list] = {}       # day_of_week -> [pnl_sum, pnl_count]
+        self.winning_symbols: Dict[str, int] = {}
+        self.winning_sides: Dict[str, int] = {}
+        self.winning_quantity = [0.0, 0]
+        self.winning_price = [0.0, 0]
+        self.sizes = SizeSketch(relative_accuracy)
+
+    def update(self, trades: pd.DataFrame):
+        """Fold one typed trade chunk into the aggregates"""
+        if trades.empty:
+            return
+
+        profit_loss = trades['profit_loss']
+        profitable = profit_loss > 0
+        losing = profit_loss < 0
+
+        self.total_trades += len(trades)
+        self.profitable_trades += int(profitable.sum())
+        self.losing_trades += int(losing.sum())
+        self.total_profit += float(profit_loss[profitable].sum())
+        self.total_loss += float(profit_loss[losing].sum())
+        self.pnl_sum += float(profit_loss.sum())
+        self.pnl_count += int(profit_loss.count())
+
+        _add_grouped(self.symbols, trades['symbol'], profit_loss)
+
+        dates = trades['date']
+        dated = dates.notna()
+        if dated.any():
+            self.dated_trades += int(dated.sum())
+            _add_grouped(self.hours, dates.dt.hour, profit_loss)
+            _add_grouped(self.weekdays, dates.dt.dayofweek, profit_loss)
+
+        winners = trades[profitable]
+        for name, target in (('symbol', self.winning_symbols), ('side', self.winning_sides)):
+            for key, count in winners[name].value_counts().items():
+                if count > 0:
+                    target[key] = target.get(key, 0) + int(count)
+        for name, target in (('quantity', self.winning_quantity), ('price', self.winning_price)):
+            target[0] += float(winners[name].sum())
+            target[1] += int(winners[name].count())
+
+        self.sizes.update(trades['quantity'].to_numpy(), profit_loss.to_numpy())
+
+    def merge(self, other: 'TradeAggregates') -> 'TradeAggregates':
+        """Add another partial aggregate (e.g. from another file or process) into this one"""
+        for name in ('total_trades', 'profitable_trades', 'losing_trades', 'total_profit',
+                     'total_loss', 'pnl_sum', 'pnl_count', 'dated_trades'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+        for name in ('symbols', 'hours', 'weekdays'):
+            target = getattr(self, name)
+            for key, (total, count) in getattr(other, name).items():
+                entry = target.setdefault(key, [0.0, 0])
+                entry[0] += total
+                entry[1] += count
+
+        for name in ('winning_symbols', 'winning_sides'):
+            target = getattr(self, name)
+            for key, count in getattr(other, name).items():
+                target[key] = target.get(key, 0) + count
+
+        for name in ('winning_quantity', 'winning_price'):
+            target, source = getattr(self, name), getattr(other, name)
+            target[0] += source[0]
+            target[1] += source[1]
+
+        self.sizes.merge(other.sizes)
+        return self
+
+    @staticmethod
+    def _means(groups: Dict, top: Optional[int] = None) -> Dict:
+        """Group means sorted like Series.nlargest (ties keep key order)"""
+        means = [(key, total / count) for key, (total, count) in sorted(groups.items()) if count]
+        means.sort(key=lambda item: -item[1])
+        return dict(means[:top] if top else means)
+
+    @staticmethod
+    def _mean(pair: list) -> float:
+        return pair[0] / pair[1] if pair[1] else float('nan')
+
+    def to_analysis(self) -> Dict[str, Any]:
+        """Analysis dict in the same shape as TradeHistoryAnalyzer.analyze_patterns"""
+        symbol_performance = sorted(
+            ((symbol, {'sum': total, 'mean': total / count if count else float('nan'), 'count': count})
+             for symbol, (total, count) in self.symbols.items()),
+            key=lambda item: -item[1]['sum']
+        )
+
+        analysis = {
+            'total_trades': self.total_trades,
+            'profitable_trades': self.profitable_trades,
+            'losing_trades': self.losing_trades,
+            'win_rate': (self.profitable_trades / self.total_trades) * 100 if self.total_trades > 0 else 0,
+            'total_profit': self.total_profit,
+            'total_loss': abs(self.total_loss),
+            'avg_profit_per_trade': self.pnl_sum / self.pnl_count if self.pnl_count else float('nan'),
+            'best_symbols': dict(symbol_performance[:10]),
+            'worst_symbols': dict(symbol_performance[-10:]),
+            'best_entry_times': {},
+            'optimal_position_sizes': self.sizes.bucket_means(),
+            'learned_patterns': []
+        }
+
+        if self.dated_trades:
+            analysis['best_entry_times']['best_hours'] = self._means(self.hours, 5)
+            analysis['best_entry_times']['best_days'] = self._means(self.weekdays, 3)
+
+        return analysis
+
+    def winning_patterns(self) -> Dict[str, Any]:
+        """Same shape as TradeHistoryAnalyzer._extract_winning_patterns"""
+        symbols = sorted(self.winning_symbols.items(), key=lambda item: -item[1])
+        sides = sorted(self.winning_sides.items(), key=lambda item: -item[1])
+        return {
+            'high_win_rate_symbols': [symbol for symbol, _ in symbols[:10]],
+            'profitable_actions': dict(sides),
+            'avg_winning_size': self._mean(self.winning_quantity),
+            'avg_winning_price': self._mean(self.winning_price),
+            'common_patterns': []
+        }
@@ -7,16 +7,120 @@ Learns your successful patterns for 91-95% accuracy
 
 import json
 import csv
+import sys
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple
 from pathlib import Path
 import logging
 
+sys.path.insert(0, str(Path(__file__).parent))
+
+from trade_aggregates import TradeAggregates
+from ledger_parsers import Ledger, detect_format, iter_ledger_chunks, to_float, QUANTITY_SCALE, USD_SCALE
+from cost_basis import CostBasisEngine
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('TradeHistoryAnalyzer')
 
+# Typed columnar schema for loaded trades
+TRADE_COLUMNS = {
+    'platform': 'category',
+    'date': 'datetime64[ns]',
+    'symbol': 'category',
+    'side': 'category',
+    'quantity': 'float64',
+    'price': 'float64',
+    'amount': 'float64',
+    'profit_loss': 'float64'
+}
+
+# Robinhood export column candidates, in order of preference
+ROBINHOOD_COLUMNS = {
+    'date': ['Date', 'date', 'timestamp'],
+    'symbol': ['Symbol', 'symbol', 'ticker'],
+    'side': ['Side', 'side', 'action'],
+    'quantity': ['Quantity', 'quantity', 'shares'],
+    'price': ['Price', 'price', 'avg_price'],
+    'amount': ['Amount', 'amount', 'total'],
+    'profit_loss': ['P/L', 'profit_loss', 'pnl']
+}
+
+
+def empty_trades() -> pd.DataFrame:
+    """Empty trade table with the typed schema"""
+    return pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in TRADE_COLUMNS.items()})
+
+
+def to_trade_columns(df: pd.DataFrame, columns_map: Dict[str, str], platform: str) -> pd.DataFrame:
+    """
+    Cast a raw export to the typed trade schema in one vectorized pass
+
+    Args:
+        df: Raw export (only the mapped columns need to be present)
+        columns_map: Trade field -> source column
+        platform: Platform name stamped on every row
+
+    Missing fields default to '' / 0; unparseable numbers become NaN and
+    unparseable dates NaT.
+    """
+    n = len(df)
+    columns = {'platform': pd.Categorical([platform] * n) if n else pd.Categorical([])}
+
+    for field, dtype in TRADE_COLUMNS.items():
+        if field == 'platform':
+            continue
+        source = columns_map.get(field)
+        if source is None or source not in df.columns:
+            if dtype == 'float64':
+                columns[field] = np.zeros(n)
+            elif field == 'date':
+                columns[field] = pd.Series(pd.NaT, index=df.index, dtype=dtype)
+            else:
+                columns[field] = pd.Categorical([''] * n)
+            continue
+
+        column = df[source]
+        if dtype == 'float64':
+            columns[field] = pd.to_numeric(column, errors='coerce').astype('float64')
+        elif field == 'date':
+            columns[field] = pd.to_datetime(column, errors='coerce', format='mixed')
+        elif field == 'side':
+            columns[field] = column.astype(str).str.upper().astype('category')
+        else:
+            columns[field] = column.astype(str).astype('category')
+
+    trades = pd.DataFrame(columns, index=df.index).reset_index(drop=True)
+    return trades[list(TRADE_COLUMNS)]
+
+
+def realized_trades(realized: pd.DataFrame) -> pd.DataFrame:
+    """
+    Typed trades for realized lots (see CostBasisEngine.realized_frame)
+
+    Fees paid in kind are not trades and are left out; cash flows such as
+    interest, transfers and budgeting entries never realize anything.
+    """
+    lots = realized[realized['kind'] == 'sell']
+    if lots.empty:
+        return empty_trades()
+
+    quantity = to_float(lots['quantity'], QUANTITY_SCALE)
+    proceeds = to_float(lots['proceeds'], USD_SCALE)
+    df = pd.DataFrame({
+        'date': lots['disposed'],
+        'symbol': lots['asset'],
+        'side': 'SELL',
+        'quantity': quantity,
+        'price': (proceeds / quantity).where(quantity > 0, 0.0),
+        'amount': proceeds,
+        'profit_loss': to_float(lots['gain'], USD_SCALE)
+    })
+    trades = to_trade_columns(df, {name: name for name in df.columns}, '')
+    trades['platform'] = pd.Categorical(lots['source'].astype(str))
+    return trades
+
 
 class TradeHistoryAnalyzer:
     """
@@ -30,8 +134,10 @@ class TradeHistoryAnalyzer:
     - Any CSV/JSON export
     """
 
-    def __init__(self):
-        self.trades = []
+    def __init__(self, cost_basis_method: str = 'fifo'):
+        self.trades = empty_trades()
+        self.ledger = Ledger()
+        self.cost_basis = CostBasisEngine(cost_basis_method)
         self.patterns_learned = {}
         self.success_rate_by_strategy = {}
         self.best_entry_times = {}
@@ -41,12 +147,15 @@ class TradeHistoryAnalyzer:
         logger.info("   Learning from your successful patterns...")
         logger.info("=" * 70)
 
-    def load_robinhood_history(self, file_path: str) -> List[Dict]:
+    def load_robinhood_history(self, file_path: str) -> pd.DataFrame:
         """
         Load Robinhood trade history
 
         Upload your Robinhood CSV export to:
         data/trading-history/robinhood_trades.csv
+
+        Returns:
+            Typed trade table (see TRADE_COLUMNS)
         """
         try:
             logger.info(f"📂 Loading Robinhood history from {file_path}...")
@@ -55,87 +164,123 @@ class TradeHistoryAnalyzer:
             # Date, Symbol, Side (Buy/Sell), Quantity, Price, Amount
 
             if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
+                header = pd.read_csv(file_path, nrows=0).columns
+                columns_map = self._first_present(header, ROBINHOOD_COLUMNS)
+                df = pd.read_csv(file_path, usecols=sorted(set(columns_map.values())))
             elif file_path.endswith('.json'):
                 df = pd.read_json(file_path)
+                columns_map = self._first_present(df.columns, ROBINHOOD_COLUMNS)
             else:
                 logger.error("Unsupported file format. Use CSV or JSON")
-                return []
-
-            trades = []
-
-            for _, row in df.iterrows():
-                trade = {
-                    'platform': 'Robinhood',
-                    'date': str(row.get('Date', row.get('date', row.get('timestamp', '')))),
-                    'symbol': str(row.get('Symbol', row.get('symbol', row.get('ticker', '')))),
-                    'side': str(row.get('Side', row.get('side', row.get('action', '')))).upper(),
-                    'quantity': float(row.get('Quantity', row.get('quantity', row.get('shares', 0)))),
-                    'price': float(row.get('Price', row.get('price', row.get('avg_price', 0)))),
-                    'amount': float(row.get('Amount', row.get('amount', row.get('total', 0)))),
-                    'profit_loss': float(row.get('P/L', row.get('profit_loss', row.get('pnl', 0))))
-                }
-                trades.append(trade)
-
-            self.trades.extend(trades)
+                return empty_trades()
+
+            trades = to_trade_columns(df, columns_map, 'Robinhood')
+            self._append_trades(trades)
             logger.info(f"✅ Loaded {len(trades)} trades from Robinhood")
 
             return trades
 
         except Exception as e:
             logger.error(f"Error loading Robinhood history: {e}")
-            return []
-
-    def load_any_platform_csv(self, file_path: str, platform_name: str = "Other") -> List[Dict]:
+            return empty_trades()
+
+    @staticmethod
+    def _first_present(columns, candidates: Dict[str, List[str]]) -> Dict[str, str]:
+        """Map each trade field to the first candidate column present"""
+        present = set(columns)
+        columns_map = {}
+        for field, names in candidates.items():
+            for name in names:
+                if name in present:
+                    columns_map[field] = name
+                    break
+        return columns_map
+
+    @staticmethod
+    def detect_columns(header: Iterable[str]) -> Dict[str, str]:
+        """Detect trade columns from an export header (case-insensitive)"""
+        columns_map = {}
+        for col in header:
+            col_lower = col.lower()
+            if 'date' in col_lower or 'time' in col_lower:
+                columns_map['date'] = col
+            elif 'symbol' in col_lower or 'ticker' in col_lower or 'stock' in col_lower:
+                columns_map['symbol'] = col
+            elif 'side' in col_lower or 'action' in col_lower or 'type' in col_lower:
+                columns_map['side'] = col
+            elif 'quantity' in col_lower or 'shares' in col_lower or 'qty' in col_lower:
+                columns_map['quantity'] = col
+            elif 'price' in col_lower:
+                columns_map['price'] = col
+            elif 'profit' in col_lower or 'p/l' in col_lower or 'pnl' in col_lower:
+                columns_map['profit_loss'] = col
+        return columns_map
+
+    def _append_trades(self, trades: pd.DataFrame):
+        if self.trades.empty:
+            self.trades = trades
+        else:
+            # Categories differ between exports, so concat falls back to object - recast
+            combined = pd.concat([self.trades, trades], ignore_index=True)
+            for name, dtype in TRADE_COLUMNS.items():
+                if dtype == 'category' and combined[name].dtype != 'category':
+                    combined[name] = combined[name].astype('category')
+            self.trades = combined
+
+    def load_any_platform_csv(self, file_path: str, platform_name: str = "Other") -> pd.DataFrame:
         """
         Load trades from any platform's CSV export
 
-        Flexible parser - automatically detects columns
+        Flexible parser - automatically detects columns from the header,
+        then reads only the mapped columns
+
+        Returns:
+            Typed trade table (see TRADE_COLUMNS)
         """
         try:
             logger.info(f"📂 Loading {platform_name} history from {file_path}...")
 
-            df = pd.read_csv(file_path)
-
-            # Detect column names (case-insensitive)
-            columns_map = {}
-            for col in df.columns:
-                col_lower = col.lower()
-                if 'date' in col_lower or 'time' in col_lower:
-                    columns_map['date'] = col
-                elif 'symbol' in col_lower or 'ticker' in col_lower or 'stock' in col_lower:
-                    columns_map['symbol'] = col
-                elif 'side' in col_lower or 'action' in col_lower or 'type' in col_lower:
-                    columns_map['side'] = col
-                elif 'quantity' in col_lower or 'shares' in col_lower or 'qty' in col_lower:
-                    columns_map['quantity'] = col
-                elif 'price' in col_lower:
-                    columns_map['price'] = col
-                elif 'profit' in col_lower or 'p/l' in col_lower or 'pnl' in col_lower:
-                    columns_map['profit_loss'] = col
-
-            trades = []
-
-            for _, row in df.iterrows():
-                trade = {
-                    'platform': platform_name,
-                    'date': str(row.get(columns_map.get('date', ''), '')),
-                    'symbol': str(row.get(columns_map.get('symbol', ''), '')),
-                    'side': str(row.get(columns_map.get('side', ''), '')).upper(),
-                    'quantity': float(row.get(columns_map.get('quantity', 0), 0)),
-                    'price': float(row.get(columns_map.get('price', 0), 0)),
-                    'profit_loss': float(row.get(columns_map.get('profit_loss', 0), 0))
-                }
-                trades.append(trade)
-
-            self.trades.extend(trades)
+            # Known crypto / budgeting exports have native parsers - don't guess their columns
+            if detect_format(file_path)[0] is not None:
+                return self.load_ledger_export(file_path)
+
+            header = pd.read_csv(file_path, nrows=0).columns
+
+            columns_map = self.detect_columns(header)
+
+            df = pd.read_csv(file_path, usecols=sorted(set(columns_map.values())))
+            trades = to_trade_columns(df, columns_map, platform_name)
+            self._append_trades(trades)
             logger.info(f"✅ Loaded {len(trades)} trades from {platform_name}")
 
             return trades
 
         except Exception as e:
             logger.error(f"Error loading {platform_name} history: {e}")
-            return []
+            return empty_trades()
+
+    def load_ledger_export(self, file_path: str, format_name: Optional[str] = None) -> pd.DataFrame:
+        """
+        Import a Nexo, Robinhood Crypto or budgeting-app export into the ledger
+
+        All rows go to self.ledger and through the cost basis engine; the
+        lots it realizes are added to the trade table with their P/L.
+        Unchanged files that were already imported are skipped.
+
+        Returns:
+            Typed trade table of the realized lots (see TRADE_COLUMNS)
+        """
+        try:
+            entries = self.ledger.import_file(file_path, format_name)
+            trades = realized_trades(self.cost_basis.process_ledger(entries))
+            if not trades.empty:
+                self._append_trades(trades)
+                logger.info(f"✅ Loaded {len(trades)} realized trades from {file_path}")
+            return trades
+
+        except Exception as e:
+            logger.error(f"Error importing ledger export {file_path}: {e}")
+            return empty_trades()
 
     def analyze_patterns(self) -> Dict[str, Any]:
         """
@@ -151,14 +296,15 @@ class TradeHistoryAnalyzer:
         """
         logger.info("🔬 Analyzing your trading patterns...")
 
-        if not self.trades:
+        if self.trades.empty:
             logger.warning("No trades loaded. Upload your trade history first!")
             return {}
 
-        df = pd.DataFrame(self.trades)
+        df = self.trades
+        profit_loss = df['profit_loss']
 
         analysis = {
-            'total_trades': len(self.trades),
+            'total_trades': len(df),
             'profitable_trades': 0,
             'losing_trades': 0,
             'win_rate': 0.0,
@@ -173,44 +319,39 @@ class TradeHistoryAnalyzer:
         }
 
         # Calculate win rate
-        profitable = df[df['profit_loss'] > 0]
-        losing = df[df['profit_loss'] < 0]
+        profitable = profit_loss > 0
+        losing = profit_loss < 0
 
-        analysis['profitable_trades'] = len(profitable)
-        analysis['losing_trades'] = len(losing)
-        analysis['win_rate'] = (len(profitable) / len(df)) * 100 if len(df) > 0 else 0
+        analysis['profitable_trades'] = int(profitable.sum())
+        analysis['losing_trades'] = int(losing.sum())
+        analysis['win_rate'] = (analysis['profitable_trades'] / len(df)) * 100 if len(df) > 0 else 0
 
         # Profit/loss
-        analysis['total_profit'] = df[df['profit_loss'] > 0]['profit_loss'].sum()
-        analysis['total_loss'] = abs(df[df['profit_loss'] < 0]['profit_loss'].sum())
-        analysis['avg_profit_per_trade'] = df['profit_loss'].mean()
+        analysis['total_profit'] = profit_loss[profitable].sum()
+        analysis['total_loss'] = abs(profit_loss[losing].sum())
+        analysis['avg_profit_per_trade'] = profit_loss.mean()
 
         # Best/worst symbols
-        symbol_performance = df.groupby('symbol')['profit_loss'].agg(['sum', 'mean', 'count'])
+        symbol_performance = profit_loss.groupby(df['symbol'], observed=True).agg(['sum', 'mean', 'count'])
         symbol_performance = symbol_performance.sort_values('sum', ascending=False)
 
         analysis['best_symbols'] = symbol_performance.head(10).to_dict('index')
         analysis['worst_symbols'] = symbol_performance.tail(10).to_dict('index')
 
         # Entry time analysis (if datetime available)
-        try:
-            df['date'] = pd.to_datetime(df['date'])
-            df['hour'] = df['date'].dt.hour
-            df['day_of_week'] = df['date'].dt.dayofweek
-
+        dates = df['date']
+        if dates.notna().any():
             # Best hours to trade
-            hour_performance = df.groupby('hour')['profit_loss'].mean()
+            hour_performance = profit_loss.groupby(dates.dt.hour).mean()
             analysis['best_entry_times']['best_hours'] = hour_performance.nlargest(5).to_dict()
 
             # Best days to trade
-            day_performance = df.groupby('day_of_week')['profit_loss'].mean()
+            day_performance = profit_loss.groupby(dates.dt.dayofweek).mean()
             analysis['best_entry_times']['best_days'] = day_performance.nlargest(3).to_dict()
-        except:
-            pass
 
         # Position size analysis
-        df['position_size_bucket'] = pd.cut(df['quantity'], bins=5, labels=['XS', 'S', 'M', 'L', 'XL'])
-        size_performance = df.groupby('position_size_bucket')['profit_loss'].mean()
+        position_size_bucket = pd.cut(df['quantity'], bins=5, labels=['XS', 'S', 'M', 'L', 'XL'])
+        size_performance = profit_loss.groupby(position_size_bucket, observed=False).mean()
         analysis['optimal_position_sizes'] = size_performance.to_dict()
 
         # Learn patterns for future trades
@@ -226,13 +367,104 @@ class TradeHistoryAnalyzer:
 
         return analysis
 
+    def iter_trade_chunks(self, file_path: str, platform_name: str = "Other",
+                          chunksize: int = 250_000) -> Iterator[pd.DataFrame]:
+        """
+        Stream a CSV export as typed trade chunks
+
+        Robinhood exports use the Robinhood column names; known crypto and
+        budgeting exports use their native parsers and a per-file cost basis
+        engine (realized lots only); other
+        platforms use detect_columns(). Only the mapped columns are read.
+        """
+        format_name = detect_format(file_path)[0]
+        if format_name is not None:
+            engine = CostBasisEngine(self.cost_basis.method)
+            for entries in iter_ledger_chunks(file_path, format_name, chunksize):
+                yield realized_trades(engine.process_ledger(entries))
+            return
+
+        header = pd.read_csv(file_path, nrows=0).columns
+        if platform_name == 'Robinhood':
+            columns_map = self._first_present(header, ROBINHOOD_COLUMNS)
+        else:
+            columns_map = self.detect_columns(header)
+
+        for chunk in pd.read_csv(file_path, usecols=sorted(set(columns_map.values())), chunksize=chunksize):
+            yield to_trade_columns(chunk, columns_map, platform_name)
+
+    def aggregate_file(self, file_path: str, platform_name: str = "Other",
+                       chunksize: int = 250_000) -> TradeAggregates:
+        """
+        Partial aggregates for one export
+
+        Results from separate files or worker processes combine with
+        TradeAggregates.merge() and finish with analyze_aggregates().
+        """
+        aggregates = TradeAggregates()
+        rows = 0
+        for chunk in self.iter_trade_chunks(file_path, platform_name, chunksize):
+            aggregates.update(chunk)
+            rows += len(chunk)
+        logger.info(f"✅ Aggregated {rows} trades from {platform_name} ({file_path})")
+        return aggregates
+
+    def analyze_patterns_streaming(self, sources: Iterable[Tuple[str, str]],
+                                   chunksize: int = 250_000) -> Dict[str, Any]:
+        """
+        Analyze exports chunk by chunk with bounded memory
+
+        Trades are never held in memory; running aggregates are kept instead.
+        Position-size buckets come from a size sketch and are exact unless
+        there are more than a few thousand distinct sizes.
+
+        Args:
+            sources: (file_path, platform_name) pairs
+            chunksize: Rows per chunk
+
+        Returns:
+            Same analysis dict as analyze_patterns()
+        """
+        logger.info("🔬 Analyzing your trading patterns (streaming)...")
+
+        aggregates = TradeAggregates()
+        for file_path, platform_name in sources:
+            try:
+                aggregates.merge(self.aggregate_file(file_path, platform_name, chunksize))
+            except Exception as e:
+                logger.error(f"Error aggregating {platform_name} history: {e}")
+
+        return self.analyze_aggregates(aggregates)
+
+    def analyze_aggregates(self, aggregates: TradeAggregates) -> Dict[str, Any]:
+        """Finish an analysis from (merged) TradeAggregates"""
+        if not aggregates.total_trades:
+            logger.warning("No trades loaded. Upload your trade history first!")
+            return {}
+
+        analysis = aggregates.to_analysis()
+        self.patterns_learned = aggregates.winning_patterns()
+        analysis['learned_patterns'] = self.patterns_learned
+
+        logger.info("✅ Analysis complete!")
+        logger.info(f"   Total trades: {analysis['total_trades']}")
+        logger.info(f"   Win rate: {analysis['win_rate']:.2f}%")
+        logger.info(f"   Total profit: ${analysis['total_profit']:,.2f}")
+        logger.info(f"   Total loss: ${analysis['total_loss']:,.2f}")
+        logger.info(f"   Best symbols: {list(analysis['best_symbols'].keys())[:5]}")
+
+        return analysis
+
     def _extract_winning_patterns(self, df: pd.DataFrame) -> Dict:
         """Extract patterns from winning trades"""
         winning_trades = df[df['profit_loss'] > 0]
+        # Categorical value_counts lists unused categories too - drop them
+        symbol_counts = winning_trades['symbol'].value_counts()
+        action_counts = winning_trades['side'].value_counts()
 
         patterns = {
-            'high_win_rate_symbols': list(winning_trades['symbol'].value_counts().head(10).index),
-            'profitable_actions': winning_trades['side'].value_counts().to_dict(),
+            'high_win_rate_symbols': list(symbol_counts[symbol_counts > 0].head(10).index),
+            'profitable_actions': {side: int(count) for side, count in action_counts.items() if count > 0},
             'avg_winning_size': winning_trades['quantity'].mean(),
             'avg_winning_price': winning_trades['price'].mean(),
             'common_patterns': []
@@ -0,0 +1,315 @@
+"""
+Pre-Trade Risk Engine
+Central enforcement of trading_risk_profiles.json limits
+
+Keeps rolling counters per account and per profile (trades today, open
+positions, realized P&L for the current day and week, equity peak) that are
+updated on every open/close, so a pre-trade check is a handful of dict
+lookups and comparisons - no scan over trade history.
+
+Limits enforced:
+- confidence_threshold, patterns_enabled, max_trades_per_day
+- max_concurrent_trades
+- max_daily_loss / max_weekly_loss   (halt until the day / week rolls)
+- emergency_halt_threshold           (drawdown from peak; halt until resume())
+
+Profile counters aggregate every account on the profile and are held to the
+same percentages, so a profile-wide losing day halts all of its accounts.
+"""
+
+import json
+import threading
+import logging
+from datetime import datetime, date, timedelta
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger('RiskEngine')
+
+DEFAULT_PROFILES_PATH = Path(__file__).parent.parent / 'config' / 'trading_risk_profiles.json'
+
+
+class RiskCounters:
+    """Rolling counters for one account or one profile"""
+
+    def __init__(self, equity: float = 0.0):
+        self.day: Optional[date] = None
+        self.week: Optional[date] = None
+        self.day_start_equity = equity
+        self.week_start_equity = equity
+        self.equity = equity
+        self.peak_equity = equity
+        self.trades_today = 0
+        self.open_positions = 0
+        self.daily_pnl = 0.0
+        self.weekly_pnl = 0.0
+        self.halted_until: Optional[date] = None  # date.max = until resume()
+        self.halt_reason: Optional[str] = None
+
+    def roll(self, today: date):
+        """Reset day / week windows when the calendar moves on"""
+        if self.day != today:
+            self.day = today
+            self.day_start_equity = self.equity
+            self.trades_today = 0
+            self.daily_pnl = 0.0
+
+        week_start = today - timedelta(days=today.weekday())
+        if self.week != week_start:
+            self.week = week_start
+            self.week_start_equity = self.equity
+            self.weekly_pnl = 0.0
+
+        if self.halted_until is not None and self.halted_until != date.max and today >= self.halted_until:
+            logger.info(f"▶️ Risk halt lifted ({self.halt_reason})")
+            self.halted_until = None
+            self.halt_reason = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'equity': self.equity,
+            'peak_equity': self.peak_equity,
+            'trades_today': self.trades_today,
+            'open_positions': self.open_positions,
+            'daily_pnl': self.daily_pnl,
+            'weekly_pnl': self.weekly_pnl,
+            'halted': self.halted_until is not None,
+            'halt_reason': self.halt_reason
+        }
+
+
+class RiskEngine:
+    """Shared pre-trade risk checks for backtests, the 24/7 fleet and Agent 3.0"""
+
+    def __init__(self, profiles_path: Optional[Path] = None):
+        self.profiles = self.load_profiles(profiles_path or DEFAULT_PROFILES_PATH)
+        self.accounts: Dict[str, RiskCounters] = {}
+        self.account_limits: Dict[str, Dict[str, Any]] = {}
+        self.account_profiles: Dict[str, str] = {}
+        self.profile_counters: Dict[str, RiskCounters] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def load_profiles(path: Path) -> Dict[str, Dict[str, Any]]:
+        """Flatten each profile's risk_parameters and trade filters into one limits dict"""
+        try:
+            with open(path, 'r') as f:
+                profiles = json.load(f).get('profiles', {})
+        except Exception as e:
+            logger.error(f"Failed to load risk profiles: {e}")
+            return {}
+
+        limits = {}
+        for name, profile in profiles.items():
+            entry = dict(profile.get('risk_parameters', {}))
+            entry['max_trades_per_day'] = profile.get('max_trades_per_day')
+            entry['stop_loss_percentage'] = profile.get('stop_loss_percentage', 0.02)
+            entry['patterns_enabled'] = frozenset(profile.get('patterns_enabled', []))
+            limits[name] = entry
+        return limits
+
+    # ------------------------------------------------------------ registration
+
+    def register_account(self, account_id: str, profile: str, capital: float,
+                         limits: Optional[Dict[str, Any]] = None):
+        """
+        Start tracking an account
+
+        Args:
+            account_id: Account identifier
+            profile: Risk profile name (beginner / novice / advanced)
+            capital: Current equity
+            limits: Overrides for the profile's limits
+        """
+        with self._lock:
+            merged = dict(self.profiles.get(profile, {}))
+            merged.update(limits or {})
+            if 'patterns_enabled' in merged and not isinstance(merged['patterns_enabled'], frozenset):
+                merged['patterns_enabled'] = frozenset(merged['patterns_enabled'])
+
+            self.account_limits[account_id] = merged
+            self.account_profiles[account_id] = profile
+            self.accounts[account_id] = RiskCounters(capital)
+
+            profile_counters = self.profile_counters.setdefault(profile, RiskCounters(0.0))
+            profile_counters.equity += capital
+            profile_counters.peak_equity += capital
+            profile_counters.day_start_equity += capital
+            profile_counters.week_start_equity += capital
+
+    # ----------------------------------------------------------------- checks
+
+    def check_trade(self, account_id: str, confidence: float = 1.0, pattern: Optional[str] = None,
+                    now: Optional[datetime] = None) -> Tuple[bool, str]:
+        """
+        Constant-time pre-trade check
+
+        Returns:
+            (allowed, reason)
+        """
+        with self._lock:
+            counters = self.accounts.get(account_id)
+            if counters is None:
+                return False, f"Unknown account {account_id}"
+
+            today = (now or datetime.now()).date()
+            counters.roll(today)
+            limits = self.account_limits[account_id]
+
+            profile = self.profile_counters[self.account_profiles[account_id]]
+            profile.roll(today)
+            if profile.halted_until is not None:
+                return False, f"Profile halted: {profile.halt_reason}"
+            if counters.halted_until is not None:
+                return False, f"Account halted: {counters.halt_reason}"
+
+            threshold = limits.get('confidence_threshold')
+            if threshold is not None and confidence < threshold:
+                return False, f"Confidence {confidence:.2f} below threshold {threshold}"
+
+            patterns = limits.get('patterns_enabled')
+            if patterns and pattern is not None and pattern not in patterns:
+                return False, f"Pattern {pattern} not enabled"
+
+            max_trades = limits.get('max_trades_per_day')
+            if max_trades is not None and counters.trades_today >= max_trades:
+                return False, f"Daily trade limit reached ({max_trades})"
+
+            max_concurrent = limits.get('max_concurrent_trades')
+            if max_concurrent is not None and counters.open_positions >= max_concurrent:
+                return False, f"Max concurrent trades reached ({max_concurrent})"
+
+            return True, "OK"
+
+    def position_size(self, account_id: str, stop_distance_pct: Optional[float] = None) -> float:
+        """
+        Position value sized so a stop-out loses risk_per_trade of equity,
+        capped at max_position_size of equity
+
+        Args:
+            account_id: Account identifier
+            stop_distance_pct: Stop distance as a fraction of entry (default: profile stop)
+        """
+        with self._lock:
+            counters = self.accounts[account_id]
+            limits = self.account_limits[account_id]
+            return counters.equity * self.position_fraction(limits, stop_distance_pct)
+
+    @staticmethod
+    def position_fraction(limits: Dict[str, Any], stop_distance_pct: Optional[float] = None) -> float:
+        """Fraction of equity to commit given risk_per_trade and the stop distance"""
+        max_fraction = limits.get('max_position_size', 0.02)
+        stop = stop_distance_pct or limits.get('stop_loss_percentage')
+        risk_per_trade = limits.get('risk_per_trade')
+        if not stop or risk_per_trade is None:
+            return max_fraction
+        return min(max_fraction, risk_per_trade / stop)
+
+    # ---------------------------------------------------------------- updates
+
+    def record_open(self, account_id: str, now: Optional[datetime] = None, concurrent: bool = True):
+        """
+        Count a new trade
+
+        Args:
+            concurrent: Also count it as an open position (False when the caller
+                never learns about closes, e.g. fire-and-forget webhooks)
+        """
+        with self._lock:
+            today = (now or datetime.now()).date()
+            for counters in self._counters_for(account_id):
+                counters.roll(today)
+                counters.trades_today += 1
+                if concurrent:
+                    counters.open_positions += 1
+
+    def restore_open(self, account_id: str, count: int):
+        """
+        Adopt positions that were already open before a restart
+
+        They count against max_concurrent_trades but not as new trades today.
+
+        Args:
+            account_id: Account identifier
+            count: Open positions restored for the account
+        """
+        with self._lock:
+            for counters in self._counters_for(account_id):
+                counters.open_positions += count
+
+    def record_close(self, account_id: str, pnl: float, now: Optional[datetime] = None):
+        """Apply realized P&L from a closed position and trigger halts"""
+        with self._lock:
+            today = (now or datetime.now()).date()
+            limits = self.account_limits.get(account_id, {})
+
+            for counters in self._counters_for(account_id):
+                counters.roll(today)
+                counters.open_positions = max(0, counters.open_positions - 1)
+                counters.daily_pnl += pnl
+                counters.weekly_pnl += pnl
+                counters.equity += pnl
+                counters.peak_equity = max(counters.peak_equity, counters.equity)
+                self._check_halts(counters, limits, today)
+
+    def resume(self, account_id: Optional[str] = None, profile: Optional[str] = None):
+        """Manually lift a halt (required after an emergency halt)"""
+        with self._lock:
+            targets = []
+            if account_id in self.accounts:
+                targets.append(self.accounts[account_id])
+            if profile in self.profile_counters:
+                targets.append(self.profile_counters[profile])
+            for counters in targets:
+                counters.halted_until = None
+                counters.halt_reason = None
+
+    def _counters_for(self, account_id: str):
+        counters = self.accounts.get(account_id)
+        if counters is None:
+            return []
+        return [counters, self.profile_counters[self.account_profiles[account_id]]]
+
+    @staticmethod
+    def _check_halts(counters: RiskCounters, limits: Dict[str, Any], today: date):
+        if counters.halted_until == date.max:
+            return
+
+        emergency = limits.get('emergency_halt_threshold')
+        if emergency and counters.peak_equity > 0 and \
+                (counters.peak_equity - counters.equity) / counters.peak_equity >= emergency:
+            counters.halted_until = date.max
+            counters.halt_reason = f"EMERGENCY_HALT: drawdown >= {emergency:.0%}"
+            logger.error(f"🛑 {counters.halt_reason}")
+            return
+
+        weekly = limits.get('max_weekly_loss')
+        if weekly and counters.week_start_equity > 0 and \
+                -counters.weekly_pnl >= weekly * counters.week_start_equity:
+            counters.halted_until = counters.week + timedelta(days=7)
+            counters.halt_reason = f"MAX_WEEKLY_LOSS: {weekly:.0%}"
+            logger.warning(f"⏸️ {counters.halt_reason}")
+            return
+
+        daily = limits.get('max_daily_loss')
+        if daily and counters.day_start_equity > 0 and \
+                -counters.daily_pnl >= daily * counters.day_start_equity:
+            counters.halted_until = today + timedelta(days=1)
+            counters.halt_reason = f"MAX_DAILY_LOSS: {daily:.0%}"
+            logger.warning(f"⏸️ {counters.halt_reason}")
+
+    # ----------------------------------------------------------------- status
+
+    def is_halted(self, account_id: str) -> bool:
+        with self._lock:
+            counters = self.accounts.get(account_id)
+            return counters is not None and counters.halted_until is not None
+
+    def get_status(self, account_id: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            if account_id is not None:
+                return self.accounts[account_id].to_dict()
+            return {
+                'accounts': {aid: c.to_dict() for aid, c in self.accounts.items()},
+                'profiles': {name: c.to_dict() for name, c in self.profile_counters.items()}
+            }
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+AI Response Cache - Reuse consensus answers while the market hasn't moved
+Keyed on a canonical, bucketed view of the prompt inputs
+
+Two polls of the same symbol map to the same key when the rounded price,
+RSI bucket, whole-percent 24h change, MACD label and sentiment labels are
+unchanged. Entries expire after a TTL, the cache is bounded with LRU
+eviction, and it can be persisted to a JSON file so answers survive a
+restart. Hit / miss counters show how much Zapier quota it saves.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger('AIResponseCache')
+
+
+class AIResponseCache:
+    """TTL + LRU cache of AI consensus results"""
+
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = 1024,
+                 path: Optional[str] = None, price_sig_digits: int = 4,
+                 rsi_bucket: float = 10, persist_interval: float = 5.0):
+        """
+        Args:
+            ttl_seconds: Entry lifetime
+            max_entries: LRU bound
+            path: JSON file for persistence (None = memory only)
+            price_sig_digits: Significant digits kept of the price
+            rsi_bucket: RSI bucket width
+            persist_interval: Minimum seconds between disk writes
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        self.price_sig_digits = price_sig_digits
+        self.rsi_bucket = rsi_bucket
+        self.persist_interval = persist_interval
+
+        self.entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()   # key -> {'value', 'stored_at'}
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'stores': 0}
+        self._dirty = False
+        self._last_persist = 0.0
+
+        if self.path is not None:
+            self.load()
+
+    # ---------------------------------------------------------------- keys
+
+    def _round_price(self, price) -> Optional[float]:
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            return None
+        if price == 0:
+            return 0.0
+        return float(f"{price:.{self.price_sig_digits}g}")
+
+    def canonicalize(self, market_data: Dict) -> Dict[str, Any]:
+        """The bucketed inputs that decide whether a cached answer still applies"""
+        try:
+            rsi_bucket = int(float(market_data.get('rsi', 50)) // self.rsi_bucket)
+        except (TypeError, ValueError):
+            rsi_bucket = None
+        try:
+            change = round(float(market_data.get('change_24h', 0)))
+        except (TypeError, ValueError):
+            change = None
+
+        def label(name, default):
+            return str(market_data.get(name, default)).strip().lower()
+
+        return {
+            'symbol': str(market_data.get('symbol', '')).upper(),
+            'price': self._round_price(market_data.get('price', 0)),
+            'rsi_bucket': rsi_bucket,
+            'change_24h': change,
+            'macd': label('macd', 'n/a'),
+            'news_sentiment': label('news_sentiment', 'neutral'),
+            'social_sentiment': label('social_sentiment', 'neutral')
+        }
+
+    def make_key(self, market_data: Dict) -> str:
+        canonical = json.dumps(self.canonicalize(market_data), sort_keys=True)
+        return hashlib.sha1(canonical.encode()).hexdigest()
+
+    # ------------------------------------------------------------ get / put
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached value, or None on a miss / expired entry"""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            if now - entry['stored_at'] > self.ttl_seconds:
+                del self.entries[key]
+                self._dirty = True
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry['value']
+
+    def put(self, key: str, value: Dict[str, Any]):
+        with self.lock:
+            self.entries[key] = {'value': value, 'stored_at': time.time()}
+            self.entries.move_to_end(key)
+            self.stats['stores'] += 1
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats['evictions'] += 1
+            self._dirty = True
+
+        if self.path is not None and time.time() - self._last_persist >= self.persist_interval:
+            self.save()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self._dirty = True
+
+    # --------------------------------------------------------- persistence
+
+    def save(self):
+        """Write live entries to disk (atomic replace)"""
+        if self.path is None:
+            return
+        now = time.time()
+        with self.lock:
+            if not self._dirty:
+                return
+            live = {key: entry for key, entry in self.entries.items()
+                    if now - entry['stored_at'] <= self.ttl_seconds}
+            self._dirty = False
+            self._last_persist = now
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+            with open(tmp, 'w') as f:
+                json.dump(live, f, default=str)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.error(f"❌ Failed to persist AI response cache: {e}")
+
+    def load(self):
+        """Load unexpired entries from disk (oldest first, so LRU order is kept)"""
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+        except Exception as e:
+            logger.error(f"❌ Failed to load AI response cache: {e}")
+            return
+
+        now = time.time()
+        live = sorted(((key, entry) for key, entry in stored.items()
+                       if now - entry.get('stored_at', 0) <= self.ttl_seconds),
+                      key=lambda item: item[1]['stored_at'])
+        with self.lock:
+            for key, entry in live[-self.max_entries:]:
+                self.entries[key] = entry
+        logger.info(f"💾 Loaded {len(self.entries)} cached AI responses from {self.path}")
+
+    # ------------------------------------------------------------- metrics
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'entries': len(self.entries),
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0.0,
+            'ttl_seconds': self.ttl_seconds,
+            'max_entries': self.max_entries
+        }
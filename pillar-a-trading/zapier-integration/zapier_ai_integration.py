@@ -31,12 +31,22 @@ FREE ZAPIER APPS FOR TRADING DATA:
 """
 
 import os
+import re
+import sys
 import json
-import requests
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'core-systems', 'api-connectors'))
+
+from http_transport import HTTPTransport, get_transport
+from ai_response_cache import AIResponseCache
+from zapier_outbox import ZapierOutbox, get_outbox
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('ZapierAI')
 
@@ -47,10 +57,35 @@ class ZapierAIIntegration:
     Uses ALL free Zapier AI tools and automations
     """
 
-    def __init__(self):
+    SIGNALS = ('BUY', 'SELL', 'HOLD')
+
+    def __init__(self, max_concurrency: int = 16, cache: Optional[AIResponseCache] = None,
+                 outbox: Optional[ZapierOutbox] = None):
+        """
+        Args:
+            max_concurrency: Parallel AI requests (worker threads and pooled connections)
+            cache: Consensus response cache (default: TTL from ZAPIER_AI_CACHE_TTL,
+                persisted to ZAPIER_AI_CACHE_FILE when set)
+            outbox: Delivery queue for fire-and-forget webhooks (default: shared process outbox)
+        """
         self.mcp_endpoint = os.getenv('ZAPIER_MCP_ENDPOINT', 'https://mcp.zapier.com/api/mcp/mcp')
         self.bearer_token = os.getenv('ZAPIER_MCP_BEARER_TOKEN', '')
         self.webhook_urls = self._load_webhook_urls()
+
+        # Shared keep-alive pools; a dedicated transport only if the shared pools are too small
+        shared = get_transport()
+        self.transport = shared if max_concurrency <= shared.pool_maxsize else HTTPTransport(pool_maxsize=max_concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='ZapierAI')
+        self.cache = cache if cache is not None else AIResponseCache(
+            ttl_seconds=float(os.getenv('ZAPIER_AI_CACHE_TTL', '300')),
+            path=os.getenv('ZAPIER_AI_CACHE_FILE') or None
+        )
+        self.outbox = outbox if outbox is not None else get_outbox()
+        self.models = {
+            'chatgpt': self.analyze_with_chatgpt,
+            'claude': self.analyze_with_claude,
+            'gemini': self.analyze_with_gemini
+        }
         logger.info("=" * 70)
         logger.info("🤖 ZAPIER AI INTEGRATION INITIALIZED")
         logger.info("=" * 70)
@@ -65,7 +100,7 @@ class ZapierAIIntegration:
             'error_alert': os.getenv('ZAPIER_ERROR_ALERT_WEBHOOK', '')
         }
 
-    def analyze_with_chatgpt(self, prompt: str) -> Dict:
+    def analyze_with_chatgpt(self, prompt: str, timeout: float = 30) -> Dict:
         """
         Use ChatGPT via Zapier AI to analyze market data
 
@@ -82,14 +117,16 @@ class ZapierAIIntegration:
 
             # Send to Zapier webhook
             if self.webhook_urls.get('trade_signal'):
-                response = requests.post(
+                response = self.transport.post(
                     self.webhook_urls['trade_signal'],
                     json=data,
-                    timeout=30
+                    timeout=timeout
                 )
 
+                if not 200 <= response.status_code < 300:
+                    return {'error': f'HTTP {response.status_code}'}
                 return {
-                    'analysis': response.json() if response.status_code == 200 else {},
+                    'analysis': response.json(),
                     'model': 'ChatGPT',
                     'via': 'Zapier AI',
                     'free': True
@@ -101,7 +138,7 @@ class ZapierAIIntegration:
             logger.error(f"ChatGPT analysis error: {e}")
             return {'error': str(e)}
 
-    def analyze_with_claude(self, prompt: str) -> Dict:
+    def analyze_with_claude(self, prompt: str, timeout: float = 30) -> Dict:
         """
         Use Claude via Zapier AI for advanced analysis
 
@@ -121,15 +158,17 @@ class ZapierAIIntegration:
                 'Content-Type': 'application/json'
             }
 
-            response = requests.post(
+            response = self.transport.post(
                 self.mcp_endpoint,
                 headers=headers,
                 json={'action': 'claude_analyze', 'data': data},
-                timeout=30
+                timeout=timeout
             )
 
+            if not 200 <= response.status_code < 300:
+                return {'error': f'HTTP {response.status_code}'}
             return {
-                'analysis': response.json() if response.status_code == 200 else {},
+                'analysis': response.json(),
                 'model': 'Claude',
                 'via': 'Zapier MCP',
                 'free': True
@@ -139,7 +178,7 @@ class ZapierAIIntegration:
             logger.error(f"Claude analysis error: {e}")
             return {'error': str(e)}
 
-    def analyze_with_gemini(self, prompt: str) -> Dict:
+    def analyze_with_gemini(self, prompt: str, timeout: float = 30) -> Dict:
         """
         Use Gemini via Zapier AI for multi-modal analysis
 
@@ -165,16 +204,8 @@ class ZapierAIIntegration:
             logger.error(f"Gemini analysis error: {e}")
             return {'error': str(e)}
 
-    def get_consensus_ai_signal(self, market_data: Dict) -> Dict:
-        """
-        Get consensus trading signal from multiple AIs
-
-        Uses: ChatGPT + Claude + Gemini (all FREE via Zapier)
-        This increases accuracy to 91-95%!
-        """
-        logger.info("🤖 Getting consensus from ChatGPT, Claude, and Gemini...")
-
-        prompt = f"""
+    def _build_consensus_prompt(self, market_data: Dict) -> str:
+        return f"""
         Analyze this market data and provide a trading signal (BUY/SELL/HOLD):
 
         Symbol: {market_data.get('symbol')}
@@ -195,38 +226,212 @@ class ZapierAIIntegration:
         Be concise and data-driven.
         """
 
-        # Get analysis from all three AIs
-        chatgpt_analysis = self.analyze_with_chatgpt(prompt)
-        claude_analysis = self.analyze_with_claude(prompt)
-        gemini_analysis = self.analyze_with_gemini(prompt)
+    def _parse_signal(self, result: Dict) -> Optional[Dict]:
+        """Pull {'signal', 'confidence'} out of a model result (None if it has no signal)"""
+        if not isinstance(result, dict) or 'error' in result:
+            return None
+        analysis = result.get('analysis')
+
+        signal, confidence = None, None
+        if isinstance(analysis, dict):
+            for key in ('signal', 'trading_signal', 'action'):
+                value = str(analysis.get(key, '')).upper()
+                if value in self.SIGNALS:
+                    signal = value
+                    break
+            confidence = analysis.get('confidence')
+            text = json.dumps(analysis)
+        else:
+            text = str(analysis or '')
+
+        if signal is None:
+            match = re.search(r'\b(BUY|SELL|HOLD)\b', text.upper())
+            if match is None:
+                return None
+            signal = match.group(1)
+        if confidence is None:
+            match = re.search(r'(\d+(?:\.\d+)?)\s*%', text)
+            confidence = float(match.group(1)) if match else None
+
+        try:
+            confidence = float(confidence) if confidence is not None else None
+        except (TypeError, ValueError):
+            confidence = None
+        return {'signal': signal, 'confidence': confidence}
+
+    def _quorum_signal(self, results: Dict[str, Dict], quorum: int) -> Optional[str]:
+        votes: Dict[str, int] = {}
+        for result in results.values():
+            parsed = self._parse_signal(result)
+            if parsed is not None:
+                votes[parsed['signal']] = votes.get(parsed['signal'], 0) + 1
+                if votes[parsed['signal']] >= quorum:
+                    return parsed['signal']
+        return None
+
+    def get_consensus_signals(self, markets: List[Dict], deadline: float = 30.0,
+                              quorum: int = 2) -> List[Dict]:
+        """
+        Consensus signals for many symbols, all model requests in flight at once
+
+        Every (symbol, model) request is dispatched to the shared pool
+        immediately. A symbol is settled as soon as `quorum` models agree;
+        its outstanding requests are then cancelled (queued ones never run,
+        running ones are abandoned and bounded by their timeout). A request
+        that only reaches a worker after the deadline returns without calling
+        the model, and each call gets the time left when it starts. Whatever
+        has not answered by the deadline is dropped.
+
+        Answers are served from the response cache when the bucketed market
+        inputs match a fresh entry; identical inputs in one batch are only
+        sent once.
+
+        Args:
+            markets: Market data dicts (see get_consensus_ai_signal)
+            deadline: Overall seconds for the whole batch
+            quorum: Agreeing models needed to settle a symbol
+
+        Returns:
+            Consensus dicts, in markets order
+        """
+        keys = [self.cache.make_key(market_data) for market_data in markets]
+        answers: Dict[str, Dict] = {}
+        pending: Dict[str, Dict] = {}
+        for key, market_data in zip(keys, markets):
+            if key in answers or key in pending:
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                answers[key] = dict(cached, cached=True)
+            else:
+                pending[key] = market_data
+
+        if pending:
+            fresh = self._fan_out(list(pending.values()), deadline, quorum)
+            for key, (consensus, cacheable) in zip(pending, fresh):
+                answers[key] = consensus
+                if cacheable:
+                    self.cache.put(key, consensus)
+
+        return [dict(answers[key], symbol=market_data.get('symbol'))
+                for key, market_data in zip(keys, markets)]
+
+    def _fan_out(self, markets: List[Dict], deadline: float, quorum: int) -> List[tuple]:
+        """Query every model for every market concurrently; returns [(consensus, cacheable)]"""
+        started = time.monotonic()
+        end = started + deadline
+        results: List[Dict[str, Dict]] = [{} for _ in markets]
+        futures: List[Dict[str, Any]] = [{} for _ in markets]
+        owners = {}
+        settled = set()
+
+        for i, market_data in enumerate(markets):
+            prompt = self._build_consensus_prompt(market_data)
+            for name, analyze in self.models.items():
+                future = self.executor.submit(self._call_before, analyze, prompt, end)
+                futures[i][name] = future
+                owners[future] = (i, name)
 
-        # Combine results for consensus
+        try:
+            for future in as_completed(list(owners), timeout=max(0.0, end - time.monotonic())):
+                i, name = owners[future]
+                if i in settled or future.cancelled():
+                    continue
+                results[i][name] = future.result()
+                if len(results[i]) == len(self.models) or self._quorum_signal(results[i], quorum):
+                    settled.add(i)
+                    for other in futures[i].values():
+                        other.cancel()
+                    if len(settled) == len(markets):
+                        break
+        except FuturesTimeout:
+            logger.warning(f"⏱️ AI consensus deadline ({deadline:.1f}s) reached - "
+                           f"{len(markets) - len(settled)} symbols without quorum")
+
+        for i in range(len(markets)):
+            for name, future in futures[i].items():
+                if name not in results[i]:
+                    future.cancel()
+                    results[i][name] = {'error': 'cancelled' if i in settled else 'deadline exceeded'}
+
+        elapsed = time.monotonic() - started
+        # Only a real quorum is worth caching - a default HOLD would freeze the signal for the TTL
+        return [(self._combine_consensus(market_data, results[i], quorum, elapsed),
+                 self._quorum_signal(results[i], quorum) is not None)
+                for i, market_data in enumerate(markets)]
+
+    @staticmethod
+    def _call_before(analyze, prompt: str, end: float) -> Dict:
+        """Run one model call with whatever is left of the deadline when a worker picks it up"""
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            return {'error': 'deadline exceeded'}
+        return analyze(prompt, timeout=remaining)
+
+    def _combine_consensus(self, market_data: Dict, results: Dict[str, Dict], quorum: int,
+                           elapsed: float) -> Dict:
         consensus = {
             'timestamp': datetime.now().isoformat(),
             'symbol': market_data.get('symbol'),
             'ai_models_used': ['ChatGPT', 'Claude', 'Gemini'],
-            'chatgpt': chatgpt_analysis,
-            'claude': claude_analysis,
-            'gemini': gemini_analysis,
+            'chatgpt': results.get('chatgpt', {}),
+            'claude': results.get('claude', {}),
+            'gemini': results.get('gemini', {}),
             'consensus_signal': 'HOLD',  # Default
             'consensus_confidence': 0.0,
             'agreement_level': 'low',
+            'latency_seconds': round(elapsed, 3),
+            'cached': False,
             'via': 'Zapier AI (FREE)'
         }
 
-        # Calculate consensus (simplified - in production, parse AI responses)
-        # When all 3 AIs agree, confidence is 91-95%!
+        signal = self._quorum_signal(results, quorum)
+        if signal is not None:
+            agreeing = [parsed for parsed in map(self._parse_signal, results.values())
+                        if parsed is not None and parsed['signal'] == signal]
+            confidences = [parsed['confidence'] for parsed in agreeing if parsed['confidence'] is not None]
+            consensus['consensus_signal'] = signal
+            # Model-reported confidence when given, otherwise the share of models agreeing
+            consensus['consensus_confidence'] = (sum(confidences) / len(confidences) if confidences
+                                                 else len(agreeing) / len(self.models) * 100)
+            consensus['agreement_level'] = 'high' if len(agreeing) == len(self.models) else 'medium'
+
+        return consensus
+
+    def get_consensus_ai_signal(self, market_data: Dict, deadline: float = 30.0,
+                                quorum: int = 2) -> Dict:
+        """
+        Get consensus trading signal from multiple AIs
+
+        Uses: ChatGPT + Claude + Gemini (all FREE via Zapier)
+        This increases accuracy to 91-95%!
+
+        The models are queried concurrently; the answer is ready as soon as
+        `quorum` of them agree or the deadline passes.
+        """
+        logger.info("🤖 Getting consensus from ChatGPT, Claude, and Gemini...")
+
+        consensus = self.get_consensus_signals([market_data], deadline, quorum)[0]
 
         logger.info(f"✅ AI Consensus: {consensus['consensus_signal']} "
                    f"@ {consensus['consensus_confidence']:.0f}% confidence")
 
         return consensus
 
+    def close(self):
+        """Stop the worker pool, release a dedicated transport and persist the cache"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.cache.save()
+        if self.transport is not get_transport():
+            self.transport.close()
+
     def send_trade_to_google_sheets(self, trade_data: Dict) -> bool:
         """
         Log trade to Google Sheets via Zapier (FREE)
 
-        This creates a permanent record of all trades
+        This creates a permanent record of all trades. Rows are queued on the
+        outbox and delivered in batches; True means the row was queued (as
+        low-priority sheet logging, so the budget may hold it until the reset).
         """
         try:
             if not self.webhook_urls.get('trade_signal'):
@@ -245,19 +450,11 @@ class ZapierAIIntegration:
                 'account': trade_data.get('account')
             }
 
-            # Send to Zapier webhook → Google Sheets
-            response = requests.post(
-                self.webhook_urls['trade_signal'],
-                json=sheets_data,
-                timeout=10
-            )
-
-            if response.status_code == 200:
-                logger.info(f"✅ Trade logged to Google Sheets: {trade_data.get('symbol')}")
-                return True
-            else:
-                logger.error(f"Failed to log trade: {response.status_code}")
-                return False
+            # Queue for the Zapier webhook → Google Sheets
+            self.outbox.enqueue_webhook(self.webhook_urls['trade_signal'], sheets_data,
+                                        batch_key='google_sheets', zap_name='Log to Google Sheets',
+                                        priority='low')
+            return True
 
         except Exception as e:
             logger.error(f"Google Sheets logging error: {e}")
@@ -281,10 +478,9 @@ class ZapierAIIntegration:
             }
 
             if self.webhook_urls.get('market_alert'):
-                response = requests.post(
+                response = self.transport.post(
                     self.webhook_urls['market_alert'],
-                    json=email_data,
-                    timeout=10
+                    json=email_data
                 )
 
                 if response.status_code == 200:
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Zapier Budget - Spending-cap-aware admission control for Zapier traffic
+Keeps task capacity for trade signals and alerts, defers the rest
+
+The daily task cap resets at 3am. Task use is counted locally per zap and
+per priority for the current window. Each priority's burn rate (the
+higher of today's rate and yesterday's average) projects the demand
+still to come. A call is admitted only if the remaining tasks, after it,
+still cover the projected demand of every more important priority, and
+never less than a floor share of the cap (RESERVE_SHARES):
+
+    critical  error alerts                  admitted while any task is left
+    high      trade signals, email alerts   keeps room for projected critical
+    normal    notifications, uploads        keeps room for critical + high
+    low       sheet logs, daily summaries   keeps room for critical + high + normal
+
+ZapierOutbox.enqueue() asks admit() for every message, so MCP zaps and
+plain webhooks are counted alike. Messages that are not admitted are held
+(journaled) by the outbox and released highest priority first once the
+window resets. A 403/429 seen from the MCP endpoint marks the cap as
+reached until the next reset.
+
+admit() only touches in-memory counters, so enqueue never does file I/O
+or waits on another process. The counters are shared by every process
+using the same budget file: a background merger adds this process's
+admissions since the last merge to the file's totals (re-read under an
+exclusive flock on <file>.lock) and adopts the result every
+`merge_interval` seconds. Other processes' traffic is therefore seen
+with at most that much lag.
+"""
+
+import os
+import json
+import atexit
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+try:
+    import fcntl
+except ImportError:   # Windows: no cross-process lock, so each process keeps its own file
+    fcntl = None
+
+logger = logging.getLogger('ZapierBudget')
+
+PRIORITIES = ('critical', 'high', 'normal', 'low')
+
+ZAP_PRIORITIES = {
+    'Error Alert': 'critical',
+    'Trading Signal Handler': 'high',
+    'Email Alert': 'high',
+    'Legal Case Notification': 'normal',
+    'Upload to SharePoint': 'normal',
+    'Webhook': 'normal',
+    'Log to Google Sheets': 'low',
+    'Daily Summary': 'low'
+}
+
+# Share of the daily cap each priority must leave free for the ones above it
+RESERVE_SHARES = {'critical': 0.0, 'high': 0.05, 'normal': 0.2, 'low': 0.35}
+
+CAP_STATUS_CODES = {403, 429}
+MIN_RATE_WINDOW = 900.0   # seconds of history before a burn rate is trusted as-is
+
+
+class ZapierBudget:
+    """Per-window task accounting, exhaustion forecast and priority admission"""
+
+    def __init__(self, daily_cap: Optional[int] = None, reset_hour: int = 3,
+                 reserve_shares: Optional[Dict[str, float]] = None, path: Optional[str] = None,
+                 merge_interval: float = 2.0):
+        """
+        Args:
+            daily_cap: Tasks per window (default: ZAPIER_DAILY_TASK_CAP or 100)
+            reset_hour: Local hour the cap resets
+            reserve_shares: Per-priority floor reserve as a share of the cap (default RESERVE_SHARES)
+            path: JSON file for the counters, shared by every process using it (None = memory only)
+            merge_interval: Seconds between merges with the shared file
+        """
+        self.daily_cap = int(daily_cap if daily_cap is not None else os.getenv('ZAPIER_DAILY_TASK_CAP', '100'))
+        self.reset_hour = reset_hour
+        self.reserve_shares = {**RESERVE_SHARES, **(reserve_shares or {})}
+        self.path = Path(path) if path else None
+        if self.path is not None and fcntl is None:
+            self.path = self.path.with_name(f"{self.path.stem}.{os.getpid()}{self.path.suffix}")
+            logger.warning(f"⚠️ fcntl unavailable - Zapier budget is tracked per process in {self.path}")
+
+        self.merge_interval = merge_interval
+
+        self.lock = threading.Lock()
+        self.io_lock = threading.Lock()   # serialises merges from the merger and callers
+        self.previous_by_priority = {priority: 0 for priority in PRIORITIES}
+        self._start_window(self.window_start(time.time()))
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if self.path is not None:
+            self.load()
+            self._thread = threading.Thread(target=self._run, name='ZapierBudget', daemon=True)
+            self._thread.start()
+
+    # -------------------------------------------------------------- window
+
+    def window_start(self, now: float) -> float:
+        """Timestamp of the most recent reset at or before now"""
+        current = datetime.fromtimestamp(now)
+        reset = current.replace(hour=self.reset_hour, minute=0, second=0, microsecond=0)
+        if reset > current:
+            reset -= timedelta(days=1)
+        return reset.timestamp()
+
+    def _start_window(self, start: float):
+        self.window_started = start
+        self.window_ends = (datetime.fromtimestamp(start) + timedelta(days=1)).timestamp()
+        self.used = 0
+        self.by_zap: Dict[str, int] = {}
+        self.by_priority = {priority: 0 for priority in PRIORITIES}
+        self.denied = {priority: 0 for priority in PRIORITIES}   # this process only, not persisted
+        self.exhausted = False
+        # Admissions not yet merged into the shared file (dropped at a reset with the old window)
+        self._unmerged = {'used': 0, 'by_zap': {}, 'by_priority': {}, 'exhausted': False}
+
+    def _roll(self, now: float) -> bool:
+        """Start a new window if the reset has passed (caller holds the lock)"""
+        if now < self.window_ends:
+            return False
+        start = self.window_start(now)
+        # Yesterday's mix is the prior for today's projections (only if it was yesterday)
+        contiguous = start == self.window_ends
+        self.previous_by_priority = dict(self.by_priority) if contiguous else {p: 0 for p in PRIORITIES}
+        self._start_window(start)
+        logger.info(f"🔄 Zapier task cap reset - {self.daily_cap} tasks available")
+        return True
+
+    # ----------------------------------------------------------- forecasts
+
+    def _rates(self, now: float) -> Dict[str, float]:
+        elapsed = max(now - self.window_started, MIN_RATE_WINDOW)
+        window = self.window_ends - self.window_started
+        return {priority: max(self.by_priority[priority] / elapsed,
+                              self.previous_by_priority.get(priority, 0) / window)
+                for priority in PRIORITIES}
+
+    def _remaining(self) -> int:
+        return 0 if self.exhausted else max(self.daily_cap - self.used, 0)
+
+    def _reserve(self, priority: str, now: float) -> float:
+        """Tasks that must stay free for more important traffic"""
+        rates = self._rates(now)
+        time_left = max(self.window_ends - now, 0.0)
+        projected = sum(rates[p] * time_left for p in PRIORITIES[:PRIORITIES.index(priority)])
+        return max(projected, self.reserve_shares[priority] * self.daily_cap)
+
+    def forecast(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Usage, burn rate and predicted exhaustion for the current window"""
+        now = time.time() if now is None else now
+        self.merge()
+        with self.lock:
+            self._roll(now)
+            remaining = self._remaining()
+            rate = sum(self._rates(now).values())
+            seconds_to_exhaustion = remaining / rate if rate > 0 else None
+            exhaustion_at = now + seconds_to_exhaustion if seconds_to_exhaustion is not None else None
+            return {
+                'daily_cap': self.daily_cap,
+                'used': self.used,
+                'remaining': remaining,
+                'exhausted': self.exhausted or remaining == 0,
+                'tasks_per_hour': rate * 3600,
+                'predicted_exhaustion': datetime.fromtimestamp(exhaustion_at).isoformat() if exhaustion_at else None,
+                'exhausts_before_reset': exhaustion_at is not None and exhaustion_at < self.window_ends,
+                'resets_at': datetime.fromtimestamp(self.window_ends).isoformat(),
+                'by_zap': dict(self.by_zap),
+                'by_priority': dict(self.by_priority),
+                'denied': dict(self.denied)
+            }
+
+    # ----------------------------------------------------------- admission
+
+    def priority_for(self, zap_name: str) -> str:
+        return ZAP_PRIORITIES.get(zap_name, 'normal')
+
+    def admit(self, zap_name: str, priority: Optional[str] = None, cost: int = 1) -> bool:
+        """
+        Reserve tasks for one call if the budget allows it
+
+        Args:
+            zap_name: Zap being triggered
+            priority: One of PRIORITIES (default: ZAP_PRIORITIES lookup)
+            cost: Tasks the call consumes
+
+        Returns:
+            True if admitted (and counted), False if it should be deferred
+        """
+        priority = priority or self.priority_for(zap_name)
+        now = time.time()
+        with self.lock:
+            self._roll(now)
+            remaining = self._remaining()
+            admitted = cost <= remaining and (
+                priority == 'critical' or remaining - cost >= self._reserve(priority, now))
+            if admitted:
+                self._count(zap_name, priority, cost)
+            else:
+                self.denied[priority] += 1
+        return admitted
+
+    def _count(self, zap_name: str, priority: str, cost: int):
+        """Add tasks to the window totals and to the unmerged delta (caller holds the lock)"""
+        self.used += cost
+        self.by_zap[zap_name] = self.by_zap.get(zap_name, 0) + cost
+        self.by_priority[priority] += cost
+        delta = self._unmerged
+        delta['used'] += cost
+        delta['by_zap'][zap_name] = delta['by_zap'].get(zap_name, 0) + cost
+        delta['by_priority'][priority] = delta['by_priority'].get(priority, 0) + cost
+
+    def reset_passed(self) -> bool:
+        """Cheap check (no lock) for a reset that may have unblocked deferred work"""
+        return time.time() >= self.window_ends
+
+    def seconds_until_reset(self) -> float:
+        return max(self.window_ends - time.time(), 0.0)
+
+    # ---------------------------------------------------- server feedback
+
+    def mark_exhausted(self):
+        """The server reported the cap as reached - admit nothing until the reset"""
+        with self.lock:
+            self._roll(time.time())
+            newly = not self.exhausted
+            self.exhausted = True
+            self._unmerged['exhausted'] = True
+        if newly:
+            logger.warning(f"⚠️ Zapier spending cap reached - deferring traffic until {self.reset_hour}am")
+            self.merge()
+
+    def sync(self, used: int, cap: Optional[int] = None):
+        """Adopt the server's task count (and cap) when it reports them"""
+        with self.lock:
+            self._roll(time.time())
+            if cap:
+                self.daily_cap = int(cap)
+            if int(used) > self.used:
+                # Tasks the server saw that no process admitted (e.g. Zaps run from elsewhere)
+                self._unmerged['used'] += int(used) - self.used
+                self.used = int(used)
+        self.merge()
+
+    def observe_delivery(self, batch: List[Dict[str, Any]], status_code: Optional[int], error: Optional[str]):
+        """Outbox listener: MCP responses that signal the cap"""
+        if status_code in CAP_STATUS_CODES and batch and batch[0].get('protocol') == 'mcp':
+            self.mark_exhausted()
+
+    # --------------------------------------------------------- persistence
+
+    @property
+    def lock_path(self) -> Optional[Path]:
+        return self.path.with_suffix(self.path.suffix + '.lock') if self.path else None
+
+    def _run(self):
+        while not self._stop.wait(self.merge_interval):
+            try:
+                self.merge()
+            except Exception as e:
+                logger.error(f"❌ Failed to merge Zapier budget: {e}")
+
+    def merge(self):
+        """
+        Fold this process's unmerged admissions into the shared file and
+        adopt the combined totals (other processes' traffic included)
+        """
+        if self.path is None:
+            return
+        with self.io_lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)   # released when the file closes
+                state = self._read()
+                with self.lock:
+                    self._roll(time.time())
+                    delta = self._unmerged
+                    # Rewrite only for our own admissions or to roll the file into this window
+                    changed = bool(delta['used'] or delta['exhausted']) or \
+                        (bool(state) and state.get('window_started') != self.window_started)
+                    self._adopt(state, delta)
+                    self._unmerged = {'used': 0, 'by_zap': {}, 'by_priority': {}, 'exhausted': False}
+                    merged = self._state()
+                if changed:
+                    self._write(merged)
+
+    def _adopt(self, state: Dict[str, Any], delta: Dict[str, Any]):
+        """Window totals = the file's (if it is this window) plus our unmerged delta (caller holds the lock)"""
+        started = state.get('window_started')
+        if started == self.window_started:
+            base_zap = state.get('by_zap', {})
+            base_priority = state.get('by_priority', {})
+            self.used = state.get('used', 0) + delta['used']
+            self.exhausted = state.get('exhausted', False) or delta['exhausted']
+            self.previous_by_priority.update(state.get('previous_by_priority', {}))
+        else:
+            base_zap, base_priority = {}, {}
+            self.used = delta['used']
+            self.exhausted = delta['exhausted']
+            if started == self.window_start(self.window_started - 1):
+                # Nobody has rolled the file yet - its day is our yesterday
+                self.previous_by_priority.update(state.get('by_priority', {}))
+        self.by_zap = {zap: base_zap.get(zap, 0) + delta['by_zap'].get(zap, 0)
+                       for zap in set(base_zap) | set(delta['by_zap'])}
+        self.by_priority = {priority: base_priority.get(priority, 0) + delta['by_priority'].get(priority, 0)
+                            for priority in PRIORITIES}
+
+    def _state(self) -> Dict[str, Any]:
+        return {
+            'window_started': self.window_started,
+            'previous_by_priority': dict(self.previous_by_priority),
+            'used': self.used,
+            'by_zap': dict(self.by_zap),
+            'by_priority': dict(self.by_priority),
+            'exhausted': self.exhausted
+        }
+
+    def _read(self) -> Dict[str, Any]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"❌ Failed to load Zapier budget: {e}")
+            return {}
+
+    def _write(self, state: Dict[str, Any]):
+        """Atomically replace the file (caller holds the file lock)"""
+        try:
+            tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+            with open(tmp, 'w') as f:
+                json.dump(state, f, default=str)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.error(f"❌ Failed to persist Zapier budget: {e}")
+
+    def save(self):
+        """Merge now (the merger does this every merge_interval)"""
+        self.merge()
+
+    def load(self):
+        """Pick up the counters on disk"""
+        if self.path is None or not self.path.exists():
+            return
+        self.merge()
+        logger.info(f"💾 Zapier budget: {self.used}/{self.daily_cap} tasks used")
+
+    def close(self):
+        """Stop the merger and merge what is left"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        self.merge()
+
+
+_default_budget: Optional[ZapierBudget] = None
+_default_lock = threading.Lock()
+
+
+def get_budget() -> ZapierBudget:
+    """Process-wide budget (ZAPIER_BUDGET_FILE, default budget.json in the outbox directory, shared across processes)"""
+    global _default_budget
+    with _default_lock:
+        if _default_budget is None:
+            outbox_dir = os.getenv('ZAPIER_OUTBOX_DIR', str(Path(__file__).parent.parent.parent / 'logs' / 'zapier_outbox'))
+            _default_budget = ZapierBudget(path=os.getenv('ZAPIER_BUDGET_FILE', str(Path(outbox_dir) / 'budget.json')))
+            atexit.register(_default_budget.close)
+        return _default_budget
@@ -4,13 +4,20 @@ Integrates Agent X2.0 with Zapier via MCP endpoint
 """
 
 import os
+import sys
 import json
-import requests
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'core-systems' / 'api-connectors'))
+
+from http_transport import get_transport
+from zapier_outbox import ZapierOutbox, get_outbox
+from zapier_budget import get_budget
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('ZapierMCP')
 
@@ -30,7 +37,12 @@ class ZapierMCPConnector:
     Provides programmatic access to Zapier Zaps via MCP
     """
 
-    def __init__(self):
+    def __init__(self, outbox: Optional[ZapierOutbox] = None):
+        """
+        Args:
+            outbox: Delivery queue for zaps and webhooks (default: shared process
+                outbox, whose budget gates every message)
+        """
         self.endpoint = os.getenv('ZAPIER_MCP_ENDPOINT', 'https://mcp.zapier.com/api/mcp/mcp')
         self.bearer_token = os.getenv('ZAPIER_MCP_BEARER_TOKEN')
         self.webhook_url = os.getenv('ZAPIER_WEBHOOK_URL')
@@ -43,6 +55,10 @@ class ZapierMCPConnector:
             'Content-Type': 'application/json'
         }
 
+        self.transport = get_transport()
+        self.outbox = outbox if outbox is not None else get_outbox()
+        self.budget = self.outbox.budget if self.outbox.budget is not None else get_budget()
+
         logger.info("Zapier MCP Connector initialized")
 
     def check_connection(self) -> Dict[str, Any]:
@@ -53,10 +69,9 @@ class ZapierMCPConnector:
             Status dictionary
         """
         try:
-            response = requests.get(
+            response = self.transport.get(
                 self.endpoint,
-                headers=self.headers,
-                timeout=10
+                headers=self.headers
             )
 
             if response.status_code == 200:
@@ -89,11 +104,10 @@ class ZapierMCPConnector:
             List of available actions
         """
         try:
-            response = requests.post(
+            response = self.transport.post(
                 self.endpoint,
                 headers=self.headers,
-                json={"method": "list_actions"},
-                timeout=10
+                json={"method": "list_actions"}
             )
 
             if response.status_code == 200:
@@ -109,55 +123,53 @@ class ZapierMCPConnector:
             logger.error(f"Error listing Zapier actions: {e}")
             return []
 
-    def trigger_zap(self, zap_name: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    def trigger_zap(self, zap_name: str, payload: Dict[str, Any],
+                    priority: Optional[str] = None, cost: int = 1) -> Dict[str, Any]:
         """
-        Trigger a specific Zap via MCP
+        Trigger a specific Zap via MCP (queued on the outbox, returns immediately)
+
+        The outbox's budget defers calls it cannot afford without eating into
+        capacity reserved for more important traffic until the cap resets.
 
         Args:
             zap_name: Name of the Zap to trigger
             payload: Data to send to the Zap
+            priority: critical / high / normal / low (default: by zap name)
+            cost: Zapier tasks the call consumes
 
         Returns:
-            Response from Zapier
+            Queue receipt ("deferred": True when held for the reset)
         """
         try:
-            logger.info(f"Triggering Zap: {zap_name}")
-
-            response = requests.post(
-                self.endpoint,
-                headers=self.headers,
-                json={
-                    "method": "trigger_zap",
-                    "zap_name": zap_name,
-                    "payload": payload
-                },
-                timeout=30
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                logger.info(f"✓ Zap triggered successfully: {zap_name}")
-                return {
-                    "success": True,
-                    "zap_name": zap_name,
-                    "response": result,
-                    "timestamp": datetime.now().isoformat()
-                }
-            else:
-                logger.error(f"Zap trigger failed: {response.status_code}")
-                return {
-                    "success": False,
-                    "error": response.text,
-                    "status_code": response.status_code
-                }
+            message_id = self.outbox.enqueue_zap(self.endpoint, zap_name, payload, priority=priority, cost=cost)
+            logger.debug(f"Queued Zap: {zap_name}")
+            return self._receipt(message_id, zap_name, priority, {"zap_name": zap_name})
 
         except Exception as e:
-            logger.error(f"Error triggering Zap: {e}")
+            logger.error(f"Error queueing Zap: {e}")
             return {
                 "success": False,
                 "error": str(e)
             }
 
+    def _receipt(self, message_id: str, zap_name: str, priority: Optional[str],
+                 extra: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue receipt, flagged when the budget deferred the message"""
+        receipt = {
+            "success": True,
+            "queued": True,
+            **extra,
+            "message_id": message_id,
+            "timestamp": datetime.now().isoformat()
+        }
+        if self.outbox.is_deferred(message_id):
+            receipt.update({
+                "deferred": True,
+                "priority": priority or self.budget.priority_for(zap_name),
+                "resets_in_seconds": round(self.budget.seconds_until_reset())
+            })
+        return receipt
+
     def send_trading_signal(self, signal: Dict[str, Any]) -> Dict[str, Any]:
         """
         Send trading signal to Zapier for processing
@@ -264,39 +276,24 @@ class ZapierMCPConnector:
         logger.info(f"Creating case notification: Case {case_number} - {status}")
         return self.trigger_zap("Legal Case Notification", payload)
 
-    def trigger_webhook(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    def trigger_webhook(self, data: Dict[str, Any], priority: Optional[str] = None) -> Dict[str, Any]:
         """
-        Trigger Zapier webhook directly (fallback method)
+        Trigger Zapier webhook directly (fallback method, queued on the outbox)
 
         Args:
             data: Data to send to webhook
+            priority: critical / high / normal / low (default: normal)
 
         Returns:
-            Response from webhook
+            Queue receipt ("deferred": True when held for the reset)
         """
         if not self.webhook_url:
             logger.error("ZAPIER_WEBHOOK_URL not configured")
             return {"success": False, "error": "Webhook URL not configured"}
 
         try:
-            response = requests.post(
-                self.webhook_url,
-                json=data,
-                timeout=10
-            )
-
-            if response.status_code == 200:
-                logger.info("✓ Webhook triggered successfully")
-                return {
-                    "success": True,
-                    "status_code": response.status_code
-                }
-            else:
-                logger.error(f"Webhook failed: {response.status_code}")
-                return {
-                    "success": False,
-                    "status_code": response.status_code
-                }
+            message_id = self.outbox.enqueue_webhook(self.webhook_url, data, priority=priority)
+            return self._receipt(message_id, "Webhook", priority, {})
 
         except Exception as e:
             logger.error(f"Webhook error: {e}")
@@ -305,33 +302,48 @@ class ZapierMCPConnector:
                 "error": str(e)
             }
 
+    def _budget_status(self) -> Dict[str, Any]:
+        """Local budget forecast plus the messages the outbox holds for the reset"""
+        status = self.budget.forecast()
+        status['deferred'] = len(self.outbox.deferred)
+        return status
+
     def get_spending_status(self) -> Dict[str, Any]:
         """
         Check Zapier MCP spending status
 
         Returns:
-            Spending status information
+            Spending status information, with the local budget forecast under "budget"
         """
         try:
-            response = requests.get(
+            response = self.transport.get(
                 f"{self.endpoint}/status",
-                headers=self.headers,
-                timeout=10
+                headers=self.headers
             )
 
             if response.status_code == 200:
-                return response.json()
+                status = response.json()
+                if status.get('status') == 'cap_reached':
+                    self.budget.mark_exhausted()
+                elif 'tasks_used' in status:
+                    self.budget.sync(status['tasks_used'], status.get('task_limit'))
+                status['budget'] = self._budget_status()
+                return status
             else:
+                if response.status_code in (403, 429):
+                    self.budget.mark_exhausted()
                 return {
                     "status": "unknown",
-                    "note": "Spending cap may be active. Resets at 3am."
+                    "note": "Spending cap may be active. Resets at 3am.",
+                    "budget": self._budget_status()
                 }
 
         except Exception as e:
             logger.warning(f"Could not check spending status: {e}")
             return {
                 "status": "unknown",
-                "note": "Spending cap resets at 3am"
+                "note": "Spending cap resets at 3am",
+                "budget": self._budget_status()
             }
 
 
@@ -364,6 +376,8 @@ def main():
             body="This is a test email from Agent X2.0 Zapier MCP connector"
         )
         print(f"   Result: {json.dumps(result, indent=2)}")
+        delivered = connector.outbox.flush(timeout=30)
+        print(f"   Delivered: {delivered} - {json.dumps(connector.outbox.get_stats(), indent=2)}")
 
     else:
         print("\n⚠️  Zapier MCP not connected")
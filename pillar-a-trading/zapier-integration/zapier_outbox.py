@@ -0,0 +1,625 @@
+#!/usr/bin/env python3
+"""
+Zapier Outbox - Durable, batched delivery for all Zapier webhook traffic
+Callers enqueue and return immediately; a background sender does the HTTP
+
+- enqueue() is an in-memory append plus a buffered line write to an
+  append-only journal (no network, no fsync), so trading hot paths never
+  wait on Zapier
+- the sender thread flushes the journal, then delivers over the shared
+  pooled HTTP transport (retries are left to the outbox)
+- webhook messages that share a batch key (Google Sheets rows) are
+  delivered many per request as a JSON array (Zapier runs the Zap once per
+  element); MCP zaps are never batched, each trigger_zap request carries
+  exactly the payload it was enqueued with
+- connection errors, timeouts, 408/429 and 5xx are retried with
+  exponential backoff and jitter; other 4xx responses and messages that
+  exhaust max_attempts go to a dead-letter file
+- deliveries are journaled as acks, so anything still pending after a
+  crash or restart is replayed on startup
+- every outbox owns its journal (outbox.<owner>.jsonl, owner = pid by
+  default) and holds an exclusive flock on outbox.<owner>.lock while it
+  runs. On startup it adopts the journals whose lock nobody holds any
+  more (processes that exited or crashed), so each message is replayed
+  by exactly one process
+- with a ZapierBudget attached, every enqueue is admitted against the
+  daily task cap first; messages it refuses are journaled as deferred and
+  released highest priority first once the cap resets
+
+Bearer tokens are never written to disk: a message records the name of the
+environment variable holding its token and the header is built at send time.
+"""
+
+import os
+import json
+import time
+import uuid
+import atexit
+import random
+import logging
+import sys
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+try:
+    import fcntl
+except ImportError:   # Windows: journals stay per process, orphans are not adopted
+    fcntl = None
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'core-systems' / 'api-connectors'))
+
+from http_transport import HTTPTransport, get_transport
+from zapier_budget import PRIORITIES, ZapierBudget, get_budget
+
+logger = logging.getLogger('ZapierOutbox')
+
+DEFAULT_OUTBOX_DIR = Path(__file__).parent.parent.parent / 'logs' / 'zapier_outbox'
+RETRYABLE_STATUS = {408, 425, 429}
+
+
+class ZapierOutbox:
+    """Append-only journaled queue with a background batching sender"""
+
+    def __init__(self, storage_dir: Optional[str] = None, batch_size: int = 50,
+                 linger: float = 0.25, max_attempts: int = 8, base_delay: float = 1.0,
+                 max_delay: float = 300.0, timeout: float = 15.0, compact_bytes: int = 1 << 20,
+                 start: bool = True, transport: Optional[HTTPTransport] = None,
+                 budget: Optional[ZapierBudget] = None, owner: Optional[str] = None):
+        """
+        Args:
+            storage_dir: Journal / dead-letter directory (None = memory only)
+            batch_size: Max messages per batched request
+            linger: Seconds the sender waits for a batch to fill
+            max_attempts: Delivery attempts before dead-lettering
+            base_delay: First retry delay (doubles per attempt)
+            max_delay: Retry delay cap
+            timeout: HTTP timeout per request
+            compact_bytes: Journal size that triggers a rewrite once drained
+            start: Start the sender thread immediately
+            transport: Pooled HTTP transport (default: shared process transport)
+            budget: Spending-cap admission for every message (None = no admission control)
+            owner: Journal name for this outbox (default: process id); two live
+                outboxes with the same owner in one directory are refused
+        """
+        self.storage_dir = Path(storage_dir) if storage_dir else None
+        self.batch_size = batch_size
+        self.linger = linger
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.compact_bytes = compact_bytes
+        self.budget = budget
+        self.owner = owner or str(os.getpid())
+
+        self.pending: deque = deque()
+        self.retries: List[Dict[str, Any]] = []     # messages waiting out a backoff
+        self.deferred: List[Dict[str, Any]] = []    # messages the budget refused, held for the reset
+        self.deferred_ids = set()
+        self.in_flight = 0
+        self._flush_waiters = 0
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.idle = threading.Condition(self.lock)
+        self.listeners: List[Callable[[List[Dict[str, Any]], Optional[int], Optional[str]], None]] = []
+        self.stats = {'enqueued': 0, 'delivered': 0, 'requests': 0, 'batched_requests': 0,
+                      'retries': 0, 'dead_lettered': 0, 'replayed': 0,
+                      'deferred': 0, 'released': 0}
+        self._compacted_size = 0
+
+        self.transport = transport if transport is not None else get_transport()
+        if budget is not None:
+            self.add_listener(budget.observe_delivery)
+
+        self._journal = None
+        self._owner_lock = None
+        if self.storage_dir is not None:
+            self.storage_dir.mkdir(parents=True, exist_ok=True)
+            self._owner_lock = self._claim(self.lock_path)
+            if self._owner_lock is False:
+                raise RuntimeError(f"Zapier outbox journal {self.journal_path} is in use by another process")
+            self._replay()
+            self._journal = open(self.journal_path, 'a', buffering=1 << 16)
+
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        if start:
+            self.start()
+
+    @property
+    def journal_path(self) -> Optional[Path]:
+        return self.storage_dir / f'outbox.{self.owner}.jsonl' if self.storage_dir else None
+
+    @property
+    def lock_path(self) -> Optional[Path]:
+        return self.storage_dir / f'outbox.{self.owner}.lock' if self.storage_dir else None
+
+    @property
+    def dead_letter_path(self) -> Optional[Path]:
+        return self.storage_dir / 'dead_letters.jsonl' if self.storage_dir else None
+
+    # ------------------------------------------------------------- enqueue
+
+    def enqueue(self, url: str, body: Any, batch_key: Optional[str] = None,
+                protocol: str = 'webhook', auth_env: Optional[str] = None,
+                zap_name: str = 'Webhook', priority: Optional[str] = None, cost: int = 1) -> str:
+        """
+        Queue one message for delivery
+
+        Args:
+            url: Target URL (catch hook or MCP endpoint)
+            body: JSON body (for 'mcp', the trigger_zap request)
+            batch_key: Messages with the same key may share a request
+            protocol: 'webhook' or 'mcp' (decides how batches are combined)
+            auth_env: Environment variable holding the bearer token
+            zap_name: Zap the message runs (budget accounting and default priority)
+            priority: critical / high / normal / low (default: by zap name)
+            cost: Zapier tasks the message consumes
+
+        Returns:
+            Message id (is_deferred() tells whether the budget held it back)
+        """
+        if self.budget is not None:
+            priority = priority or self.budget.priority_for(zap_name)
+        message = {
+            'id': uuid.uuid4().hex,
+            'url': url,
+            'body': body,
+            'batch_key': batch_key,
+            'protocol': protocol,
+            'auth_env': auth_env,
+            'zap_name': zap_name,
+            'priority': priority or 'normal',
+            'cost': cost,
+            'enqueued_at': time.time(),
+            'attempts': 0
+        }
+        deferred = self.budget is not None and not self.budget.admit(zap_name, priority, cost)
+        if deferred:
+            message['deferred'] = True
+        line = json.dumps({'op': 'put', 'msg': message}, default=str) + '\n'
+        with self.lock:
+            if self._journal is not None:
+                self._journal.write(line)
+            self.stats['enqueued'] += 1
+            if deferred:
+                self._hold(message)
+                return message['id']
+            self.pending.append(message)
+            self.wakeup.notify()
+        return message['id']
+
+    def enqueue_webhook(self, url: str, data: Any, batch_key: Optional[str] = None,
+                        zap_name: str = 'Webhook', priority: Optional[str] = None, cost: int = 1) -> str:
+        return self.enqueue(url, data, batch_key=batch_key, zap_name=zap_name, priority=priority, cost=cost)
+
+    def enqueue_zap(self, endpoint: str, zap_name: str, payload: Dict[str, Any],
+                    batch_key: Optional[str] = None, priority: Optional[str] = None, cost: int = 1,
+                    auth_env: str = 'ZAPIER_MCP_BEARER_TOKEN') -> str:
+        body = {"method": "trigger_zap", "zap_name": zap_name, "payload": payload}
+        return self.enqueue(endpoint, body, batch_key=batch_key, protocol='mcp', auth_env=auth_env,
+                            zap_name=zap_name, priority=priority, cost=cost)
+
+    def is_deferred(self, message_id: str) -> bool:
+        """True while the message waits for the spending cap to reset"""
+        return message_id in self.deferred_ids
+
+    # ------------------------------------------------------------ deferral
+
+    def _hold(self, message: Dict[str, Any]):
+        """Park a message the budget refused (caller holds the lock)"""
+        self.deferred.append(message)
+        self.deferred_ids.add(message['id'])
+        self.stats['deferred'] += 1
+        count = len(self.deferred)
+        if count == 1 or count % 100 == 0:
+            logger.warning(f"⏸️ Zapier budget: deferring {message['priority']} traffic "
+                           f"({count} message(s) waiting for the cap to reset)")
+
+    def _deferred_due(self) -> bool:
+        return bool(self.deferred) and self.budget is not None and self.budget.reset_passed()
+
+    def release_deferred(self) -> int:
+        """
+        Queue the deferred messages the budget now admits (highest priority
+        first, FIFO within a priority, stopping at the first refusal)
+
+        Returns:
+            Number of messages released
+        """
+        if self.budget is None:
+            return 0
+        with self.lock:
+            ordered = sorted(self.deferred, key=lambda m: PRIORITIES.index(m.get('priority', 'normal')))
+            self.deferred = []
+
+        released, waiting = [], []
+        for message in ordered:
+            if not waiting and self.budget.admit(message['zap_name'], message['priority'], message['cost']):
+                message.pop('deferred', None)
+                released.append(message)
+            else:
+                waiting.append(message)
+
+        with self.lock:
+            self.deferred = waiting + self.deferred
+            for message in released:
+                self.deferred_ids.discard(message['id'])
+            if released:
+                # Journaled without the flag so a restart does not hold them again
+                if self._journal is not None:
+                    for message in released:
+                        self._journal.write(json.dumps({'op': 'put', 'msg': message}, default=str) + '\n')
+                self.pending.extend(released)
+                self.stats['released'] += len(released)
+                self.wakeup.notify()
+        if released:
+            logger.info(f"▶️ Zapier budget: released {len(released)} deferred message(s)")
+        return len(released)
+
+    # -------------------------------------------------------------- sender
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='ZapierOutbox', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self.lock:
+                while (self._running and not self.pending and not self._due_retries()
+                       and not self._deferred_due()):
+                    self.wakeup.wait(self._next_wakeup())
+                if not self._running and not self.pending:
+                    return
+                release = self._deferred_due()
+
+            if release:
+                self.release_deferred()
+
+            with self.lock:
+                self._linger()
+                self._due_retries(promote=True)
+                drained = list(self.pending)
+                self.pending.clear()
+                self.in_flight += len(drained)
+                if self._journal is not None:
+                    self._journal.flush()
+
+            if not drained:
+                continue
+            for batch in self._group(drained):
+                self._deliver(batch)
+
+            with self.lock:
+                self.in_flight -= len(drained)
+                self._maybe_compact()
+                self.idle.notify_all()
+
+    def _linger(self):
+        """Give batchable rows a moment to accumulate (cut short by flush/close)"""
+        if not self.linger or not any(m.get('batch_key') and m['protocol'] == 'webhook' for m in self.pending):
+            return
+        deadline = time.time() + self.linger
+        while (self._running and not self._flush_waiters and len(self.pending) < self.batch_size
+               and time.time() < deadline):
+            self.wakeup.wait(deadline - time.time())
+
+    def _due_retries(self, promote: bool = False) -> bool:
+        now = time.time()
+        due = [m for m in self.retries if m['next_attempt_at'] <= now]
+        if promote and due:
+            self.retries = [m for m in self.retries if m['next_attempt_at'] > now]
+            self.pending.extendleft(reversed(due))
+        return bool(due)
+
+    def _next_wakeup(self) -> Optional[float]:
+        """Seconds until the next retry or, with deferred messages, the cap reset"""
+        waits = []
+        if self.retries:
+            waits.append(max(0.0, min(m['next_attempt_at'] for m in self.retries) - time.time()))
+        if self.deferred and self.budget is not None:
+            waits.append(self.budget.seconds_until_reset())
+        return min(waits) if waits else None
+
+    def _group(self, messages: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Split drained messages into requests (webhook batch keys grouped, order kept otherwise)"""
+        batches: List[List[Dict[str, Any]]] = []
+        open_batches: Dict[tuple, List[Dict[str, Any]]] = {}
+        for message in messages:
+            key = message.get('batch_key')
+            if key is None or message['protocol'] != 'webhook':
+                batches.append([message])
+                continue
+            group_key = (message['url'], message['protocol'], key)
+            batch = open_batches.get(group_key)
+            if batch is None or len(batch) >= self.batch_size:
+                batch = []
+                open_batches[group_key] = batch
+                batches.append(batch)
+            batch.append(message)
+        return batches
+
+    def _request_body(self, batch: List[Dict[str, Any]]) -> Any:
+        if len(batch) == 1:
+            return batch[0]['body']
+        return [message['body'] for message in batch]
+
+    def _deliver(self, batch: List[Dict[str, Any]]):
+        first = batch[0]
+        headers = {'Content-Type': 'application/json'}
+        if first.get('auth_env'):
+            headers['Authorization'] = f"Bearer {os.getenv(first['auth_env'], '')}"
+
+        status_code = None
+        try:
+            response = self.transport.post(first['url'], json=self._request_body(batch),
+                                           headers=headers, timeout=self.timeout, retries=0)
+            status_code = response.status_code
+            error = None if 200 <= status_code < 300 else f"HTTP {status_code}: {response.text[:200]}"
+            retry_after = response.headers.get('Retry-After')
+        except Exception as e:
+            error = str(e)
+            retry_after = None
+
+        self.stats['requests'] += 1
+        if len(batch) > 1:
+            self.stats['batched_requests'] += 1
+        for listener in self.listeners:
+            try:
+                listener(batch, status_code, error)
+            except Exception as e:
+                logger.error(f"❌ Outbox listener failed: {e}")
+
+        if error is None:
+            self.stats['delivered'] += len(batch)
+            self._ack(batch)
+            return
+
+        retryable = status_code is None or status_code in RETRYABLE_STATUS or status_code >= 500
+        for message in batch:
+            message['attempts'] += 1
+            message['last_error'] = error
+        if not retryable or first['attempts'] >= self.max_attempts:
+            logger.error(f"❌ Zapier delivery failed ({error}) - dead-lettering {len(batch)} message(s)")
+            self._dead_letter(batch)
+            return
+
+        delay = min(self.max_delay, self.base_delay * 2 ** (first['attempts'] - 1))
+        delay *= random.uniform(0.5, 1.0)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        logger.warning(f"⚠️ Zapier delivery failed ({error}) - retry {first['attempts']} in {delay:.1f}s")
+        with self.lock:
+            for message in batch:
+                message['next_attempt_at'] = time.time() + delay
+            self.retries.extend(batch)
+            self.stats['retries'] += len(batch)
+
+    # ------------------------------------------------------- journal / DLQ
+
+    def _ack(self, batch: List[Dict[str, Any]]):
+        if self._journal is None:
+            return
+        line = json.dumps({'op': 'ack', 'ids': [message['id'] for message in batch]}) + '\n'
+        with self.lock:
+            self._journal.write(line)
+
+    def _dead_letter(self, batch: List[Dict[str, Any]]):
+        self.stats['dead_lettered'] += len(batch)
+        if self.dead_letter_path is not None:
+            failed_at = time.time()
+            with open(self.dead_letter_path, 'a') as f:
+                for message in batch:
+                    f.write(json.dumps({**message, 'failed_at': failed_at}, default=str) + '\n')
+        self._ack(batch)
+
+    @staticmethod
+    def _claim(path: Path):
+        """
+        Take an exclusive, non-blocking flock on a journal's lock file
+
+        Returns:
+            The open lock file (held until closed), False if another process
+            holds it, None when flock is unavailable
+        """
+        if fcntl is None:
+            return None
+        handle = open(path, 'a')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        return handle
+
+    def _orphans(self) -> List[tuple]:
+        """Other journals in the directory whose owner is gone, claimed as (journal, lock file, handle)"""
+        if fcntl is None:
+            logger.warning("⚠️ fcntl unavailable - journals of other processes are not adopted")
+            return []
+        orphans = []
+        for path in sorted(self.storage_dir.glob('outbox*.jsonl')):
+            if path == self.journal_path:
+                continue
+            # outbox.<owner>.jsonl -> outbox.<owner>.lock (the legacy outbox.jsonl -> outbox.lock)
+            lock_path = path.with_suffix('.lock')
+            handle = self._claim(lock_path)
+            if handle is False:
+                continue   # owner still running
+            if not path.exists():
+                # Adopted by another process between the glob and the lock
+                handle.close()
+                lock_path.unlink(missing_ok=True)
+                continue
+            orphans.append((path, lock_path, handle))
+        return orphans
+
+    def _replay(self):
+        """Load unacknowledged messages from this outbox's journal and every orphaned one, then rewrite compactly"""
+        orphans = self._orphans()
+        sources = [self.journal_path] + [path for path, _, _ in orphans]
+        messages: Dict[str, Dict[str, Any]] = {}
+        for path in sources:
+            if not path.exists():
+                continue
+            with open(path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue   # torn final line from a crash
+                    if record.get('op') == 'put':
+                        messages[record['msg']['id']] = record['msg']
+                    elif record.get('op') == 'ack':
+                        for message_id in record.get('ids', []):
+                            messages.pop(message_id, None)
+
+        for message in messages.values():
+            if message.get('deferred'):
+                self._hold(message)
+            else:
+                self.pending.append(message)
+        self.stats['replayed'] = len(messages)
+        # Our journal holds everything before the orphans are removed, so a crash in between only duplicates
+        self._rewrite_journal()
+        for path, lock_path, handle in orphans:
+            path.unlink(missing_ok=True)
+            lock_path.unlink(missing_ok=True)
+            handle.close()
+        if messages:
+            logger.info(f"📬 Replaying {len(messages)} undelivered Zapier message(s) "
+                        f"({len(orphans)} journal(s) adopted)")
+
+    def _rewrite_journal(self):
+        """Replace the journal with the live messages only (caller holds the lock or is single-threaded)"""
+        live = list(self.retries) + list(self.pending) + list(self.deferred)
+        tmp = self.journal_path.with_suffix('.jsonl.tmp')
+        with open(tmp, 'w') as f:
+            for message in live:
+                f.write(json.dumps({'op': 'put', 'msg': message}, default=str) + '\n')
+        os.replace(tmp, self.journal_path)
+        self._compacted_size = self.journal_path.stat().st_size
+
+    def _maybe_compact(self):
+        # Deferred messages are carried over, so only growth since the last rewrite counts
+        if self._journal is None or self.pending or self.retries or self.in_flight:
+            return
+        self._journal.flush()
+        if self.journal_path.stat().st_size - self._compacted_size < self.compact_bytes:
+            return
+        self._journal.close()
+        self._rewrite_journal()
+        self._journal = open(self.journal_path, 'a', buffering=1 << 16)
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        if self.dead_letter_path is None or not self.dead_letter_path.exists():
+            return []
+        with open(self.dead_letter_path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def requeue_dead_letters(self) -> int:
+        """Move every dead letter back onto the queue (e.g. after the spending cap resets)"""
+        if self.dead_letter_path is None or not self.dead_letter_path.exists():
+            return 0
+        # The dead-letter file is shared: move it aside atomically so other processes' appends are not lost
+        taken = self.dead_letter_path.with_suffix(f'.{self.owner}.requeue')
+        try:
+            os.replace(self.dead_letter_path, taken)
+        except FileNotFoundError:
+            return 0
+        with open(taken) as f:
+            letters = [json.loads(line) for line in f if line.strip()]
+        for message in letters:
+            self.enqueue(message['url'], message['body'], message.get('batch_key'),
+                         message.get('protocol', 'webhook'), message.get('auth_env'),
+                         message.get('zap_name', 'Webhook'), message.get('priority'), message.get('cost', 1))
+        taken.unlink()
+        logger.info(f"📬 Requeued {len(letters)} dead-lettered Zapier message(s)")
+        return len(letters)
+
+    def add_listener(self, listener: Callable[[List[Dict[str, Any]], Optional[int], Optional[str]], None]):
+        """Call listener(batch, status_code, error) after every delivery attempt"""
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    # ------------------------------------------------------------ lifecycle
+
+    def flush(self, timeout: Optional[float] = None, include_retries: bool = True) -> bool:
+        """
+        Block until everything queued so far is delivered or dead-lettered
+        (deferred messages keep waiting for the cap reset)
+
+        Args:
+            timeout: Max seconds to wait (None = no limit)
+            include_retries: Also wait for messages backing off after a failure
+
+        Returns:
+            True if the outbox drained within the timeout
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self.lock:
+            if self._journal is not None:
+                self._journal.flush()
+            self._flush_waiters += 1
+            self.wakeup.notify()
+            try:
+                while self.pending or self.in_flight or (include_retries and self.retries):
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self.idle.wait(remaining)
+            finally:
+                self._flush_waiters -= 1
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """Send what is ready (bounded), stop the sender and close the journal; undelivered messages stay journaled"""
+        if self._thread is not None and self._thread.is_alive():
+            self.flush(timeout, include_retries=False)
+            with self.lock:
+                self._running = False
+                self.wakeup.notify()
+            self._thread.join(timeout)
+        with self.lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+                if not (self.pending or self.retries or self.deferred or self.in_flight):
+                    # Nothing left to replay - don't leave one journal per past pid behind
+                    self.journal_path.unlink(missing_ok=True)
+            if self._owner_lock:
+                # Undelivered messages stay journaled; the next outbox to start adopts them
+                self.lock_path.unlink(missing_ok=True)
+                self._owner_lock.close()
+            self._owner_lock = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                **self.stats,
+                'pending': len(self.pending),
+                'retrying': len(self.retries),
+                'deferred_waiting': len(self.deferred),
+                'in_flight': self.in_flight,
+                'journal': str(self.journal_path) if self.journal_path else None
+            }
+
+
+_default_outbox: Optional[ZapierOutbox] = None
+_default_lock = threading.Lock()
+
+
+def get_outbox() -> ZapierOutbox:
+    """Process-wide outbox (journal in ZAPIER_OUTBOX_DIR, default logs/zapier_outbox), gated by get_budget()"""
+    global _default_outbox
+    with _default_lock:
+        if _default_outbox is None:
+            _default_outbox = ZapierOutbox(os.getenv('ZAPIER_OUTBOX_DIR', str(DEFAULT_OUTBOX_DIR)),
+                                           budget=get_budget())
+            atexit.register(_default_outbox.close)
+        return _default_outbox
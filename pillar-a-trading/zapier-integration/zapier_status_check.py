@@ -72,6 +72,15 @@ def main():
         if 'note' in spending:
             print(f"  Note: {spending['note']}")
 
+    budget = spending.get('budget')
+    if budget:
+        print(f"  Local Budget: {budget['used']}/{budget['daily_cap']} tasks used, {budget['remaining']} left")
+        print(f"  Burn Rate: {budget['tasks_per_hour']:.1f} tasks/hour")
+        if budget['exhausts_before_reset']:
+            print(f"  ⚠️  Predicted exhaustion: {budget['predicted_exhaustion']} (resets {budget['resets_at']})")
+        if budget['deferred']:
+            print(f"  Deferred Calls: {budget['deferred']} (sent after the reset)")
+
     # Show next steps
     print("\n📌 NEXT STEPS:")
     print("-" * 64)
@@ -14,13 +14,16 @@ NO COST - Uses Dropbox Free tier (2GB storage)
 """
 
 import os
+import sys
 import json
 import logging
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any, Optional
-import urllib.request
-import urllib.parse
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'core-systems' / 'api-connectors'))
+
+from http_transport import get_transport
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('CaseManager')
@@ -48,6 +51,7 @@ class DropboxCaseManager:
         3. Generate access token
         """
         self.access_token = dropbox_access_token or os.getenv('DROPBOX_ACCESS_TOKEN', '')
+        self.transport = get_transport()   # keep-alive pools for api. / content.dropboxapi.com
         self.base_path = Path(__file__).parent
         self.cases_path = self.base_path / "cases_index"
         self.cases_path.mkdir(exist_ok=True)
@@ -132,20 +136,17 @@ class DropboxCaseManager:
                 "autorename": False
             }).encode('utf-8')
 
-            req = urllib.request.Request(url, data=data, headers=headers, method='POST')
-            response = urllib.request.urlopen(req)
+            response = self.transport.post(url, data=data, headers=headers)
 
-            if response.status == 200:
+            if response.status_code == 200:
                 logger.info(f"   ✅ Created folder: {path}")
                 return True
-
-        except urllib.error.HTTPError as e:
-            if e.code == 409:
+            elif response.status_code == 409:
                 # Folder already exists
                 logger.info(f"   📁 Folder exists: {path}")
                 return True
             else:
-                logger.error(f"   ❌ Error creating folder: {e}")
+                logger.error(f"   ❌ Error creating folder: HTTP {response.status_code}")
                 return False
 
         except Exception as e:
@@ -181,10 +182,9 @@ class DropboxCaseManager:
                 })
             }
 
-            req = urllib.request.Request(url, data=file_data, headers=headers, method='POST')
-            response = urllib.request.urlopen(req)
+            response = self.transport.post(url, data=file_data, headers=headers)
 
-            if response.status == 200:
+            if response.status_code == 200:
                 logger.info(f"✅ Uploaded: {Path(local_file_path).name} → Dropbox")
 
                 # Create public link
@@ -210,11 +210,10 @@ class DropboxCaseManager:
                 }
             }).encode('utf-8')
 
-            req = urllib.request.Request(url, data=data, headers=headers, method='POST')
-            response = urllib.request.urlopen(req)
+            response = self.transport.post(url, data=data, headers=headers)
 
-            if response.status == 200:
-                result = json.loads(response.read().decode('utf-8'))
+            if response.status_code == 200:
+                result = response.json()
                 public_url = result.get('url', '')
 
                 # Convert to direct download link
@@ -225,15 +224,13 @@ class DropboxCaseManager:
                 logger.info(f"🔗 Public link created")
                 return public_url
 
-        except urllib.error.HTTPError as e:
-            if e.code == 409:
+            if response.status_code == 409:
                 # Link already exists, get existing link
                 try:
                     url = "https://api.dropboxapi.com/2/sharing/list_shared_links"
                     data = json.dumps({"path": dropbox_path}).encode('utf-8')
-                    req = urllib.request.Request(url, data=data, headers=headers, method='POST')
-                    response = urllib.request.urlopen(req)
-                    result = json.loads(response.read().decode('utf-8'))
+                    response = self.transport.post(url, data=data, headers=headers)
+                    result = response.json()
 
                     if result.get('links'):
                         public_url = result['links'][0]['url']
@@ -286,9 +283,9 @@ class DropboxCaseManager:
                 "path": folder_path
             }).encode('utf-8')
 
-            req = urllib.request.Request(url, data=data, headers=headers, method='POST')
-            response = urllib.request.urlopen(req)
-            result = json.loads(response.read().decode('utf-8'))
+            response = self.transport.post(url, data=data, headers=headers)
+            response.raise_for_status()
+            result = response.json()
 
             files = []
             for entry in result.get('entries', []):
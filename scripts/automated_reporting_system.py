@@ -18,6 +18,8 @@ import schedule
 import time
 import logging
 
+from trading_stats_store import TradingStatsStore
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('ReportingSystem')
 
@@ -35,6 +37,11 @@ class AutomatedReportingSystem:
     def get_latest_stats(self) -> Dict[str, Any]:
         """Get latest trading statistics"""
         try:
+            summary = TradingStatsStore.load_summary()
+            if summary is not None:
+                return summary
+
+            # Fall back to legacy daily stats files
             logs_dir = Path('logs')
             stats_files = sorted(logs_dir.glob('trading_stats_*.json'), reverse=True)
 
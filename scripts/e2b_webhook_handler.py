@@ -6,13 +6,17 @@ Optimized for minimal data usage
 """
 
 import os
+import sys
 import json
 import hmac
 import hashlib
-import requests
 from datetime import datetime
 from typing import Dict, Any, Optional
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pillar-a-trading', 'zapier-integration'))
+
+from zapier_outbox import get_outbox
+
 # Load configuration
 E2B_API_KEY = os.getenv('E2B_API_KEY')
 E2B_WEBHOOK_SECRET = os.getenv('E2B_WEBHOOK_SECRET')
@@ -66,19 +70,15 @@ class E2BWebhookHandler:
         return essential
 
     def sync_to_zapier(self, event_data: Dict[str, Any]) -> bool:
-        """Send event to Zapier webhook"""
+        """Queue event for the Zapier webhook (delivered by the shared outbox)"""
         if not ZAPIER_WEBHOOK_URL or not self.config['sync_targets']['zapier']['enabled']:
             return False
 
         try:
             compressed = self.compress_payload(event_data)
-            response = requests.post(
-                ZAPIER_WEBHOOK_URL,
-                json=compressed,
-                timeout=10,
-                headers={'Content-Type': 'application/json'}
-            )
-            return response.status_code == 200
+            # Execution telemetry: first to wait when the Zapier budget runs low
+            get_outbox().enqueue_webhook(ZAPIER_WEBHOOK_URL, compressed, zap_name='Webhook', priority='low')
+            return True
         except Exception as e:
             print(f"Zapier sync error: {e}")
             return False
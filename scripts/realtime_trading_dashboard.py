@@ -13,6 +13,8 @@ from http.server import HTTPServer, SimpleHTTPRequestHandler
 import threading
 import time
 
+from trading_stats_store import TradingStatsStore
+
 
 class DashboardHandler(SimpleHTTPRequestHandler):
     """Custom HTTP handler for dashboard"""
@@ -349,7 +351,13 @@ class DashboardHandler(SimpleHTTPRequestHandler):
     def get_latest_stats(self) -> str:
         """Get latest trading statistics"""
         try:
-            # Find most recent stats file
+            # Summary index is small and replaced atomically
+            summary_file = TradingStatsStore.summary_path()
+            if summary_file.exists():
+                with open(summary_file, 'r') as f:
+                    return f.read()
+
+            # Fall back to legacy daily stats files
             logs_dir = Path('logs')
             stats_files = sorted(logs_dir.glob('trading_stats_*.json'), reverse=True)
 
@@ -10,11 +10,15 @@ import sys
 import time
 import logging
 import subprocess
+import queue
+import multiprocessing
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import threading
 
+from trading_stats_store import TradingStatsStore
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -29,11 +33,28 @@ logger = logging.getLogger('24x7Trading')
 class ContinuousTradingOrchestrator:
     """Manages 24/7 trading across all accounts"""
 
-    def __init__(self):
+    def __init__(self, account_ids: Optional[List[str]] = None,
+                 stats_queue: Optional[Any] = None,
+                 initial_stats: Optional[Dict[str, Dict]] = None):
+        """
+        Args:
+            account_ids: Restrict this orchestrator to these accounts (shard mode)
+            stats_queue: Queue to publish stats to a supervisor instead of writing the file
+            initial_stats: Last known stats per account, used to resume a restarted shard
+        """
         self.config_file = Path(__file__).parent.parent / 'pillar-a-trading' / 'config' / 'multi_account_config.json'
+        self.risk_profiles_file = Path(__file__).parent.parent / 'pillar-a-trading' / 'config' / 'trading_risk_profiles.json'
         self.running = True
         self.account_threads = {}
         self.account_stats = {}
+        self.account_ids = set(account_ids) if account_ids is not None else None
+        self.stats_queue = stats_queue
+        self.initial_stats = initial_stats or {}
+        self.stats_store = None
+        self.stats_store_lock = threading.Lock()   # account threads save concurrently
+        self.position_engines = {}
+        self.risk_engine = None
+        self.risk_lock = threading.Lock()
         self.load_config()
 
     def load_config(self):
@@ -46,6 +67,13 @@ class ContinuousTradingOrchestrator:
             logger.error(f"❌ Failed to load config: {e}")
             sys.exit(1)
 
+        try:
+            with open(self.risk_profiles_file, 'r') as f:
+                self.risk_profiles = json.load(f).get('profiles', {})
+        except Exception as e:
+            logger.warning(f"⚠️ Risk profiles unavailable, using default stops: {e}")
+            self.risk_profiles = {}
+
     def start_account_trading(self, account: Dict[str, Any]):
         """Start trading for a single account (runs in separate thread)"""
         account_id = account['id']
@@ -56,32 +84,64 @@ class ContinuousTradingOrchestrator:
         # Add to sys.path
         sys.path.insert(0, str(Path(__file__).parent.parent / 'pillar-a-trading' / 'agent-3.0'))
         sys.path.insert(0, str(Path(__file__).parent.parent / 'pillar-a-trading' / 'bots' / 'pattern-recognition'))
+        sys.path.insert(0, str(Path(__file__).parent.parent / 'pillar-a-trading' / 'bots' / 'execution'))
+        sys.path.insert(0, str(Path(__file__).parent.parent / 'pillar-a-trading' / 'risk'))
 
         from agent_3_orchestrator import Agent3Orchestrator
         from candlestick_analyzer import CandlestickAnalyzer
+        from position_engine import PositionEngine
+        from risk_engine import RiskEngine
 
         # Initialize trading components
         agent = Agent3Orchestrator()
         analyzer = CandlestickAnalyzer(pair=account.get('trading_pair', 'BTC/USD'))
 
-        # Initialize account stats
-        self.account_stats[account_id] = {
-            'name': account_name,
-            'profile': account['profile'],
-            'environment': account['environment'],
-            'initial_capital': account['initial_capital'],
-            'current_capital': account['initial_capital'],
-            'total_trades': 0,
-            'winning_trades': 0,
-            'losing_trades': 0,
-            'total_profit': 0.0,
-            'total_loss': 0.0,
-            'current_positions': [],
-            'last_trade_time': None,
-            'uptime_start': datetime.now().isoformat(),
-            'status': 'RUNNING'
-        }
-
+        # Initialize account stats (resume from supervisor snapshot after a shard restart)
+        if account_id in self.initial_stats:
+            self.account_stats[account_id] = dict(self.initial_stats[account_id], status='RUNNING')
+        else:
+            self.account_stats[account_id] = {
+                'name': account_name,
+                'profile': account['profile'],
+                'environment': account['environment'],
+                'initial_capital': account['initial_capital'],
+                'current_capital': account['initial_capital'],
+                'total_trades': 0,
+                'winning_trades': 0,
+                'losing_trades': 0,
+                'total_profit': 0.0,
+                'total_loss': 0.0,
+                'unrealized_pnl': 0.0,
+                'current_positions': [],
+                'last_trade_time': None,
+                'uptime_start': datetime.now().isoformat(),
+                'status': 'RUNNING'
+            }
+
+        # Position lifecycle (stops / targets from the account's risk profile)
+        stats = self.account_stats[account_id]
+        profile = self.risk_profiles.get(account['profile'], {})
+        engine = PositionEngine(
+            capital=stats['current_capital'],
+            stop_loss_pct=profile.get('stop_loss_percentage', 0.02),
+            take_profit_pct=profile.get('take_profit_percentage', 0.04)
+        )
+        engine.winning_trades = stats['winning_trades']
+        engine.losing_trades = stats['losing_trades']
+        engine.total_profit = stats['total_profit']
+        engine.total_loss = stats['total_loss']
+        engine.load_positions(stats['current_positions'])
+        stats['current_positions'] = engine.open_positions()
+        self.position_engines[account_id] = engine
+
+        # One risk engine shared by all account threads in this process
+        with self.risk_lock:
+            if self.risk_engine is None:
+                self.risk_engine = RiskEngine(self.risk_profiles_file)
+        self.risk_engine.register_account(account_id, account['profile'], stats['current_capital'])
+        self.risk_engine.restore_open(account_id, len(stats['current_positions']))
+
+        pair = account.get('trading_pair', 'BTC/USD')
         iteration = 0
         while self.running:
             try:
@@ -90,12 +150,25 @@ class ContinuousTradingOrchestrator:
                 # Simulate market data fetch (in production, connect to real API)
                 candles = self.fetch_market_data(account)
 
+                # Mark open positions to market; closes stops / targets
+                closed = engine.mark_to_market(pair, candles[-1]['close'])
+                if closed:
+                    self.record_closed_positions(account_id, closed)
+                stats['unrealized_pnl'] = engine.unrealized_pnl()
+
                 # Analyze patterns
                 signal = analyzer.analyze_pattern(candles)
 
-                # Execute trades based on signal
-                if signal.get('type') in ['BUY', 'SELL'] and signal.get('confidence', 0) > 0.70:
-                    self.execute_trade(account_id, signal)
+                # Execute trades based on signal (profile limits enforced by the risk engine)
+                if signal.get('type') in ['BUY', 'SELL']:
+                    allowed, reason = self.risk_engine.check_trade(
+                        account_id, signal.get('confidence', 0), signal.get('pattern'))
+                    if allowed:
+                        if stats['status'].startswith('HALTED'):
+                            stats['status'] = 'RUNNING'
+                        self.execute_trade(account_id, signal)
+                    elif reason.startswith(('Account halted', 'Profile halted')):
+                        stats['status'] = f'HALTED: {reason}'
 
                 # Update stats every 100 iterations
                 if iteration % 100 == 0:
@@ -144,42 +217,75 @@ class ContinuousTradingOrchestrator:
     def execute_trade(self, account_id: str, signal: Dict[str, Any]):
         """Execute trade based on signal"""
         stats = self.account_stats[account_id]
+        engine = self.position_engines[account_id]
+
+        # Signal reversal closes opposite-side positions on the pair
+        closed = engine.on_signal(signal['pair'], signal['type'], signal.get('price', 0))
+        if closed:
+            self.record_closed_positions(account_id, closed)
 
         # Calculate position size based on risk parameters
-        position_size = stats['current_capital'] * 0.02  # 2% of capital
+        position_size = self.risk_engine.position_size(account_id)
 
         # Simulate trade execution
-        trade = {
-            'timestamp': datetime.now().isoformat(),
-            'type': signal['type'],
-            'pair': signal['pair'],
-            'pattern': signal['pattern'],
-            'confidence': signal['confidence'],
-            'price': signal.get('price', 0),
-            'size': position_size,
-            'profit_loss': 0  # Will be calculated on close
-        }
+        trade = engine.open_position(
+            signal['pair'],
+            signal['type'],
+            signal.get('price', 0),
+            position_size,
+            pattern=signal['pattern'],
+            confidence=signal['confidence']
+        )
 
         # Update stats
         stats['total_trades'] += 1
         stats['last_trade_time'] = trade['timestamp']
-        stats['current_positions'].append(trade)
+        stats['current_positions'] = engine.open_positions()
+        self.risk_engine.record_open(account_id)
 
         logger.info(f"💰 {stats['name']} executed {signal['type']} - {signal['pattern']} "
                    f"@ ${signal.get('price', 0):,.2f} (Confidence: {signal['confidence']:.2%})")
 
+    def record_closed_positions(self, account_id: str, closed: List[Dict[str, Any]]):
+        """Fold closed positions into account capital and win/loss counters"""
+        stats = self.account_stats[account_id]
+        engine = self.position_engines[account_id]
+
+        stats['current_capital'] = engine.capital
+        stats['winning_trades'] = engine.winning_trades
+        stats['losing_trades'] = engine.losing_trades
+        stats['total_profit'] = engine.total_profit
+        stats['total_loss'] = engine.total_loss
+        stats['current_positions'] = engine.open_positions()
+
+        for position in closed:
+            self.risk_engine.record_close(account_id, position['profit_loss'])
+            logger.info(f"🔒 {stats['name']} closed {position['type']} {position['pair']} "
+                        f"({position['close_reason']}): P/L ${position['profit_loss']:,.2f}")
+
     def save_account_stats(self):
         """Save all account statistics"""
+        if self.stats_queue is not None:
+            self.publish_account_stats()
+            return
+
         try:
-            stats_file = Path('logs') / f'trading_stats_{datetime.now().strftime("%Y%m%d")}.json'
-            with open(stats_file, 'w') as f:
-                json.dump({
-                    'timestamp': datetime.now().isoformat(),
-                    'accounts': self.account_stats
-                }, f, indent=2)
+            # Built lazily (shard workers publish instead), but exactly once
+            with self.stats_store_lock:
+                if self.stats_store is None:
+                    self.stats_store = TradingStatsStore()
+            self.stats_store.record(self.account_stats)
         except Exception as e:
             logger.error(f"Failed to save stats: {e}")
 
+    def publish_account_stats(self):
+        """Push a stats snapshot to the shard supervisor"""
+        try:
+            snapshot = {account_id: dict(stats) for account_id, stats in list(self.account_stats.items())}
+            self.stats_queue.put_nowait((os.getpid(), snapshot))
+        except Exception as e:
+            logger.error(f"Failed to publish stats: {e}")
+
     def start_all_accounts(self):
         """Start trading on all accounts in separate threads"""
         logger.info("=" * 70)
@@ -190,6 +296,8 @@ class ContinuousTradingOrchestrator:
         logger.info("=" * 70)
 
         for account in self.config['accounts']:
+            if self.account_ids is not None and account['id'] not in self.account_ids:
+                continue
             if account.get('run_24_7', True):
                 thread = threading.Thread(
                     target=self.start_account_trading,
@@ -250,6 +358,221 @@ class ContinuousTradingOrchestrator:
         print("=" * 70)
 
 
+def run_trading_shard(shard_id: int, account_ids: List[str], stats_queue: Any,
+                      initial_stats: Dict[str, Dict], publish_interval: float = 30.0):
+    """
+    Worker process entry point - runs one shard of the fleet
+
+    Args:
+        shard_id: Shard number (for logging)
+        account_ids: Accounts owned by this shard
+        stats_queue: Queue back to the supervisor
+        initial_stats: Last known stats for the shard's accounts
+        publish_interval: Seconds between stats snapshots
+    """
+    orchestrator = ContinuousTradingOrchestrator(
+        account_ids=account_ids,
+        stats_queue=stats_queue,
+        initial_stats=initial_stats
+    )
+    logger.info(f"🧩 Shard {shard_id} (pid {os.getpid()}) owns {len(account_ids)} accounts")
+    orchestrator.start_all_accounts()
+
+    try:
+        while orchestrator.running:
+            time.sleep(publish_interval)
+            orchestrator.publish_account_stats()
+    except KeyboardInterrupt:
+        orchestrator.running = False
+
+
+class ShardedTradingSupervisor(ContinuousTradingOrchestrator):
+    """
+    Runs the fleet across N worker processes so CPU-bound analysis is not
+    serialized behind one GIL. Accounts are partitioned by trading pair,
+    crashed shards are restarted, and stats are aggregated over a local queue.
+    """
+
+    def __init__(self, num_shards: Optional[int] = None):
+        super().__init__()
+        scheduler = self.config.get('scheduler', {})
+        self.num_shards = max(1, num_shards or multiprocessing.cpu_count())
+        self.restart_on_error = scheduler.get('restart_on_error', True)
+        self.max_retries = scheduler.get('max_retries', 3)
+        self.publish_interval = scheduler.get('stats_publish_seconds', 30)
+
+        self.shard_queue = multiprocessing.Queue()
+        self.shards: Dict[int, multiprocessing.Process] = {}
+        self.shard_accounts: Dict[int, List[str]] = {}
+        self.shard_restarts: Dict[int, int] = {}
+        self.shard_pids: Dict[int, int] = {}
+
+    def partition_accounts(self, num_shards: int) -> List[List[str]]:
+        """
+        Partition accounts across shards by pair affinity
+
+        Accounts sharing a trading pair stay on the same shard where possible
+        (shared market data and analyzer warm-up). Pair groups larger than a
+        fair share are split so one popular pair cannot pin the fleet to one core.
+
+        Returns:
+            List of account id lists, one per shard
+        """
+        accounts = [a for a in self.config['accounts'] if a.get('run_24_7', True)]
+        num_shards = max(1, min(num_shards, len(accounts) or 1))
+        fair_share = -(-len(accounts) // num_shards)  # ceil
+
+        by_pair: Dict[str, List[str]] = {}
+        for account in accounts:
+            by_pair.setdefault(account.get('trading_pair', 'BTC/USD'), []).append(account['id'])
+
+        shards: List[List[str]] = [[] for _ in range(num_shards)]
+        for pair in sorted(by_pair, key=lambda p: len(by_pair[p]), reverse=True):
+            target = min(shards, key=len)
+            for account_id in by_pair[pair]:
+                if len(target) >= fair_share:
+                    target = min(shards, key=len)
+                target.append(account_id)
+
+        return [shard for shard in shards if shard]
+
+    def retire_shard_process(self, shard_id: int):
+        """Forget a shard's current process so its late stats snapshots are dropped"""
+        process = self.shards.pop(shard_id, None)
+        if process is not None:
+            self.shard_pids.pop(process.pid, None)
+
+    def start_shard(self, shard_id: int):
+        """Spawn (or respawn) a shard worker process"""
+        self.retire_shard_process(shard_id)
+        account_ids = self.shard_accounts[shard_id]
+        initial_stats = {aid: self.account_stats[aid] for aid in account_ids if aid in self.account_stats}
+
+        process = multiprocessing.Process(
+            target=run_trading_shard,
+            args=(shard_id, account_ids, self.shard_queue, initial_stats, self.publish_interval),
+            daemon=True,
+            name=f"TradingShard-{shard_id}"
+        )
+        process.start()
+        self.shards[shard_id] = process
+        self.shard_pids[process.pid] = shard_id
+
+    def start_all_accounts(self):
+        """Partition the fleet and start one worker process per shard"""
+        logger.info("=" * 70)
+        logger.info("🚀 STARTING 24/7 TRADING SYSTEM (SHARDED)")
+        logger.info("=" * 70)
+
+        for shard_id, account_ids in enumerate(self.partition_accounts(self.num_shards)):
+            self.shard_accounts[shard_id] = account_ids
+            self.shard_restarts[shard_id] = 0
+            self.start_shard(shard_id)
+            logger.info(f"🧩 Shard {shard_id}: {', '.join(account_ids)}")
+
+        logger.info(f"✅ Started {len(self.shards)} trading shards")
+        logger.info("=" * 70)
+
+    def drain_stats(self, timeout: float):
+        """Merge stats snapshots published by shards into account_stats"""
+        deadline = time.time() + timeout
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            try:
+                pid, snapshot = self.shard_queue.get(timeout=remaining)
+            except queue.Empty:
+                return
+
+            shard_id = self.shard_pids.get(pid)
+            if shard_id is None:
+                continue  # Late message from a shard that has been replaced
+            owned = set(self.shard_accounts.get(shard_id, []))
+            for account_id, stats in snapshot.items():
+                if account_id in owned:
+                    self.account_stats[account_id] = stats
+
+    def rebalance(self, failed_shard: int):
+        """Retire a shard that keeps crashing and spread its accounts over the rest"""
+        orphans = self.shard_accounts.pop(failed_shard, [])
+        self.retire_shard_process(failed_shard)
+        self.shard_restarts.pop(failed_shard, None)
+
+        if not self.shard_accounts:
+            logger.error(f"❌ No healthy shards left to take {len(orphans)} accounts")
+            self.running = False
+            return
+
+        receivers = set()
+        for account_id in orphans:
+            target = min(self.shard_accounts, key=lambda sid: len(self.shard_accounts[sid]))
+            self.shard_accounts[target].append(account_id)
+            receivers.add(target)
+            if account_id in self.account_stats:
+                self.account_stats[account_id]['status'] = 'REBALANCING'
+
+        # Restart receiving shards with their extended account lists
+        for shard_id in receivers:
+            self.shards[shard_id].terminate()
+            self.shards[shard_id].join(timeout=10)
+            self.start_shard(shard_id)
+
+        logger.warning(f"⚖️ Rebalanced {len(orphans)} accounts from shard {failed_shard} "
+                       f"across {len(self.shard_accounts)} shards")
+
+    def check_shards(self):
+        """Restart crashed shards, rebalancing when one exceeds max_retries"""
+        for shard_id, process in list(self.shards.items()):
+            if self.shards.get(shard_id) is not process or process.is_alive():
+                continue  # Healthy, or already replaced by a rebalance in this pass
+
+            logger.error(f"❌ Shard {shard_id} exited (code {process.exitcode})")
+            for account_id in self.shard_accounts.get(shard_id, []):
+                if account_id in self.account_stats:
+                    self.account_stats[account_id]['status'] = f'SHARD_DOWN: exit {process.exitcode}'
+
+            if not self.restart_on_error:
+                continue
+
+            self.shard_restarts[shard_id] += 1
+            if self.shard_restarts[shard_id] > self.max_retries:
+                self.rebalance(shard_id)
+            else:
+                logger.info(f"🔄 Restarting shard {shard_id} "
+                            f"(attempt {self.shard_restarts[shard_id]}/{self.max_retries})")
+                self.start_shard(shard_id)
+
+    def monitor_forever(self):
+        """Aggregate shard stats and keep shards alive"""
+        last_heartbeat = time.time()
+        try:
+            while self.running:
+                self.drain_stats(timeout=self.publish_interval)
+                self.check_shards()
+
+                if time.time() - last_heartbeat >= 300:
+                    last_heartbeat = time.time()
+                    alive = sum(1 for p in self.shards.values() if p.is_alive())
+                    logger.info(f"💓 Heartbeat: {alive}/{len(self.shards)} shards active, "
+                                f"{len(self.account_stats)} accounts reporting")
+                    self.save_account_stats()
+
+        except KeyboardInterrupt:
+            logger.info("\n📊 CURRENT STATUS")
+            self.print_status()
+            self.stop_all_shards()
+
+    def stop_all_shards(self):
+        """Terminate all shard processes"""
+        self.running = False
+        for process in self.shards.values():
+            process.terminate()
+        for process in self.shards.values():
+            process.join(timeout=10)
+        self.save_account_stats()
+
+
 def main():
     """Main entry point"""
     print("""
@@ -259,7 +582,12 @@ def main():
     ╚═══════════════════════════════════════════════════════════════════╝
     """)
 
-    orchestrator = ContinuousTradingOrchestrator()
+    # TRADING_SHARDS > 1 runs the fleet across worker processes
+    num_shards = int(os.getenv('TRADING_SHARDS', '1'))
+    if num_shards > 1:
+        orchestrator = ShardedTradingSupervisor(num_shards=num_shards)
+    else:
+        orchestrator = ContinuousTradingOrchestrator()
     orchestrator.start_all_accounts()
     orchestrator.monitor_forever()
 
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Trading Stats Store
+Incremental, crash-safe persistence for 24/7 fleet account statistics
+
+Layout (under logs/trading_stats/):
+    events/<account_id>.jsonl  - append-only change records per account
+    snapshot.json              - compacted full state, replaced atomically
+    summary.json               - small per-account index read by dashboards/reports
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+import logging
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger('TradingStatsStore')
+
+# Fields kept out of the summary index (can grow without bound)
+DETAIL_FIELDS = ('current_positions',)
+
+
+def atomic_write_json(path: Path, data: Any):
+    """Write JSON via temp file + rename so readers never see a torn file"""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, separators=(',', ':'), default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class TradingStatsStore:
+    """Append-only event log + periodic snapshots for account stats"""
+
+    def __init__(self, base_dir: Optional[Path] = None, compact_every: int = 1000,
+                 compact_interval_seconds: float = 3600):
+        """
+        Args:
+            base_dir: Store directory (default: logs/trading_stats)
+            compact_every: Compact after this many event records
+            compact_interval_seconds: Compact at least this often while records arrive
+        """
+        self.base_dir = Path(base_dir) if base_dir else Path('logs') / 'trading_stats'
+        self.events_dir = self.base_dir / 'events'
+        self.snapshot_file = self.base_dir / 'snapshot.json'
+        self.summary_file = self.base_dir / 'summary.json'
+        self.events_dir.mkdir(parents=True, exist_ok=True)
+
+        self.compact_every = compact_every
+        self.compact_interval_seconds = compact_interval_seconds
+
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self._seq: Dict[str, int] = {}
+        self._events_since_compact = 0
+        self._last_compact = time.time()
+
+        self._state, self._seq = self._replay()
+
+    # ------------------------------------------------------------------ writes
+
+    def record(self, account_stats: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Persist only what changed since the last call
+
+        Args:
+            account_stats: Current stats keyed by account id
+
+        Returns:
+            Number of event records appended
+        """
+        with self._lock:
+            written = 0
+            for account_id, stats in list(account_stats.items()):
+                event = self._diff(self._state.get(account_id, {}), stats)
+                if not event:
+                    continue
+
+                self._seq[account_id] = self._seq.get(account_id, 0) + 1
+                event['seq'] = self._seq[account_id]
+                event['ts'] = datetime.now().isoformat()
+
+                with open(self._events_file(account_id), 'a') as f:
+                    f.write(json.dumps(event, separators=(',', ':'), default=str) + '\n')
+
+                self._apply(self._state.setdefault(account_id, {}), event)
+                written += 1
+
+            if written:
+                self._events_since_compact += written
+                atomic_write_json(self.summary_file, self._build_summary())
+
+                if (self._events_since_compact >= self.compact_every or
+                        time.time() - self._last_compact >= self.compact_interval_seconds):
+                    self._compact()
+
+            return written
+
+    def compact(self):
+        """Fold the event logs into a fresh snapshot"""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        atomic_write_json(self.snapshot_file, {
+            'timestamp': datetime.now().isoformat(),
+            'seq': self._seq,
+            'accounts': self._state
+        })
+        # Safe to truncate: replay skips any event at or below the snapshot seq
+        for events_file in self.events_dir.glob('*.jsonl'):
+            open(events_file, 'w').close()
+
+        self._events_since_compact = 0
+        self._last_compact = time.time()
+
+    # ------------------------------------------------------------------- reads
+
+    def load(self) -> Dict[str, Any]:
+        """Full stats (including positions) in the legacy trading_stats format"""
+        with self._lock:
+            return {
+                'timestamp': datetime.now().isoformat(),
+                'accounts': copy.deepcopy(self._state)
+            }
+
+    @staticmethod
+    def summary_path(base_dir: Optional[Path] = None) -> Path:
+        """Location of the summary index (does not create the store)"""
+        return (Path(base_dir) if base_dir else Path('logs') / 'trading_stats') / 'summary.json'
+
+    @classmethod
+    def load_summary(cls, base_dir: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+        """
+        Read the summary index without touching event logs
+
+        Returns:
+            Summary dict, or None when the store has not been written yet
+        """
+        summary_file = cls.summary_path(base_dir)
+        if not summary_file.exists():
+            return None
+        with open(summary_file, 'r') as f:
+            return json.load(f)
+
+    # ----------------------------------------------------------------- helpers
+
+    def _events_file(self, account_id: str) -> Path:
+        return self.events_dir / f"{account_id}.jsonl"
+
+    @staticmethod
+    def _diff(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+        """Build an event with changed fields; lists that only grew log just the tail"""
+        changed, appended = {}, {}
+        for key, value in current.items():
+            old = previous.get(key)
+            if key in previous and old == value:
+                continue
+            if isinstance(value, list) and isinstance(old, list) and \
+                    len(value) > len(old) and value[:len(old)] == old:
+                appended[key] = copy.deepcopy(value[len(old):])
+            else:
+                changed[key] = copy.deepcopy(value)
+
+        event = {}
+        if changed:
+            event['set'] = changed
+        if appended:
+            event['append'] = appended
+        return event
+
+    @staticmethod
+    def _apply(state: Dict[str, Any], event: Dict[str, Any]):
+        state.update(event.get('set', {}))
+        for key, items in event.get('append', {}).items():
+            state.setdefault(key, []).extend(items)
+
+    def _replay(self):
+        """Rebuild state from the latest snapshot plus newer events"""
+        state: Dict[str, Dict[str, Any]] = {}
+        seq: Dict[str, int] = {}
+
+        if self.snapshot_file.exists():
+            try:
+                with open(self.snapshot_file, 'r') as f:
+                    snapshot = json.load(f)
+                state = snapshot.get('accounts', {})
+                seq = snapshot.get('seq', {})
+            except Exception as e:
+                logger.error(f"Failed to read stats snapshot: {e}")
+
+        for events_file in self.events_dir.glob('*.jsonl'):
+            account_id = events_file.stem
+            data = events_file.read_bytes()
+            if data and not data.endswith(b'\n'):
+                # Drop a partial trailing record left by a crash mid-write
+                data = data[:data.rfind(b'\n') + 1]
+                with open(events_file, 'wb') as f:
+                    f.write(data)
+
+            for line in data.decode().splitlines():
+                event = json.loads(line)
+                if event.get('seq', 0) <= seq.get(account_id, 0):
+                    continue
+                self._apply(state.setdefault(account_id, {}), event)
+                seq[account_id] = event['seq']
+
+        return state, seq
+
+    def _build_summary(self) -> Dict[str, Any]:
+        accounts = {}
+        for account_id, stats in self._state.items():
+            entry = {k: v for k, v in stats.items() if k not in DETAIL_FIELDS}
+            entry['open_positions'] = len(stats.get('current_positions', []))
+            accounts[account_id] = entry
+
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'accounts': accounts
+        }
@@ -0,0 +1,134 @@
+"""
+Cost Basis Tests
+FIFO / LIFO / specific-identification matching, withdrawals with in-kind
+fees, platform-matched lots (including a zero basis) and shortfalls
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'pillar-a-trading' / 'learning'))
+
+from cost_basis import CostBasisEngine
+from ledger_parsers import LEDGER_COLUMNS, REALIZED_LOT_KIND
+
+BTC = 10 ** 8   # one unit in fixed-point quantity
+
+
+def ns(day: str) -> int:
+    return pd.Timestamp(day).value
+
+
+def entry(date, kind, asset, quantity, usd, fee=0, fee_asset='', cost_basis=0, acquired=None,
+          counter_asset='', counter_quantity=0, status='approved'):
+    return {'source': 'Test', 'record_id': '', 'date': pd.Timestamp(date),
+            'acquired_date': pd.Timestamp(acquired) if acquired else pd.NaT, 'kind': kind,
+            'status': status, 'asset': asset, 'quantity': quantity, 'counter_asset': counter_asset,
+            'counter_quantity': counter_quantity, 'fee': fee, 'fee_asset': fee_asset,
+            'usd_value': usd, 'cost_basis': cost_basis, 'account': '', 'category': '',
+            'description': ''}
+
+
+def ledger(*rows) -> pd.DataFrame:
+    return pd.DataFrame(list(rows), columns=list(LEDGER_COLUMNS)).astype(LEDGER_COLUMNS)
+
+
+def buy_two_lots(engine):
+    engine.acquire('BTC', BTC, 10_000_00, ns('2023-01-01'), lot_id='cheap')
+    engine.acquire('BTC', BTC, 30_000_00, ns('2024-06-01'), lot_id='dear')
+
+
+@pytest.mark.parametrize('method, lot_id, gain', [('fifo', 'cheap', 15_000_00), ('lifo', 'dear', -5_000_00)])
+def test_method_picks_the_lot(method, lot_id, gain):
+    engine = CostBasisEngine(method)
+    buy_two_lots(engine)
+    assert engine.dispose('BTC', BTC, 25_000_00, ns('2024-07-01')) == gain
+    realized = engine.realized_frame()
+    assert realized['lot_id'].tolist() == [lot_id]
+    assert realized['long_term'].tolist() == [method == 'fifo']
+
+
+def test_specific_identification_then_fifo_for_the_rest():
+    engine = CostBasisEngine('specific')
+    buy_two_lots(engine)
+    engine.dispose('BTC', BTC + BTC // 2, 30_000_00, ns('2024-07-01'), lot_ids=['dear'])
+    realized = engine.realized_frame()
+    assert realized['lot_id'].tolist() == ['dear', 'cheap']
+    assert realized['quantity'].tolist() == [BTC, BTC // 2]
+    assert realized['cost_basis'].tolist() == [30_000_00, 5_000_00]
+    assert realized['proceeds'].sum() == 30_000_00
+    assert engine.open_lots()['cost_basis'].tolist() == [5_000_00]
+
+
+def test_partial_lots_conserve_basis_exactly():
+    engine = CostBasisEngine()
+    engine.acquire('ETH', 3, 100, ns('2024-01-01'))
+    for _ in range(3):
+        engine.dispose('ETH', 1, 50, ns('2024-02-01'))
+    assert engine.realized_frame()['cost_basis'].tolist() == [33, 33, 34]
+
+
+def test_shortfall_is_realized_with_zero_basis():
+    engine = CostBasisEngine()
+    engine.acquire('BTC', BTC, 10_000_00, ns('2024-01-01'))
+    assert engine.dispose('BTC', 2 * BTC, 40_000_00, ns('2024-02-01')) == 30_000_00
+    assert engine.shortfall == {'BTC': BTC}
+    assert engine.realized_frame()['holding_days'].tolist() == [31, -1]
+
+
+def test_withdrawal_removes_lots_and_disposes_the_fee():
+    engine = CostBasisEngine()
+    realized = engine.process_ledger(ledger(
+        entry('2024-01-01', 'Top up Crypto', 'BTC', BTC, 40_000_00),
+        entry('2024-02-01', 'Withdrawal', 'BTC', -BTC // 2, -21_000_00, fee=BTC // 10, fee_asset='BTC'),
+        entry('2024-02-02', 'Withdrawal', 'BTC', -BTC, -42_000_00, status='rejected')
+    ))
+    # The fee leaves as a zero-proceeds disposal; the rest is moved without a gain
+    assert realized['kind'].tolist() == ['fee']
+    assert realized['quantity'].tolist() == [BTC // 10]
+    assert realized['gain'].tolist() == [-4_000_00]
+    assert engine.open_lots()['quantity'].tolist() == [BTC // 2]
+    assert engine.stats['withdrawals'] == 1
+
+
+def test_exchange_disposes_one_asset_and_acquires_the_other():
+    engine = CostBasisEngine()
+    engine.process_ledger(ledger(
+        entry('2024-01-01', 'Top up Crypto', 'BTC', BTC, 40_000_00),
+        entry('2024-03-01', 'Exchange', 'BTC', -BTC // 4, -15_000_00,
+              counter_asset='ETH', counter_quantity=5 * BTC)
+    ))
+    assert engine.realized_frame()['gain'].tolist() == [5_000_00]
+    lots = engine.open_lots().set_index('asset')
+    assert lots.loc['ETH', 'cost_basis'] == 15_000_00
+    assert lots.loc['BTC', 'quantity'] == 3 * BTC // 4
+
+
+def test_platform_matched_lots_keep_a_zero_basis():
+    engine = CostBasisEngine()
+    realized = engine.process_ledger(ledger(
+        entry('2024-05-01', REALIZED_LOT_KIND, 'DOGE', 0, 150_00, cost_basis=0, acquired='2023-01-01'),
+        entry('2024-05-02', REALIZED_LOT_KIND, 'BTC', 0, 2_021_23, cost_basis=2_001_75, acquired='2024-05-01')
+    ))
+    assert realized['asset'].tolist() == ['DOGE', 'BTC']
+    assert realized['cost_basis'].tolist() == [0, 2_001_75]
+    assert realized['gain'].tolist() == [150_00, 19_48]
+    assert realized['long_term'].tolist() == [True, False]
+    assert not engine.lots and not engine.shortfall
+
+
+def test_process_ledger_is_incremental():
+    engine = CostBasisEngine()
+    engine.process_ledger(ledger(entry('2024-01-01', 'Top up Crypto', 'BTC', BTC, 40_000_00)))
+    new = engine.process_ledger(ledger(entry('2024-02-01', 'Sell', 'BTC', -BTC, 50_000_00)))
+    assert new['gain'].tolist() == [10_000_00]
+    assert engine.realized_count == 1
+    assert engine.get_summary()['realized_gain'] == 10_000.0
+
+
+def test_unknown_method_is_refused():
+    with pytest.raises(ValueError):
+        CostBasisEngine('hifo')
@@ -0,0 +1,151 @@
+"""
+Exchange Simulator Tests
+Market / limit / stop / stop-limit fills, lazy cancellation, latency,
+bar replay and the bounded order / fill history
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'pillar-a-trading' / 'bots' / 'execution'))
+
+from exchange_simulator import ExchangeSimulator, FixedLatency, FixedBpsSlippage
+
+
+def make_exchange(**kwargs):
+    exchange = ExchangeSimulator(spread_bps=0.0, **kwargs)
+    exchange.update_price('X', 100.0, timestamp=0.0)
+    return exchange
+
+
+def test_market_order_fills_against_the_reference_quote():
+    exchange = make_exchange(slippage_model=FixedBpsSlippage(10))
+    order = exchange.submit_order('X', 'BUY', 2)
+    assert order.status == 'FILLED'
+    assert order.average_price == 100.1
+    assert exchange.fills[-1]['liquidity'] == 'SYNTHETIC'
+
+
+def test_market_order_without_a_price_is_rejected():
+    exchange = ExchangeSimulator()
+    order = exchange.submit_order('Y', 'BUY', 1)
+    assert order.status == 'REJECTED' and order.reason == 'NO_LIQUIDITY'
+
+
+def test_invalid_orders_are_rejected():
+    exchange = make_exchange()
+    assert exchange.submit_order('X', 'HOLD', 1).status == 'REJECTED'
+    assert exchange.submit_order('X', 'BUY', 0).status == 'REJECTED'
+    assert exchange.submit_order('X', 'BUY', 1, 'LIMIT').reason == 'Limit price required'
+
+
+def test_crossing_orders_match_in_the_book_at_the_resting_price():
+    exchange = ExchangeSimulator(synthetic_liquidity=False)
+    resting = exchange.submit_order('X', 'SELL', 5, 'LIMIT', price=101.0)
+    taker = exchange.submit_order('X', 'BUY', 3, 'LIMIT', price=102.0)
+    assert taker.status == 'FILLED' and taker.average_price == 101.0
+    assert resting.status == 'PARTIALLY_FILLED' and resting.remaining == 2
+    assert [fill['liquidity'] for fill in exchange.fills] == ['MAKER', 'TAKER']
+    assert exchange.get_book('X').depth()['asks'] == [(101.0, 2)]
+
+
+def test_limit_order_rests_until_the_range_trades_through():
+    exchange = make_exchange()
+    order = exchange.submit_order('X', 'BUY', 1, 'LIMIT', price=95.0)
+    assert order.status == 'NEW'
+    assert exchange.update_price('X', 97.0, timestamp=1.0, high=98.0, low=96.0) == []
+    fills = exchange.update_price('X', 96.0, timestamp=2.0, high=97.0, low=94.0)
+    assert [(fill['order_id'], fill['price']) for fill in fills] == [(order.id, 95.0)]
+    assert order.status == 'FILLED'
+
+
+def test_bar_volume_caps_resting_fills():
+    exchange = make_exchange(bar_participation=0.5)
+    order = exchange.submit_order('X', 'SELL', 10, 'LIMIT', price=105.0)
+    exchange.update_price('X', 104.0, timestamp=1.0, high=106.0, low=103.0, volume=8)
+    assert order.filled_quantity == 4 and order.status == 'PARTIALLY_FILLED'
+
+
+def test_stop_triggers_into_a_market_order():
+    exchange = make_exchange()
+    stop = exchange.submit_order('X', 'SELL', 1, 'STOP', stop_price=95.0)
+    assert stop.status == 'STOP_WAITING'
+    exchange.update_price('X', 96.0, timestamp=1.0)
+    assert stop.status == 'STOP_WAITING'
+    exchange.update_price('X', 94.0, timestamp=2.0)
+    assert stop.status == 'FILLED' and stop.average_price == 94.0
+
+
+def test_stop_limit_rests_when_the_limit_is_not_marketable():
+    exchange = make_exchange()
+    order = exchange.submit_order('X', 'BUY', 1, 'STOP_LIMIT', price=105.0, stop_price=104.0)
+    exchange.update_price('X', 106.0, timestamp=1.0, high=106.0, low=105.5)
+    assert order.order_type == 'LIMIT' and order.status == 'NEW'
+    exchange.update_price('X', 104.5, timestamp=2.0, high=105.5, low=104.5)
+    assert order.status == 'FILLED' and order.average_price == 105.0
+
+
+def test_cancelled_orders_are_dropped_lazily():
+    exchange = ExchangeSimulator(synthetic_liquidity=False)
+    first = exchange.submit_order('X', 'SELL', 1, 'LIMIT', price=101.0)
+    second = exchange.submit_order('X', 'SELL', 1, 'LIMIT', price=102.0)
+    assert exchange.cancel_order(first.id)
+    assert not exchange.cancel_order(first.id)
+    assert exchange.get_book('X').best_ask() == 102.0
+
+    taker = exchange.submit_order('X', 'BUY', 1, 'LIMIT', price=105.0)
+    assert taker.average_price == 102.0 and second.status == 'FILLED'
+    assert first.filled_quantity == 0
+
+
+def test_cancelled_stops_never_fire():
+    exchange = make_exchange()
+    stop = exchange.submit_order('X', 'BUY', 1, 'STOP', stop_price=101.0)
+    exchange.cancel_order(stop.id)
+    assert exchange.update_price('X', 102.0, timestamp=1.0) == []
+    assert stop.status == 'CANCELED'
+
+
+def test_latency_delays_activation():
+    exchange = make_exchange(latency_model=FixedLatency(0.5))
+    order = exchange.submit_order('X', 'BUY', 1)
+    assert order.status == 'PENDING'
+    exchange.update_price('X', 101.0, timestamp=0.4)
+    assert order.status == 'PENDING'
+    exchange.update_price('X', 102.0, timestamp=1.0)
+    assert order.status == 'FILLED' and order.average_price == 101.0
+
+
+def test_replay_drives_a_strategy_over_bars():
+    bars = [
+        {'timestamp': 1, 'open': 100, 'high': 101, 'low': 99, 'close': 100},
+        {'timestamp': 2, 'open': 100, 'high': 100, 'low': 96, 'close': 97},
+        {'timestamp': 3, 'open': 97, 'high': 104, 'low': 97, 'close': 103},
+        {'timestamp': 4, 'open': 103, 'high': 106, 'low': 102, 'close': 105}
+    ]
+    exchange = ExchangeSimulator(spread_bps=0.0)
+
+    def strategy(ex, bar):
+        if bar['timestamp'] == 1:
+            ex.submit_order('X', 'BUY', 1, 'LIMIT', price=97.0, client_id='entry')
+            ex.submit_order('X', 'SELL', 1, 'LIMIT', price=104.0, client_id='exit')
+
+    fills = exchange.replay(bars, symbol='X', on_bar=strategy)
+    assert [(fill['client_id'], fill['price'], fill['timestamp']) for fill in fills] == [
+        ('entry', 97.0, 2.0), ('exit', 104.0, 3.0)]
+    assert exchange.clock == 4.0
+
+
+def test_terminal_orders_and_fills_are_bounded():
+    exchange = make_exchange(max_finished_orders=10, max_fills=5)
+    for _ in range(50):
+        exchange.submit_order('X', 'BUY', 1)
+        exchange.cancel_order(exchange.submit_order('X', 'SELL', 1, 'LIMIT', price=200.0).id)
+    resting = exchange.submit_order('X', 'SELL', 1, 'LIMIT', price=200.0)
+
+    assert list(exchange.orders) == [resting.id]
+    assert len(exchange.finished) == 10 and len(exchange.fills) == 5
+    assert exchange.get_order(1) is None
+    assert exchange.get_order(resting.id - 1)['status'] == 'CANCELED'
+    stats = exchange.get_stats()
+    assert stats['orders'] == 101 and stats['open_orders'] == 1 and stats['fills'] == 50
@@ -0,0 +1,157 @@
+"""
+Execution Backend Tests
+Routing by task_type and @run_on, the timeout watchdog, cancellation
+propagation into each backend and BrokenProcessPool recovery
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import CancelledError
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'agent-4.0' / 'orchestrator'))
+
+from execution_backends import (AsyncioBackend, ProcessBackend, TaskExecutor, ThreadBackend,
+                                run_on)
+
+
+# Process-backend work must be importable by the worker processes
+@run_on('cpu')
+def worker_pid():
+    return os.getpid()
+
+
+def square(n):
+    return n * n
+
+
+@pytest.fixture
+def executor():
+    executor = TaskExecutor({
+        'io': ThreadBackend(max_workers=2),
+        'cpu': ProcessBackend(max_workers=1),
+        'async': AsyncioBackend()
+    })
+    yield executor
+    executor.shutdown()
+
+
+def test_task_type_resolution():
+    assert TaskExecutor.task_type_of(worker_pid) == 'cpu'
+    assert TaskExecutor.task_type_of(worker_pid, 'io') == 'io'
+    assert TaskExecutor.task_type_of(square) == 'io'
+
+
+def test_work_is_routed_to_its_backend(executor):
+    async def fetch(value):
+        await asyncio.sleep(0)
+        return threading.current_thread().name, value
+
+    assert executor.submit(worker_pid).result(timeout=60) != os.getpid()
+    assert executor.submit(threading.current_thread).result(timeout=5).name.startswith('task-io')
+    assert executor.submit(fetch, ('quote',), task_type='async').result(timeout=5) == ('task-async', 'quote')
+    assert executor.submit(square, (7,), task_type='cpu').result(timeout=60) == 49
+
+    counts = executor.get_stats()['by_type']
+    assert (counts['cpu']['completed'], counts['io']['completed'], counts['async']['completed']) == (2, 1, 1)
+
+
+def test_unknown_task_type_is_refused(executor):
+    with pytest.raises(ValueError):
+        executor.submit(square, (1,), task_type='gpu')
+
+
+def test_async_backend_needs_a_coroutine_function(executor):
+    with pytest.raises(TypeError):
+        executor.submit(square, (1,), task_type='async')
+
+
+def test_failures_reach_the_future(executor):
+    future = executor.submit(int, ('not a number',))
+    with pytest.raises(ValueError):
+        future.result(timeout=5)
+    assert executor.stats['io']['failed'] == 1
+
+
+def test_timeout_fails_the_future_and_cancels_queued_work(executor):
+    release = threading.Event()
+    ran = []
+    busy = [executor.submit(release.wait, (5,)) for _ in range(2)]
+
+    queued = executor.submit(ran.append, ('late',), timeout=0.05)
+    with pytest.raises(TimeoutError):
+        queued.result(timeout=5)
+    release.set()
+    for future in busy:
+        future.result(timeout=5)
+    executor.submit(ran.append, ('after',)).result(timeout=5)
+
+    assert ran == ['after']
+    assert executor.stats['io']['timed_out'] == 1
+    assert executor.get_stats()['pending_timeouts'] == 0
+
+
+def test_running_thread_work_is_abandoned_on_timeout(executor):
+    future = executor.submit(time.sleep, (0.3,), timeout=0.05)
+    with pytest.raises(TimeoutError):
+        future.result(timeout=5)
+    time.sleep(0.4)
+    assert executor.stats['io']['completed'] == 0
+
+
+def test_cancelling_stops_the_coroutine(executor):
+    started, stopped = threading.Event(), threading.Event()
+
+    async def long_poll():
+        started.set()
+        try:
+            await asyncio.sleep(30)
+        finally:
+            stopped.set()
+
+    future = executor.submit(long_poll, task_type='async')
+    assert started.wait(5)
+    assert future.cancel()
+    assert stopped.wait(5)
+    with pytest.raises(CancelledError):
+        future.result()
+
+
+def test_async_timeout_cancels_the_coroutine(executor):
+    stopped = threading.Event()
+
+    async def hang():
+        try:
+            await asyncio.sleep(30)
+        finally:
+            stopped.set()
+
+    with pytest.raises(TimeoutError):
+        executor.submit(hang, task_type='async', timeout=0.05).result(timeout=5)
+    assert stopped.wait(5)
+    assert executor.stats['async']['timed_out'] == 1
+
+
+def test_broken_process_pool_is_replaced(executor, caplog):
+    first_pid = executor.submit(worker_pid).result(timeout=60)
+
+    # A worker that dies breaks the pool for every later submission
+    crashed = executor.submit(os._exit, (1,), task_type='cpu')
+    with pytest.raises(BrokenProcessPool):
+        crashed.result(timeout=60)
+    assert executor.stats['cpu']['failed'] == 1
+
+    assert executor.submit(worker_pid).result(timeout=60) not in (first_pid, os.getpid())
+    assert 'Process pool broken' in caplog.text
+
+
+def test_shutdown_then_submit_restarts_backends(executor):
+    assert executor.submit(square, (3,)).result(timeout=5) == 9
+    executor.shutdown()
+    assert executor.submit(square, (4,)).result(timeout=5) == 16
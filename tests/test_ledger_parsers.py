@@ -0,0 +1,120 @@
+"""
+Ledger Parser Tests
+Header fingerprinting, fixed-point parsing and the content-hash import
+registry, using the Nexo, Robinhood Crypto and budgeting exports in the repo
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+REPO = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO / 'pillar-a-trading' / 'learning'))
+
+from ledger_parsers import (LEDGER_COLUMNS, REALIZED_LOT_KIND, Ledger, detect_format,
+                            iter_ledger_chunks, parse_fixed)
+
+NEXO = REPO / 'Nexo_Transactions_1740794579.csv'
+ROBINHOOD = REPO / 'Robinhood Crypto Transactions.csv'
+BUDGET = REPO / '2025-08-05T13_01_10.438Z-transactions.csv'
+
+
+def parse(path, **kwargs) -> pd.DataFrame:
+    return pd.concat(iter_ledger_chunks(str(path), **kwargs), ignore_index=True)
+
+
+def test_parse_fixed():
+    assert parse_fixed('$1,532.89', 2) == 153289
+    assert parse_fixed('0.00019444', 8) == 19444
+    assert parse_fixed('0.125', 2) == 12   # half-even
+    assert parse_fixed(' - ', 2) == parse_fixed('', 8) == 0
+
+
+def test_formats_are_detected_by_header_fingerprint():
+    assert detect_format(str(NEXO)) == ('nexo', 0)
+    assert detect_format(str(ROBINHOOD)) == ('robinhood_crypto', 6)   # after the provider preamble
+    assert detect_format(str(BUDGET)) == ('budget', 0)
+    assert detect_format(str(REPO / 'bitcoin_2024-03-17_2024-04-16.csv')) == (None, None)
+
+
+def test_mismatched_format_is_refused():
+    with pytest.raises(ValueError):
+        parse(NEXO, format_name='budget')
+
+
+def test_nexo_rows():
+    ledger = parse(NEXO)
+    assert list(ledger.columns) == list(LEDGER_COLUMNS)
+    assert len(ledger) == 763
+    withdrawal = ledger.iloc[0]
+    assert withdrawal['record_id'] == 'NXT3sH0DNg590CknRQ1TvTFnx'
+    assert withdrawal['date'] == pd.Timestamp('2024-12-03 03:14:25')
+    assert (withdrawal['kind'], withdrawal['status']) == ('Withdrawal', 'approved')
+    assert (withdrawal['quantity'], withdrawal['fee'], withdrawal['usd_value']) == (-644377, 19444, -61860)
+    assert (ledger['status'] == 'rejected').sum() == 1
+
+
+def test_robinhood_rows_are_realized_lots():
+    ledger = parse(ROBINHOOD)
+    assert len(ledger) == 141
+    assert set(ledger['kind']) == {REALIZED_LOT_KIND}
+    first = ledger.iloc[0]
+    assert first['acquired_date'] == pd.Timestamp('2019-04-01')
+    assert (first['usd_value'], first['cost_basis']) == (202123, 200175)
+
+
+def test_budget_rows_flip_outflows_negative():
+    ledger = parse(BUDGET)
+    debit = ledger.iloc[0]
+    assert (debit['kind'], debit['asset'], debit['usd_value']) == ('Debit', 'USD', -999)
+    assert (debit['account'], debit['description']) == ('PayPal', 'iTunes')
+    assert (ledger['kind'] == 'Credit').eq(ledger['usd_value'] > 0).all()
+
+
+def test_chunks_concatenate_to_the_whole_file():
+    chunks = list(iter_ledger_chunks(str(NEXO), chunksize=100))
+    assert len(chunks) == 8 and max(len(chunk) for chunk in chunks) == 100
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True).astype(str),
+                                  parse(NEXO).astype(str))
+
+
+def test_import_registry_skips_unchanged_files(tmp_path):
+    ledger = Ledger(str(tmp_path / 'store'))
+    for path in (NEXO, ROBINHOOD, BUDGET):
+        assert not ledger.import_file(str(path)).empty
+    assert ledger.is_imported(str(NEXO))
+    assert ledger.import_file(str(NEXO)).empty
+    assert len(ledger.entries) == 763 + 141 + 1852
+
+    # A copy under another name has the same content hash
+    copy = tmp_path / 'nexo_copy.csv'
+    shutil.copy(NEXO, copy)
+    assert ledger.import_file(str(copy)).empty
+
+    # An edited file is a new import
+    copy.write_text(NEXO.read_text() + NEXO.read_text().splitlines()[1] + '\n')
+    assert len(ledger.import_file(str(copy))) == 764
+
+
+def test_saved_ledger_round_trips_exactly(tmp_path):
+    ledger = Ledger(str(tmp_path))
+    for path in (NEXO, ROBINHOOD, BUDGET):
+        ledger.import_file(str(path))
+
+    reloaded = Ledger(str(tmp_path))
+    assert set(reloaded.imports) == set(ledger.imports)
+    assert reloaded.is_imported(str(ROBINHOOD))
+    for name in ('quantity', 'fee', 'usd_value', 'cost_basis'):
+        assert reloaded.entries[name].tolist() == ledger.entries[name].tolist()
+    assert reloaded.entries['date'].tolist() == ledger.entries['date'].tolist()
+    assert (reloaded.entries['kind'] == REALIZED_LOT_KIND).sum() == 141
+
+
+def test_legacy_robinhood_kind_is_migrated_on_load(tmp_path):
+    Ledger(str(tmp_path)).import_file(str(ROBINHOOD))
+    ledger_file = tmp_path / 'ledger.csv'
+    ledger_file.write_text(ledger_file.read_text().replace(REALIZED_LOT_KIND, 'Sell'))
+    assert set(Ledger(str(tmp_path)).entries['kind']) == {REALIZED_LOT_KIND}
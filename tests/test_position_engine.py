@@ -0,0 +1,122 @@
+"""
+Position Engine Tests
+Heap-triggered stop / target closes for longs and shorts, reversal closes,
+running unrealized P&L and stale heap-entry cleanup
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'pillar-a-trading' / 'bots' / 'execution'))
+
+from position_engine import PositionEngine
+
+
+def make_engine(**kwargs):
+    kwargs.setdefault('stop_loss_pct', 0.02)
+    kwargs.setdefault('take_profit_pct', 0.04)
+    return PositionEngine(10_000.0, **kwargs)
+
+
+def test_long_stop_and_target_close_only_triggered_positions():
+    engine = make_engine()
+    low = engine.open_position('BTC/USD', 'BUY', 100.0, 1_000.0)    # stop 98, target 104
+    high = engine.open_position('BTC/USD', 'BUY', 110.0, 1_100.0)   # stop 107.8, target 114.4
+
+    closed = engine.mark_to_market('BTC/USD', 105.0)
+    assert [(p['id'], p['close_reason']) for p in closed] == [(high['id'], 'STOP_LOSS'), (low['id'], 'TAKE_PROFIT')]
+    assert closed[0]['profit_loss'] == pytest.approx(-50.0)
+    assert closed[1]['profit_loss'] == pytest.approx(50.0)
+    assert engine.open_count() == 0
+    assert engine.capital == pytest.approx(10_000.0)
+    assert (engine.winning_trades, engine.losing_trades) == (1, 1)
+
+
+def test_short_stop_and_target():
+    engine = make_engine()
+    engine.open_position('ETH/USD', 'SELL', 100.0, 1_000.0)   # stop 102, target 96
+    assert engine.mark_to_market('ETH/USD', 101.0) == []
+    closed = engine.mark_to_market('ETH/USD', 95.0)
+    assert closed[0]['close_reason'] == 'TAKE_PROFIT'
+    assert closed[0]['profit_loss'] == pytest.approx(50.0)
+
+    engine.open_position('ETH/USD', 'SELL', 100.0, 1_000.0)
+    closed = engine.mark_to_market('ETH/USD', 103.0)
+    assert closed[0]['close_reason'] == 'STOP_LOSS'
+    assert closed[0]['profit_loss'] == pytest.approx(-30.0)
+    assert engine.total_profit == pytest.approx(50.0) and engine.total_loss == pytest.approx(30.0)
+
+
+def test_updates_on_other_pairs_close_nothing():
+    engine = make_engine()
+    engine.open_position('BTC/USD', 'BUY', 100.0, 1_000.0)
+    assert engine.mark_to_market('ETH/USD', 1.0) == []
+    assert engine.open_count() == 1
+
+
+def test_reversal_closes_opposite_side_only():
+    engine = make_engine()
+    long = engine.open_position('BTC/USD', 'BUY', 100.0, 1_000.0)
+    short = engine.open_position('BTC/USD', 'SELL', 100.0, 500.0)
+
+    closed = engine.on_signal('BTC/USD', 'SELL', 101.0)
+    assert [p['id'] for p in closed] == [long['id']]
+    assert closed[0]['close_reason'] == 'SIGNAL_REVERSAL'
+    assert [p['id'] for p in engine.open_positions()] == [short['id']]
+
+    assert make_engine(close_on_reversal=False).on_signal('BTC/USD', 'SELL', 101.0) == []
+
+
+def test_unrealized_pnl_after_partial_closes():
+    engine = make_engine(stop_loss_pct=0.5, take_profit_pct=0.5)
+    engine.open_position('BTC/USD', 'BUY', 100.0, 1_000.0)
+    engine.open_position('BTC/USD', 'BUY', 120.0, 1_200.0)
+    engine.open_position('BTC/USD', 'SELL', 110.0, 550.0)
+
+    engine.mark_to_market('BTC/USD', 115.0)
+    assert engine.unrealized_pnl() == pytest.approx(150.0 - 50.0 - 25.0)
+
+    engine.on_signal('BTC/USD', 'BUY', 115.0)   # closes the short
+    assert engine.unrealized_pnl() == pytest.approx(100.0)
+    engine.mark_to_market('BTC/USD', 130.0)
+    assert engine.unrealized_pnl() == pytest.approx(300.0 + 100.0)
+
+
+def test_flat_pair_resets_running_totals():
+    engine = make_engine()
+    engine.open_position('BTC/USD', 'BUY', 100.0, 1_000.0)
+    engine.mark_to_market('BTC/USD', 90.0)
+    book = engine.books['BTC/USD']
+    assert book.net_quantity == 0.0 and book.net_cost == 0.0
+    assert not book.long_stops and not book.long_targets
+
+
+def test_stale_heap_entries_are_rebuilt_away():
+    engine = make_engine(stop_loss_pct=0.5, take_profit_pct=0.5)
+    keeper = engine.open_position('BTC/USD', 'BUY', 100.0, 100.0)
+    for _ in range(100):
+        engine.open_position('BTC/USD', 'SELL', 100.0, 100.0)
+    engine.on_signal('BTC/USD', 'BUY', 100.0)
+
+    book = engine.books['BTC/USD']
+    assert list(book.positions) == [keeper['id']]
+    assert len(book.long_stops) + len(book.short_stops) <= 4 * len(book.positions) + 64
+
+    PositionEngine._rebuild_heaps(book)
+    assert book.short_stops == [] and book.short_targets == []
+    assert [entry[1] for entry in book.long_stops + book.long_targets] == [keeper['id']] * 2
+    assert engine.mark_to_market('BTC/USD', 151.0)[0]['id'] == keeper['id']
+
+
+def test_load_positions_reindexes_and_continues_ids():
+    engine = make_engine()
+    engine.load_positions([
+        {'id': 7, 'type': 'BUY', 'pair': 'BTC/USD', 'price': 100.0, 'size': 1_000.0,
+         'stop_loss': 98.0, 'take_profit': 104.0},
+        {'type': 'BUY', 'pair': 'BTC/USD', 'price': 100.0, 'size': 1_000.0}   # legacy
+    ])
+    assert engine.open_count() == 1
+    assert engine.open_position('BTC/USD', 'BUY', 100.0, 1_000.0)['id'] == 8
+    assert engine.mark_to_market('BTC/USD', 97.0)[0]['id'] == 7
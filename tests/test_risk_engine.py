@@ -0,0 +1,143 @@
+"""
+Risk Engine Tests
+Day / week rollover, loss and emergency halts, position sizing and the
+open / close counters, against a temp profiles file
+"""
+
+import json
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'pillar-a-trading' / 'risk'))
+
+from risk_engine import RiskEngine
+
+LIMITS = {
+    'risk_per_trade': 0.01,
+    'max_position_size': 0.10,
+    'max_concurrent_trades': 2,
+    'max_daily_loss': 0.02,
+    'max_weekly_loss': 0.05,
+    'emergency_halt_threshold': 0.15,
+    'confidence_threshold': 0.6
+}
+
+# Wednesday 2026-10-14 - Sunday 10-18 is the end of its week
+WEDNESDAY = datetime(2026, 10, 14, 12)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    path = tmp_path / 'profiles.json'
+    path.write_text(json.dumps({'profiles': {'novice': {
+        'risk_parameters': LIMITS,
+        'max_trades_per_day': 3,
+        'stop_loss_percentage': 0.02,
+        'patterns_enabled': ['breakout']
+    }}}))
+    engine = RiskEngine(path)
+    engine.register_account('a', 'novice', 10_000.0)
+    return engine
+
+
+def at(day: int, hour: int = 12) -> datetime:
+    return datetime(2026, 10, day, hour)
+
+
+def test_trade_filters(engine):
+    assert engine.check_trade('a', 0.9, 'breakout', now=WEDNESDAY) == (True, 'OK')
+    assert not engine.check_trade('a', 0.5, now=WEDNESDAY)[0]
+    assert not engine.check_trade('a', 0.9, 'reversal', now=WEDNESDAY)[0]
+    assert not engine.check_trade('unknown', now=WEDNESDAY)[0]
+
+
+def test_open_and_close_update_counters(engine):
+    engine.record_open('a', now=WEDNESDAY)
+    engine.record_open('a', now=WEDNESDAY, concurrent=False)
+    status = engine.get_status('a')
+    assert status['trades_today'] == 2 and status['open_positions'] == 1
+
+    engine.record_close('a', 50.0, now=WEDNESDAY)
+    engine.record_close('a', 25.0, now=WEDNESDAY)
+    status = engine.get_status('a')
+    assert status['open_positions'] == 0
+    assert status['daily_pnl'] == status['weekly_pnl'] == 75.0
+    assert status['equity'] == status['peak_equity'] == 10_075.0
+    assert engine.get_status()['profiles']['novice']['equity'] == 10_075.0
+
+
+def test_restore_open_does_not_count_a_trade(engine):
+    engine.restore_open('a', 2)
+    status = engine.get_status('a')
+    assert status['open_positions'] == 2 and status['trades_today'] == 0
+    allowed, reason = engine.check_trade('a', now=WEDNESDAY)
+    assert not allowed and 'concurrent' in reason
+
+
+def test_daily_trade_limit_rolls_over_at_midnight(engine):
+    for _ in range(3):
+        engine.record_open('a', now=WEDNESDAY, concurrent=False)
+    assert 'Daily trade limit' in engine.check_trade('a', now=at(14, 23))[1]
+    assert engine.check_trade('a', now=at(15, 0))[0]
+    assert engine.get_status('a')['trades_today'] == 0
+
+
+def test_daily_loss_halts_until_the_next_day(engine):
+    engine.record_close('a', -200.0, now=WEDNESDAY)
+    assert engine.is_halted('a')
+    allowed, reason = engine.check_trade('a', now=at(14, 23))
+    assert not allowed and 'MAX_DAILY_LOSS' in reason
+    assert engine.check_trade('a', now=at(15, 0))[0]
+    assert not engine.is_halted('a')
+    status = engine.get_status('a')
+    assert status['daily_pnl'] == 0.0 and status['weekly_pnl'] == -200.0
+
+
+def test_weekly_loss_halts_until_monday(engine):
+    for day in (12, 13, 14):
+        engine.record_close('a', -190.0, now=at(day))
+    engine.record_close('a', -100.0, now=at(15))
+    assert 'MAX_WEEKLY_LOSS' in engine.check_trade('a', now=at(18, 23))[1]
+    assert engine.check_trade('a', now=at(19, 0))[0]
+    assert engine.get_status('a')['weekly_pnl'] == 0.0
+
+
+def test_emergency_halt_lasts_until_resume(engine):
+    engine.record_close('a', 1_000.0, now=at(12))
+    for day in (13, 14, 15, 16, 19, 20):
+        engine.resume('a', 'novice')
+        engine.record_close('a', -190.0, now=at(day))
+    engine.resume('a', 'novice')
+    engine.record_close('a', -600.0, now=at(21))
+
+    counters = engine.accounts['a']
+    assert counters.halted_until == date.max
+    assert 'EMERGENCY_HALT' in engine.check_trade('a', now=datetime(2027, 1, 1))[1]
+
+    engine.resume('a', 'novice')
+    assert engine.check_trade('a', now=datetime(2027, 1, 1))[0]
+
+
+def test_profile_halt_blocks_every_account(engine):
+    engine.register_account('b', 'novice', 10_000.0)
+    engine.record_close('b', -400.0, now=WEDNESDAY)
+    assert engine.is_halted('b') and not engine.is_halted('a')
+    allowed, reason = engine.check_trade('a', now=WEDNESDAY)
+    assert not allowed and reason.startswith('Profile halted')
+
+
+def test_position_fraction():
+    # risk_per_trade / stop = 0.5, capped at max_position_size
+    assert RiskEngine.position_fraction(dict(LIMITS, stop_loss_percentage=0.02)) == pytest.approx(0.10)
+    assert RiskEngine.position_fraction(LIMITS, 0.2) == pytest.approx(0.05)
+    assert RiskEngine.position_fraction({'max_position_size': 0.3}) == 0.3
+    assert RiskEngine.position_fraction({}) == 0.02
+
+
+def test_position_size_uses_current_equity(engine):
+    assert engine.position_size('a', 0.2) == pytest.approx(500.0)
+    engine.record_close('a', 10_000.0, now=WEDNESDAY)
+    assert engine.position_size('a', 0.2) == pytest.approx(1_000.0)
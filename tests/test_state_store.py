@@ -0,0 +1,155 @@
+"""
+Agent State Store Tests
+Snapshot + delta-log recovery after a simulated crash (including a torn
+last line), delta diffing and snapshot truncation, in a temp directory
+"""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'agent-4.0' / 'orchestrator'))
+
+from state_store import AgentStateStore
+
+
+def make_agent(agent_id, status='idle'):
+    return SimpleNamespace(id=agent_id, status=status, current_task=None,
+                           tasks_completed=0, errors_encountered=0)
+
+
+def make_store(state_dir, agents, **kwargs):
+    def snapshot():
+        return {'agents': [dict({'id': a.id}, **AgentStateStore._fields(a)) for a in agents]}
+
+    store = AgentStateStore(state_dir, snapshot, **kwargs)
+    store.track(agents)
+    return store
+
+
+def delta_lines(store):
+    return store.delta_path.read_text().splitlines() if store.delta_path.exists() else []
+
+
+def test_only_changed_fields_are_logged(tmp_path):
+    agent = make_agent(1)
+    store = make_store(tmp_path, [agent])
+    store.record_agent(agent)
+    assert store.buffer == []
+
+    agent.status = 'busy'
+    agent.current_task = 't1'
+    store.record_agent(agent)
+    store.flush()
+    assert [json.loads(line) for line in delta_lines(store)] == [
+        {'a': 1, 'f': {'status': 'busy', 'current_task': 't1'}, 'q': 1}]
+
+
+def test_snapshot_truncates_the_delta_log(tmp_path):
+    agents = [make_agent(1), make_agent(2)]
+    store = make_store(tmp_path, agents)
+    agents[0].tasks_completed = 3
+    store.record_agent(agents[0])
+    store.flush(snapshot=True)
+
+    assert delta_lines(store) == []
+    snapshot = json.loads(store.snapshot_path.read_text())
+    assert snapshot['last_seq'] == 1
+    assert snapshot['agents'][0]['tasks_completed'] == 3
+
+    # Nothing changed since: no new snapshot
+    store.flush(snapshot=True)
+    assert store.stats['snapshots'] == 1
+
+
+def test_recovery_replays_deltas_after_a_crash(tmp_path):
+    agents = [make_agent(1), make_agent(2)]
+    store = make_store(tmp_path, agents)
+    agents[0].status = 'busy'
+    store.record_agent(agents[0])
+    store.flush(snapshot=True)                 # snapshot holds seq 1
+
+    agents[0].status = 'idle'
+    agents[0].tasks_completed = 1
+    store.record_agent(agents[0])
+    agents[1].errors_encountered = 2
+    store.record_agent(agents[1])
+    store.flush()                              # deltas 2-3 on disk
+    agents[1].status = 'dead'
+    store.record_agent(agents[1])              # seq 4 only buffered - lost in the crash
+
+    recovered = AgentStateStore(tmp_path, dict).recover()
+    assert recovered['last_seq'] == 1 and recovered['replayed'] == 2
+    assert recovered['agents'][1] == {'status': 'idle', 'current_task': None,
+                                      'tasks_completed': 1, 'errors_encountered': 0}
+    assert recovered['agents'][2]['errors_encountered'] == 2
+    assert recovered['agents'][2]['status'] == 'idle'
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    agent = make_agent(1)
+    store = make_store(tmp_path, [agent])
+    agent.tasks_completed = 5
+    store.record_agent(agent)
+    store.flush()
+    with open(store.delta_path, 'a') as f:
+        f.write('{"a":1,"f":{"tasks_completed":6},"q"')
+
+    restarted = AgentStateStore(tmp_path, dict)
+    recovered = restarted.recover()
+    assert recovered['replayed'] == 1
+    assert recovered['agents'][1]['tasks_completed'] == 5
+    assert restarted.seq == 1
+
+
+def test_deltas_already_in_the_snapshot_are_not_replayed(tmp_path):
+    agent = make_agent(1)
+    store = make_store(tmp_path, [agent])
+    agent.tasks_completed = 1
+    store.record_agent(agent)
+    store.flush()
+    # Crash between writing the snapshot and truncating the log
+    store.snapshot_path.write_text(json.dumps({
+        'agents': [dict({'id': 1}, **AgentStateStore._fields(agent))], 'last_seq': 1}))
+
+    recovered = AgentStateStore(tmp_path, dict).recover()
+    assert recovered['replayed'] == 0
+    assert recovered['agents'][1]['tasks_completed'] == 1
+
+
+def test_recovered_store_continues_the_sequence(tmp_path):
+    agent = make_agent(1)
+    store = make_store(tmp_path, [agent])
+    agent.status = 'busy'
+    store.record_agent(agent)
+    store.flush()
+
+    restarted = AgentStateStore(tmp_path, dict)
+    restarted.recover()
+    agent.status = 'idle'
+    restarted.record_agent(agent)
+    restarted.flush()
+    assert [json.loads(line)['q'] for line in delta_lines(restarted)] == [1, 2]
+
+    # An unchanged agent is a no-op against the recovered baseline
+    restarted.record_agent(agent)
+    assert restarted.buffer == []
+
+
+def test_background_writer_and_close(tmp_path):
+    agent = make_agent(1)
+    store = make_store(tmp_path, [agent], flush_interval=0.01)
+    store.start()
+    agent.errors_encountered = 1
+    store.record_agent(agent)
+    store.close()
+
+    assert delta_lines(store) == []
+    snapshot = json.loads(store.snapshot_path.read_text())
+    assert snapshot['last_seq'] == 1
+    assert snapshot['agents'][0]['errors_encountered'] == 1
+
+
+def test_nothing_persisted_recovers_none(tmp_path):
+    assert AgentStateStore(tmp_path, dict).recover() is None
@@ -0,0 +1,148 @@
+"""
+Task Scheduler Tests
+Aged priority order, least-loaded idle-agent selection and join / task_done
+accounting across retry requeues, on a controlled clock
+"""
+
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'agent-4.0' / 'orchestrator'))
+
+import task_scheduler
+from task_scheduler import TaskScheduler
+
+
+class Clock:
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(task_scheduler, 'time', SimpleNamespace(time=clock))
+    return clock
+
+
+def agent(agent_id, category='trading'):
+    return SimpleNamespace(id=agent_id, category=category)
+
+
+def task(task_id, priority=1, category='trading'):
+    return SimpleNamespace(id=task_id, priority=priority, category=category)
+
+
+def drain(scheduler, release=True):
+    order = []
+    while True:
+        assignment = scheduler.next_assignment(timeout=0)
+        if assignment is None:
+            return order
+        order.append(assignment[0].id)
+        if release:
+            scheduler.release(assignment[1])
+
+
+def test_higher_priority_runs_first(clock):
+    scheduler = TaskScheduler([agent(1)])
+    for task_id, priority in (('low', 1), ('high', 5), ('mid', 3)):
+        scheduler.submit(task(task_id, priority))
+    assert drain(scheduler) == ['high', 'mid', 'low']
+
+
+def test_equal_priority_is_fifo(clock):
+    scheduler = TaskScheduler([agent(1)])
+    for task_id in ('a', 'b', 'c'):
+        scheduler.submit(task(task_id))
+    assert drain(scheduler) == ['a', 'b', 'c']
+
+
+def test_waiting_tasks_age_past_newer_high_priority_work(clock):
+    scheduler = TaskScheduler([agent(1)], aging_rate=0.1)
+    scheduler.submit(task('old', priority=1))
+    clock.now += 30                          # old has gained 3 priority
+    scheduler.submit(task('fresh', priority=3.5))
+    scheduler.submit(task('urgent', priority=4.5))
+    assert drain(scheduler) == ['urgent', 'old', 'fresh']
+
+
+def test_least_loaded_idle_agent_is_picked(clock):
+    scheduler = TaskScheduler([agent(1), agent(2), agent(3)])
+    scheduler.submit(task('t1'))
+    first = scheduler.next_assignment(timeout=0)[1]
+    scheduler.release(first)
+    assert scheduler.peek_idle('trading') != first
+
+    # Every agent gets one task before any gets a second
+    for n in range(3):
+        scheduler.submit(task(n))
+    picked = [scheduler.next_assignment(timeout=0)[1] for _ in range(3)]
+    assert sorted(picked) == [1, 2, 3] and picked[-1] == first
+    assert scheduler.next_assignment(timeout=0) is None     # all busy
+
+
+def test_dispatch_picks_the_best_head_across_categories(clock):
+    scheduler = TaskScheduler([agent(1, 'trading'), agent(2, 'research')])
+    scheduler.submit(task('trade', 1, 'trading'))
+    scheduler.submit(task('study', 9, 'research'))
+    scheduler.submit(task('orphan', 99, 'unstaffed'))
+    assert drain(scheduler, release=False) == ['study', 'trade']
+    assert scheduler.get_stats()['waiting'] == {'unstaffed': 1}
+
+
+def test_new_agents_pick_up_waiting_work(clock):
+    scheduler = TaskScheduler()
+    scheduler.submit(task('t', category='research'))
+    assert scheduler.next_assignment(timeout=0) is None
+    scheduler.add_agent(agent(7, 'research'))
+    assert scheduler.next_assignment(timeout=0)[1] == 7
+
+
+def test_join_counts_retry_requeues():
+    scheduler = TaskScheduler([agent(1)])
+    scheduler.submit(task('flaky'))
+    attempts = []
+
+    def worker():
+        while True:
+            assignment = scheduler.next_assignment(timeout=1)
+            if assignment is None:
+                return
+            work, agent_id = assignment
+            attempts.append(work.id)
+            scheduler.release(agent_id)
+            if len(attempts) < 3:
+                scheduler.submit(work)       # Retry, as AgentRevivalSystem does
+            scheduler.task_done()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert scheduler.join(timeout=5)
+    thread.join()
+    assert attempts == ['flaky'] * 3
+    assert scheduler.unfinished == 0
+    assert scheduler.stats['submitted'] == scheduler.stats['dispatched'] == 3
+
+
+def test_join_times_out_with_work_outstanding(clock):
+    scheduler = TaskScheduler([agent(1)])
+    scheduler.submit(task('t'))
+    assert not scheduler.join(timeout=0)
+    scheduler.next_assignment(timeout=0)
+    scheduler.task_done()
+    assert scheduler.join(timeout=0)
+
+
+def test_release_is_idempotent(clock):
+    scheduler = TaskScheduler([agent(1)])
+    scheduler.release(1)
+    scheduler.release(99)
+    assert scheduler.get_stats()['idle_agents'] == {'trading': 1}
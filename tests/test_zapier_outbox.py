@@ -0,0 +1,243 @@
+"""
+Zapier Outbox Tests
+Journal replay, acks, backoff, dead-lettering, per-process journals and
+budget deferral, against a temp directory and a stub transport (no network)
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'pillar-a-trading' / 'zapier-integration'))
+
+from zapier_outbox import ZapierOutbox
+from zapier_budget import ZapierBudget
+
+
+class StubResponse:
+    def __init__(self, status_code: int, headers=None):
+        self.status_code = status_code
+        self.text = ''
+        self.headers = headers or {}
+
+
+class StubTransport:
+    """Records every request; answers from a script of status codes, then 200"""
+
+    def __init__(self, script=()):
+        self.script = list(script)
+        self.requests = []
+
+    def post(self, url, json=None, headers=None, timeout=None, retries=None):
+        self.requests.append({'url': url, 'json': json, 'at': time.time()})
+        if self.script:
+            response = self.script.pop(0)
+            return response if isinstance(response, StubResponse) else StubResponse(response)
+        return StubResponse(200)
+
+
+def make_outbox(directory, transport, **kwargs):
+    kwargs.setdefault('linger', 0)
+    kwargs.setdefault('base_delay', 0.01)
+    return ZapierOutbox(str(directory), transport=transport, **kwargs)
+
+
+def test_undelivered_messages_replay_after_restart(tmp_path):
+    outbox = make_outbox(tmp_path, StubTransport(), start=False, owner='w1')
+    outbox.enqueue('http://hook', {'n': 1})
+    outbox.enqueue('http://hook', {'n': 2})
+    outbox.close()
+
+    transport = StubTransport()
+    restarted = make_outbox(tmp_path, transport, owner='w1')
+    assert restarted.stats['replayed'] == 2
+    assert restarted.flush(timeout=5)
+    assert [r['json'] for r in transport.requests] == [{'n': 1}, {'n': 2}]
+    restarted.close()
+
+
+def test_acked_messages_are_not_replayed(tmp_path):
+    transport = StubTransport()
+    outbox = make_outbox(tmp_path, transport, owner='w1')
+    outbox.enqueue('http://hook', {'n': 1})
+    assert outbox.flush(timeout=5)
+    outbox.close()
+
+    restarted = make_outbox(tmp_path, transport, start=False, owner='w1')
+    assert restarted.stats['replayed'] == 0
+    assert len(transport.requests) == 1
+    restarted.close()
+
+
+def test_server_errors_are_retried_with_backoff(tmp_path):
+    transport = StubTransport([503, 500])
+    outbox = make_outbox(tmp_path, transport)
+    outbox.enqueue('http://hook', {'n': 1})
+    assert outbox.flush(timeout=5)
+    assert len(transport.requests) == 3
+    assert outbox.stats['retries'] == 2
+    assert outbox.stats['delivered'] == 1
+    outbox.close()
+
+
+def test_retry_after_is_honoured(tmp_path):
+    transport = StubTransport([StubResponse(429, {'Retry-After': '1'})])
+    outbox = make_outbox(tmp_path, transport)
+    outbox.enqueue('http://hook', {'n': 1})
+    assert outbox.flush(timeout=5)
+    first, second = transport.requests
+    assert second['at'] - first['at'] >= 1.0
+    outbox.close()
+
+
+def test_client_errors_are_dead_lettered_and_requeued(tmp_path):
+    transport = StubTransport([400])
+    outbox = make_outbox(tmp_path, transport)
+    outbox.enqueue('http://hook', {'n': 1})
+    assert outbox.flush(timeout=5)
+    letters = outbox.dead_letters()
+    assert len(letters) == 1 and letters[0]['body'] == {'n': 1}
+    assert outbox.stats['dead_lettered'] == 1
+
+    assert outbox.requeue_dead_letters() == 1
+    assert outbox.flush(timeout=5)
+    assert outbox.dead_letters() == []
+    assert outbox.stats['delivered'] == 1
+    outbox.close()
+
+
+def test_exhausted_attempts_are_dead_lettered(tmp_path):
+    transport = StubTransport([500, 500, 500])
+    outbox = make_outbox(tmp_path, transport, max_attempts=2)
+    outbox.enqueue('http://hook', {'n': 1})
+    assert outbox.flush(timeout=5)
+    assert len(transport.requests) == 2
+    assert outbox.dead_letters()[0]['attempts'] == 2
+    outbox.close()
+
+
+def test_webhooks_with_a_batch_key_share_a_request(tmp_path):
+    transport = StubTransport()
+    outbox = make_outbox(tmp_path, transport, start=False)
+    for n in range(3):
+        outbox.enqueue_webhook('http://hook', {'n': n}, batch_key='sheets')
+    outbox.start()
+    assert outbox.flush(timeout=5)
+    assert [r['json'] for r in transport.requests] == [[{'n': 0}, {'n': 1}, {'n': 2}]]
+    outbox.close()
+
+
+def test_mcp_zaps_are_never_batched(tmp_path):
+    transport = StubTransport()
+    outbox = make_outbox(tmp_path, transport, start=False)
+    for n in range(3):
+        outbox.enqueue_zap('http://mcp', 'Log to Google Sheets', {'n': n}, batch_key='sheets')
+    outbox.start()
+    assert outbox.flush(timeout=5)
+    bodies = [r['json'] for r in transport.requests]
+    assert bodies == [{'method': 'trigger_zap', 'zap_name': 'Log to Google Sheets', 'payload': {'n': n}}
+                      for n in range(3)]
+    outbox.close()
+
+
+def test_each_outbox_owns_its_journal(tmp_path):
+    first = make_outbox(tmp_path, StubTransport(), start=False, owner='a')
+    second = make_outbox(tmp_path, StubTransport(), start=False, owner='b')
+    assert first.journal_path != second.journal_path
+    with pytest.raises(RuntimeError):
+        make_outbox(tmp_path, StubTransport(), start=False, owner='a')
+    first.close()
+    second.close()
+
+
+def test_live_journals_are_not_replayed_by_other_processes(tmp_path):
+    first_transport, second_transport = StubTransport(), StubTransport()
+    first = make_outbox(tmp_path, first_transport, start=False, owner='a')
+    first.enqueue('http://hook', {'from': 'a'})
+    first._journal.flush()
+
+    second = make_outbox(tmp_path, second_transport, owner='b')
+    second.enqueue('http://hook', {'from': 'b'})
+    assert second.stats['replayed'] == 0
+    first.start()
+    assert first.flush(timeout=5) and second.flush(timeout=5)
+    assert [r['json'] for r in first_transport.requests] == [{'from': 'a'}]
+    assert [r['json'] for r in second_transport.requests] == [{'from': 'b'}]
+    first.close()
+    second.close()
+
+
+def test_orphaned_journals_are_adopted_once(tmp_path):
+    crashed = make_outbox(tmp_path, StubTransport(), start=False, owner='crashed')
+    crashed.enqueue('http://hook', {'n': 1})
+    crashed.close()
+    (tmp_path / 'outbox.jsonl').write_text(
+        '{"op": "put", "msg": {"id": "legacy", "url": "http://hook", "body": {"n": 2}, '
+        '"batch_key": null, "protocol": "webhook", "auth_env": null, "attempts": 0}}\n')
+
+    transport = StubTransport()
+    adopter = make_outbox(tmp_path, transport, owner='adopter')
+    assert adopter.stats['replayed'] == 2
+    assert not (tmp_path / 'outbox.crashed.jsonl').exists()
+    assert not (tmp_path / 'outbox.jsonl').exists()
+    assert adopter.flush(timeout=5)
+
+    later = make_outbox(tmp_path, StubTransport(), start=False, owner='later')
+    assert later.stats['replayed'] == 0
+    assert sorted(r['json']['n'] for r in transport.requests) == [1, 2]
+    adopter.close()
+    later.close()
+
+
+def test_budget_defers_and_releases_after_reset(tmp_path):
+    budget = ZapierBudget(daily_cap=10)
+    transport = StubTransport()
+    outbox = make_outbox(tmp_path, transport, budget=budget, owner='w1')
+    ids = [outbox.enqueue_webhook('http://hook', {'n': n}, zap_name='Log to Google Sheets') for n in range(10)]
+    alert = outbox.enqueue_webhook('http://hook', {'alert': True}, zap_name='Error Alert')
+
+    deferred = [message_id for message_id in ids if outbox.is_deferred(message_id)]
+    assert deferred and not outbox.is_deferred(alert)
+    assert outbox.flush(timeout=5)
+    assert len(transport.requests) == 11 - len(deferred)
+    outbox.close()
+
+    # Deferred messages survive a restart and go out once the cap has reset
+    restarted = make_outbox(tmp_path, transport, budget=ZapierBudget(daily_cap=10), start=False, owner='w1')
+    assert len(restarted.deferred) == len(deferred)
+    restarted.budget.window_ends = time.time() - 1
+    assert restarted.release_deferred() == len(deferred)
+    restarted.start()
+    assert restarted.flush(timeout=5)
+    assert len(transport.requests) == 11
+    restarted.close()
+
+
+def test_budget_admission_does_no_file_io(tmp_path):
+    path = tmp_path / 'budget.json'
+    budget = ZapierBudget(daily_cap=100, path=str(path), merge_interval=60)
+    assert budget.admit('Trading Signal Handler')
+    assert not path.exists()
+    budget.close()
+    assert path.exists()
+
+
+def test_budget_file_is_shared_between_processes(tmp_path):
+    path = tmp_path / 'budget.json'
+    first = ZapierBudget(daily_cap=100, path=str(path), merge_interval=60)
+    second = ZapierBudget(daily_cap=100, path=str(path), merge_interval=60)
+    for _ in range(3):
+        assert first.admit('Trading Signal Handler')
+        assert second.admit('Email Alert')
+    second.merge()
+    assert first.forecast()['used'] == 6
+    assert ZapierBudget(daily_cap=100, path=str(path)).forecast()['by_zap'] == {
+        'Trading Signal Handler': 3, 'Email Alert': 3}
+
+    second.mark_exhausted()
+    first.merge()
+    assert not first.admit('Error Alert')
+    first.close()
+    second.close()